@@ -0,0 +1 @@
+# Benchmarks HTTP de la API (ver benchmarks/run.py)
@@ -0,0 +1,313 @@
+# benchmarks/run.py
+# Carga HTTP contra main:app con un catálogo sintético.
+#
+#   python -m benchmarks.run --sizes small,medium --concurrency 16
+#   python -m benchmarks.run --mongo-url mongodb://localhost:27017 --out bench.json
+#   python -m benchmarks.run --baseline bench.json --threshold 0.2
+#
+# Sin --mongo-url usa mongomock-motor (ver benchmarks/requirements.txt).
+import argparse
+import asyncio
+import itertools
+import json
+import sys
+import time
+from contextlib import redirect_stdout
+from typing import Any, Callable, Dict, List, Optional
+
+BENCH_DB_NAME = "SETSUNAI_BENCH"
+
+_counter = itertools.count()
+
+
+def unique(prefix: str) -> str:
+    return f"{prefix} {next(_counter)}"
+
+
+# -------------------------
+# Rutas a medir
+# -------------------------
+# Cada entrada arma (método, path, body) a partir de los códigos sembrados
+
+def piece_body(codes: dict) -> dict:
+    return {
+        "name": unique("Pieza carga"),
+        "description": "d",
+        "img": "i",
+        "costRoll": 8000,
+        "category": "rolls",
+        "protein": "salmón",
+    }
+
+
+def combo_body(codes: dict) -> dict:
+    return {
+        "name": unique("Combo carga"),
+        "img": "i",
+        "typePieces": codes["pieces"][:4],
+        "proteins": ["salmón"],
+        "description": "d",
+    }
+
+
+def bonus_body(codes: dict) -> dict:
+    return {
+        "name": unique("Extra carga"),
+        "description": "d",
+        "img": "i",
+        "type": "bebida",
+        "price": 1500,
+    }
+
+
+def quote_body(codes: dict) -> dict:
+    # Carrito de 100 líneas (piezas y extras)
+    items = [
+        {"type": "piece", "code": code, "size": 8, "quantity": 2}
+        for code in codes["pieces"][:50]
+    ]
+    items += [
+        {"type": "bonus", "code": codes["bonus"][i % len(codes["bonus"])]}
+        for i in range(100 - len(items))
+    ]
+    return {"items": items}
+
+
+def with_state(body: Callable[[dict], dict]) -> Callable[[dict], dict]:
+    # Los modelos *Update exigen todos los campos
+    return lambda codes: {**body(codes), "state": True}
+
+
+ROUTES: List[Dict[str, Any]] = [
+    {"name": "GET /authPiece/pieces",
+     "request": lambda c: ("GET", "/authPiece/pieces", None)},
+    {"name": "GET /authPiece/pieces?fields=summary",
+     "request": lambda c: ("GET", "/authPiece/pieces?fields=summary", None)},
+    {"name": "GET /authPiece/pieces?fields=code,name,price_8p",
+     "request": lambda c: ("GET", "/authPiece/pieces?fields=code,name,price_8p",
+                           None)},
+    {"name": "POST /authPiece/addPiece",
+     "request": lambda c: ("POST", "/authPiece/addPiece", piece_body(c))},
+    {"name": "PUT /authPiece/updatePiece/{code}",
+     "request": lambda c: ("PUT", f"/authPiece/updatePiece/{c['pieces'][0]}",
+                           with_state(piece_body)(c))},
+    {"name": "GET /authCombinedPieces/combinedPieces",
+     "request": lambda c: ("GET", "/authCombinedPieces/combinedPieces", None)},
+    {"name": "GET /authCombinedPieces/combinedPieces?fields=card",
+     "request": lambda c: ("GET", "/authCombinedPieces/combinedPieces?fields=card",
+                           None)},
+    {"name": "GET /authCombinedPieces/combinedPieces/variants/{comboCode}",
+     "request": lambda c: ("GET", "/authCombinedPieces/combinedPieces/variants/"
+                           f"{c['combos'][0]}", None)},
+    {"name": "GET /authCombinedPieces/comboVariants",
+     "request": lambda c: ("GET", "/authCombinedPieces/comboVariants", None)},
+    {"name": "GET /authCombinedPieces/comboVariants/search",
+     "request": lambda c: ("GET", "/authCombinedPieces/comboVariants/search"
+                           "?maxPrice=100000&minPieces=24&protein=salm%C3%B3n", None)},
+    {"name": "POST /authCombinedPieces/addCombinedPieces",
+     "request": lambda c: ("POST", "/authCombinedPieces/addCombinedPieces",
+                           combo_body(c))},
+    {"name": "PUT /authCombinedPieces/updateCombinedPieces/{code}",
+     "request": lambda c: ("PUT", "/authCombinedPieces/updateCombinedPieces/"
+                           f"{c['combos'][0]}", with_state(combo_body)(c))},
+    {"name": "GET /authBonusProduct/bonusProduct",
+     "request": lambda c: ("GET", "/authBonusProduct/bonusProduct", None)},
+    {"name": "GET /authBonusProduct/bonusProduct?fields=summary",
+     "request": lambda c: ("GET", "/authBonusProduct/bonusProduct?fields=summary",
+                           None)},
+    {"name": "POST /authBonusProduct/addBonusProduct",
+     "request": lambda c: ("POST", "/authBonusProduct/addBonusProduct",
+                           bonus_body(c))},
+    {"name": "PUT /authBonusProduct/updateBonusProduct/{code}",
+     "request": lambda c: ("PUT", "/authBonusProduct/updateBonusProduct/"
+                           f"{c['bonus'][0]}", with_state(bonus_body)(c))},
+    {"name": "GET /authMenu/menu",
+     "request": lambda c: ("GET", "/authMenu/menu", None)},
+    {"name": "POST /authQuote/quote",
+     "request": lambda c: ("POST", "/authQuote/quote", quote_body(c))},
+]
+
+
+# -------------------------
+# Medición
+# -------------------------
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, round(q * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+
+async def drive_route(client, route: dict, codes: dict, requests: int,
+                      concurrency: int) -> Dict[str, Any]:
+    latencies: List[float] = []
+    errors = 0
+    pending = iter(range(requests))
+
+    async def worker():
+        nonlocal errors
+        for _ in pending:
+            method, path, body = route["request"](codes)
+            started = time.perf_counter()
+            response = await client.request(method, path, json=body)
+            latencies.append((time.perf_counter() - started) * 1000)
+            if response.status_code >= 400:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": requests,
+        "errors": errors,
+        "throughput_rps": round(requests / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 0.50), 3),
+        "p95_ms": round(percentile(latencies, 0.95), 3),
+        "p99_ms": round(percentile(latencies, 0.99), 3),
+    }
+
+
+def patch_mongomock_bulk() -> None:
+    # mongomock no conoce el argumento sort que pymongo >= 4.11 pasa al
+    # armar un UpdateOne dentro de bulk_write
+    from mongomock.collection import BulkOperationBuilder
+
+    original = BulkOperationBuilder.add_update
+    if getattr(original, "ignores_sort", False):
+        return
+
+    def add_update(self, *args, sort=None, **kwargs):
+        return original(self, *args, **kwargs)
+
+    add_update.ignores_sort = True
+    BulkOperationBuilder.add_update = add_update
+
+
+async def open_database(mongo_url: Optional[str]):
+    import dataBase.DBConfing as DBConfing
+
+    if mongo_url:
+        from motor.motor_asyncio import AsyncIOMotorClient
+        client = AsyncIOMotorClient(mongo_url)
+    else:
+        try:
+            from mongomock_motor import AsyncMongoMockClient
+        except ImportError:
+            sys.exit(
+                "Falta mongomock-motor: pip install -r benchmarks/requirements.txt "
+                "o usá --mongo-url"
+            )
+        patch_mongomock_bulk()
+        client = AsyncMongoMockClient()
+
+    await client.drop_database(BENCH_DB_NAME)
+    # connect_to_db() reutiliza este cliente al arrancar el lifespan
+    DBConfing.client = client
+    DBConfing.db = client[BENCH_DB_NAME]
+    return DBConfing.db
+
+
+async def run_size(size: str, args) -> Dict[str, Any]:
+    import httpx
+    from main import app
+    from services import catalogCache
+    from benchmarks.seed import CATALOG_SIZES, seed_catalog
+
+    db = await open_database(args.mongo_url)
+    catalogCache.clear()
+    codes = await seed_catalog(db, *CATALOG_SIZES[size])
+
+    results = {}
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://bench"
+        ) as client:
+            for route in ROUTES:
+                if args.routes and not any(r in route["name"] for r in args.routes):
+                    continue
+                results[route["name"]] = await drive_route(
+                    client, route, codes, args.requests, args.concurrency
+                )
+                print(f"   {route['name']}: {results[route['name']]}",
+                      file=sys.stderr)
+
+    return results
+
+
+# -------------------------
+# Regresiones
+# -------------------------
+
+def compare(results: dict, baseline: dict, threshold: float) -> List[str]:
+    # Regresión = p95 más alto o throughput más bajo que la base en > threshold
+    regressions = []
+    for size, routes in results.items():
+        for name, current in routes.items():
+            base = baseline.get(size, {}).get(name)
+            if not base:
+                continue
+            if current["p95_ms"] > base["p95_ms"] * (1 + threshold):
+                regressions.append(
+                    f"{size} {name}: p95 {base['p95_ms']} → {current['p95_ms']} ms"
+                )
+            if current["throughput_rps"] < base["throughput_rps"] * (1 - threshold):
+                regressions.append(
+                    f"{size} {name}: throughput {base['throughput_rps']} → "
+                    f"{current['throughput_rps']} rps"
+                )
+    return regressions
+
+
+async def main(args) -> int:
+    results = {}
+    # stdout queda solo para el reporte JSON (python -m benchmarks.run | jq):
+    # lo que imprime la app al arrancar (conexión, índices, worker) va a stderr
+    with redirect_stdout(sys.stderr):
+        for size in args.sizes:
+            print(f"👉 Catálogo {size}")
+            results[size] = await run_size(size, args)
+
+    output = json.dumps(results, indent=2)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(output)
+    print(output)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        for line in regressions:
+            print(f"❌ {line}", file=sys.stderr)
+        if regressions:
+            return 1
+        print("✔ Sin regresiones", file=sys.stderr)
+
+    return 0
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark HTTP de la API.")
+    parser.add_argument("--sizes", type=lambda s: s.split(","), default=["small"],
+                        help="catálogos: small, medium, large")
+    parser.add_argument("--requests", type=int, default=200,
+                        help="requests por ruta")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--routes", type=lambda s: s.split(","), default=None,
+                        help="filtra rutas por subcadena del nombre")
+    parser.add_argument("--mongo-url", default=None,
+                        help="mongod local en vez de la base en memoria")
+    parser.add_argument("--out", default=None, help="archivo JSON de salida")
+    parser.add_argument("--baseline", default=None,
+                        help="JSON de una corrida anterior para comparar")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="tolerancia relativa antes de marcar regresión")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main(parse_args())))
@@ -0,0 +1,86 @@
+# benchmarks/seed.py
+# Catálogos sintéticos para los benchmarks
+import random
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from services.pieceService import generate_prices
+from services.pricingEngine import generate_variants_batch
+from services.comboVariantService import replace_combo_variants
+
+# nombre -> (piezas, combos, productos extra)
+CATALOG_SIZES = {
+    "small": (20, 10, 5),
+    "medium": (200, 100, 20),
+    "large": (1000, 500, 50),
+}
+
+PROTEINS = ["salmón", "atún", "langostino", "kanikama", "vegetal"]
+
+
+async def seed_catalog(
+    db: AsyncIOMotorDatabase,
+    pieces: int,
+    combos: int,
+    bonus: int,
+    seed: int = 42
+) -> dict:
+    rng = random.Random(seed)
+
+    pieces_docs = []
+    for i in range(pieces):
+        cost = rng.randint(3000, 20000)
+        pieces_docs.append({
+            "code": f"BP{i:05d}",
+            "name": f"Pieza bench {i}",
+            "description": "Pieza generada para benchmarks",
+            "img": f"https://img.example.com/p/{i}.jpg",
+            "costRoll": cost,
+            "category": "rolls",
+            "protein": rng.choice(PROTEINS),
+            "state": True,
+            **generate_prices(cost),
+        })
+    if pieces_docs:
+        await db["pieces"].insert_many(pieces_docs)
+
+    codes = [p["code"] for p in pieces_docs]
+    combos_docs = []
+    for i in range(combos):
+        members = rng.sample(codes, min(len(codes), rng.randint(3, 8)))
+        combos_docs.append({
+            "code": f"BC{i:05d}",
+            "name": f"Combo bench {i}",
+            "img": f"https://img.example.com/c/{i}.jpg",
+            "typePieces": members,
+            "proteins": sorted({
+                p["protein"] for p in pieces_docs if p["code"] in members
+            }),
+            "description": "Combo generado para benchmarks",
+            "state": True,
+        })
+    if combos_docs:
+        await db["combinedPieces"].insert_many(combos_docs)
+        await replace_combo_variants(
+            generate_variants_batch(combos_docs, pieces_docs), db
+        )
+
+    bonus_docs = [
+        {
+            "code": f"BB{i:05d}",
+            "name": f"Extra bench {i}",
+            "description": "Extra generado para benchmarks",
+            "img": f"https://img.example.com/b/{i}.jpg",
+            "type": "bebida",
+            "price": rng.randint(5, 40) * 100,
+            "state": True,
+        }
+        for i in range(bonus)
+    ]
+    if bonus_docs:
+        await db["bonusProduct"].insert_many(bonus_docs)
+
+    return {
+        "pieces": [p["code"] for p in pieces_docs],
+        "combos": [c["code"] for c in combos_docs],
+        "bonus": [b["code"] for b in bonus_docs],
+    }
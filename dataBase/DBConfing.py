@@ -3,22 +3,59 @@ import os
 from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
 from dotenv import load_dotenv
 from typing import Optional
+from dataBase.indexes import reconcile_indexes
+from dataBase.metrics import CommandMetrics, PoolMetrics, pool_state
+import asyncio
 
 load_dotenv()
 
 MONGO_URL = os.getenv("MONGO_URL", "mongodb://localhost:27017")
 DB_NAME = os.getenv("DB_NAME", "SETSUNAI")
 
+# Pool de conexiones (variables de entorno opcionales)
+MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", "100"))
+MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", "0"))
+MAX_IDLE_TIME_MS = int(os.getenv("MONGO_MAX_IDLE_TIME_MS", "0")) or None
+CONNECT_TIMEOUT_MS = int(os.getenv("MONGO_CONNECT_TIMEOUT_MS", "10000"))
+SERVER_SELECTION_TIMEOUT_MS = int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", "30000"))
+WAIT_QUEUE_TIMEOUT_MS = int(os.getenv("MONGO_WAIT_QUEUE_TIMEOUT_MS", "0")) or None
+COMPRESSORS = os.getenv("MONGO_COMPRESSORS", "")  # p. ej. "zstd,snappy,zlib"
+
+# Conexiones que se abren antes de marcar el worker como listo
+WARMUP_CONNECTIONS = int(os.getenv("MONGO_WARMUP_CONNECTIONS", str(max(MIN_POOL_SIZE, 1))))
+
 client: Optional[AsyncIOMotorClient] = None
 db: Optional[AsyncIOMotorDatabase] = None
 
+# True cuando el pool está precalentado y los índices verificados
+ready = False
+
+
+def client_options() -> dict:
+    options = {
+        "maxPoolSize": MAX_POOL_SIZE,
+        "minPoolSize": MIN_POOL_SIZE,
+        "maxIdleTimeMS": MAX_IDLE_TIME_MS,
+        "connectTimeoutMS": CONNECT_TIMEOUT_MS,
+        "serverSelectionTimeoutMS": SERVER_SELECTION_TIMEOUT_MS,
+        "waitQueueTimeoutMS": WAIT_QUEUE_TIMEOUT_MS,
+    }
+    if COMPRESSORS:
+        options["compressors"] = COMPRESSORS
+    return options
+
 async def connect_to_db() -> AsyncIOMotorDatabase:
     
     # Conecta a la base de datos y retorna la instancia de DB.
     
     global client, db
     if client is None:
-        client = AsyncIOMotorClient(MONGO_URL)
+        # El listener mide cada comando (ver /metrics)
+        client = AsyncIOMotorClient(
+            MONGO_URL,
+            event_listeners=[CommandMetrics(), PoolMetrics()],
+            **client_options()
+        )
         db = client[DB_NAME]
         print(f"✅ Conectado a MongoDB: {DB_NAME}")
     assert db is not None  # Pylance entiende que db no puede ser None aquí
@@ -28,16 +65,50 @@ async def init_indexes():
     if db is None:
         raise RuntimeError("DB no inicializada")
 
-    await db["bonusProduct"].create_index(
-        "code",
-        unique=True
-    )
+    # Crea los índices registrados que falten y reporta los que no se pudieron
+    return await reconcile_indexes(db)
+
+async def warm_up() -> None:
+    # Ping + pings concurrentes para abrir WARMUP_CONNECTIONS conexiones del
+    # pool antes de recibir tráfico (cada ping simultáneo usa su conexión)
+    global ready
+    if db is None:
+        raise RuntimeError("DB no inicializada")
+
+    await db.command("ping")
+    connections = min(WARMUP_CONNECTIONS, MAX_POOL_SIZE)
+    await asyncio.gather(*(db.command("ping") for _ in range(connections)))
+
+    ready = True
+    print(f"🔥 Pool precalentado: {pool_state['open']} conexiones abiertas")
+
+
+async def readiness() -> dict:
+    # Estado para /health/ready: listo solo si hubo warm-up y Mongo responde
+    state = {
+        "ready": ready,
+        "pool": {
+            **pool_state,
+            "max_pool_size": MAX_POOL_SIZE,
+            "min_pool_size": MIN_POOL_SIZE,
+        },
+    }
+    if not ready or db is None:
+        state["ready"] = False
+        return state
+
+    try:
+        await asyncio.wait_for(db.command("ping"), timeout=2)
+    except Exception as e:
+        state["ready"] = False
+        state["error"] = str(e)
+    return state
 
-    print("📌 Índice único creado en bonusProduct.code")
 
 async def close_db():
     # Cierra la conexión a MongoDB.
-    global client
+    global client, ready
+    ready = False
     if client:
         client.close()
         client = None
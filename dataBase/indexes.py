@@ -0,0 +1,173 @@
+# dataBase/indexes.py
+# Registro declarativo de los índices que usan las consultas de los servicios
+import asyncio
+from typing import List, Dict, Any, Optional
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import IndexModel
+from pymongo.errors import OperationFailure, DuplicateKeyError
+
+# Comparación sin distinguir mayúsculas/minúsculas (strength 2)
+NAME_COLLATION = {"locale": "es", "strength": 2}
+
+INDEXES: List[Dict[str, Any]] = [
+    # find_one / find_one_and_update por code
+    {"collection": "pieces", "keys": [("code", 1)], "unique": True},
+    {"collection": "combinedPieces", "keys": [("code", 1)], "unique": True},
+    {"collection": "bonusProduct", "keys": [("code", 1)], "unique": True},
+    # nombres únicos sin distinguir mayúsculas (reemplaza los $regex)
+    {"collection": "pieces", "keys": [("name", 1)], "unique": True,
+     "collation": NAME_COLLATION},
+    {"collection": "combinedPieces", "keys": [("name", 1)], "unique": True,
+     "collation": NAME_COLLATION},
+    {"collection": "bonusProduct", "keys": [("name", 1)], "unique": True,
+     "collation": NAME_COLLATION},
+    # combos que contienen una pieza (fan-out de update_piece), multikey
+    {"collection": "combinedPieces", "keys": [("typePieces", 1)]},
+    # variantes del set vigente de un combo (el prefijo sirve para comboCode)
+    {"collection": "comboVariants", "keys": [("comboCode", 1), ("setVersion", 1)]},
+    # listados de variantes vigentes paginados por _id (iter_variants)
+    {"collection": "comboVariants", "keys": [("active", 1), ("_id", 1)]},
+    # búsqueda de variantes (search_variants): igualdades (active,
+    # comboState y filtros), después el orden (campo + _id, que es el
+    # desempate) y los rangos se filtran sobre el índice
+    {"collection": "comboVariants",
+     "keys": [("active", 1), ("comboState", 1), ("finalPrice", 1), ("_id", 1)]},
+    {"collection": "comboVariants",
+     "keys": [("active", 1), ("comboState", 1), ("totalPieces", 1), ("_id", 1)]},
+    {"collection": "comboVariants",
+     "keys": [("active", 1), ("comboState", 1), ("perRoll", 1), ("take", 1),
+              ("discounted", 1), ("finalPrice", 1), ("_id", 1)]},
+    # multikey: Mongo no admite dos arrays en el mismo índice compuesto
+    {"collection": "comboVariants",
+     "keys": [("active", 1), ("comboState", 1), ("proteins", 1),
+              ("finalPrice", 1), ("_id", 1)]},
+    {"collection": "comboVariants",
+     "keys": [("active", 1), ("comboState", 1), ("pieces.pieceCode", 1),
+              ("finalPrice", 1), ("_id", 1)]},
+]
+
+
+# -------------------------
+# Helpers
+# -------------------------
+
+def index_name(spec: Dict[str, Any]) -> str:
+    # Mismo nombre que genera Mongo por defecto ("code_1", ...)
+    return spec.get("name") or "_".join(f"{k}_{d}" for k, d in spec["keys"])
+
+
+def index_options(spec: Dict[str, Any]) -> Dict[str, Any]:
+    options = {"name": index_name(spec)}
+    for option in ("unique", "collation", "sparse"):
+        if spec.get(option):
+            options[option] = spec[option]
+    return options
+
+
+def matches(spec: Dict[str, Any], info: Dict[str, Any]) -> bool:
+    # Compara claves y opciones declaradas contra index_information()
+    if [tuple(k) for k in info["key"]] != [tuple(k) for k in spec["keys"]]:
+        return False
+    if bool(info.get("unique")) != bool(spec.get("unique")):
+        return False
+    if spec.get("collation"):
+        current = info.get("collation") or {}
+        return all(current.get(k) == v for k, v in spec["collation"].items())
+    return True
+
+
+def duplicate_key_field(error: DuplicateKeyError) -> Optional[str]:
+    # Campo que provocó el E11000 ("name", "code", ...)
+    details = error.details or {}
+    if details.get("keyPattern"):
+        return next(iter(details["keyPattern"]))
+
+    message = details.get("errmsg") or str(error)
+    for spec in INDEXES:
+        if f"index: {index_name(spec)}" in message:
+            return spec["keys"][0][0]
+    return None
+
+
+async def existing_indexes(
+    db: AsyncIOMotorDatabase
+) -> Dict[str, Dict[str, Any]]:
+    collections = sorted({spec["collection"] for spec in INDEXES})
+    infos = await asyncio.gather(
+        *(db[c].index_information() for c in collections)
+    )
+    return dict(zip(collections, infos))
+
+
+async def missing_indexes(db: AsyncIOMotorDatabase) -> List[Dict[str, Any]]:
+    # Índices registrados que no existen (o existen con otras opciones)
+    existing = await existing_indexes(db)
+    return [
+        spec for spec in INDEXES
+        if not any(
+            matches(spec, info)
+            for info in existing[spec["collection"]].values()
+        )
+    ]
+
+
+# -------------------------
+# Reconciliación
+# -------------------------
+
+async def conflicting_values(
+    db: AsyncIOMotorDatabase,
+    spec: Dict[str, Any],
+    limit: int = 20
+) -> List[Any]:
+    # Valores repetidos (con la collation del índice) que impiden crear
+    # un índice unique de un solo campo
+    field = spec["keys"][0][0]
+    options = {"collation": spec["collation"]} if spec.get("collation") else {}
+    groups = await db[spec["collection"]].aggregate([
+        {"$group": {"_id": f"${field}", "count": {"$sum": 1}}},
+        {"$match": {"count": {"$gt": 1}}},
+        {"$limit": limit},
+    ], **options).to_list(length=None)
+    return [g["_id"] for g in groups]
+
+
+async def reconcile_indexes(db: AsyncIOMotorDatabase) -> List[Dict[str, Any]]:
+    # Crea solo lo que falta; si todo está al día no escribe nada.
+    # Devuelve los índices que siguen faltando. Si no se puede crear un
+    # índice unique falla: la unicidad de name/code depende solo de esos
+    # índices, y sin ellos la API aceptaría duplicados en silencio.
+    missing = await missing_indexes(db)
+    if not missing:
+        print("📌 Índices al día")
+        return []
+
+    failed_unique = []
+    for spec in missing:
+        collection = spec["collection"]
+        try:
+            await db[collection].create_indexes(
+                [IndexModel(spec["keys"], **index_options(spec))]
+            )
+            print(f"📌 Índice creado: {collection}.{index_name(spec)}")
+        except OperationFailure as e:
+            print(f"⚠️ No se pudo crear {collection}.{index_name(spec)}: {e}")
+            if spec.get("unique"):
+                failed_unique.append(spec)
+
+    still_missing = await missing_indexes(db)
+    for spec in still_missing:
+        print(f"⚠️ Falta el índice {spec['collection']}.{index_name(spec)}")
+
+    problems = []
+    for spec in failed_unique:
+        conflicts = await conflicting_values(db, spec)
+        detail = f" (repetidos: {', '.join(map(str, conflicts))})" if conflicts else ""
+        problems.append(f"{spec['collection']}.{index_name(spec)}{detail}")
+    if problems:
+        raise RuntimeError(
+            "No se pudieron crear índices unique; corregí los duplicados y "
+            "volvé a arrancar: " + "; ".join(problems)
+        )
+
+    return still_missing
@@ -0,0 +1,221 @@
+# dataBase/metrics.py
+# Histogramas en memoria (latencia por ruta y por comando de Mongo)
+# exportados en formato de texto de Prometheus
+import time
+from bisect import bisect_left
+from typing import Dict, Tuple, List
+from pymongo import monitoring
+
+from services.catalogCache import stats as cache_stats
+
+# Límites superiores de los buckets, en segundos
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+
+class Histogram:
+    __slots__ = ("counts", "total", "count")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, seconds: float) -> None:
+        self.counts[bisect_left(BUCKETS, seconds)] += 1
+        self.total += seconds
+        self.count += 1
+
+
+# (método, ruta, status) -> Histogram
+http_requests: Dict[Tuple[str, str, str], Histogram] = {}
+
+# (colección, comando) -> Histogram
+mongo_commands: Dict[Tuple[str, str], Histogram] = {}
+mongo_failures: Dict[Tuple[str, str], int] = {}
+
+
+def observe(store: dict, key: tuple, seconds: float) -> None:
+    histogram = store.get(key)
+    if histogram is None:
+        histogram = store[key] = Histogram()
+    histogram.observe(seconds)
+
+
+# -------------------------
+# Mongo
+# -------------------------
+
+class CommandMetrics(monitoring.CommandListener):
+    # Se registra al crear el AsyncIOMotorClient (ver connect_to_db)
+
+    def __init__(self):
+        # request_id -> (colección, comando)
+        self._pending: Dict[int, Tuple[str, str]] = {}
+
+    def started(self, event):
+        # getMore lleva el id del cursor en el campo del comando; la
+        # colección va aparte
+        field = "collection" if event.command_name == "getMore" else event.command_name
+        collection = event.command.get(field)
+        if not isinstance(collection, str):
+            collection = ""
+        self._pending[event.request_id] = (collection, event.command_name)
+
+    def succeeded(self, event):
+        key = self._pending.pop(event.request_id, None)
+        if key:
+            observe(mongo_commands, key, event.duration_micros / 1_000_000)
+
+    def failed(self, event):
+        key = self._pending.pop(event.request_id, None)
+        if key:
+            observe(mongo_commands, key, event.duration_micros / 1_000_000)
+            mongo_failures[key] = mongo_failures.get(key, 0) + 1
+
+
+# Estado del pool de conexiones (para /health/ready y /metrics)
+pool_state = {
+    "open": 0,
+    "checked_out": 0,
+    "check_out_failures": 0,
+    "cleared": 0,
+}
+
+
+class PoolMetrics(monitoring.ConnectionPoolListener):
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pool_state["cleared"] += 1
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        pool_state["open"] += 1
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        pool_state["open"] -= 1
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def connection_check_out_failed(self, event):
+        pool_state["check_out_failures"] += 1
+
+    def connection_checked_out(self, event):
+        pool_state["checked_out"] += 1
+
+    def connection_checked_in(self, event):
+        pool_state["checked_out"] -= 1
+
+
+# -------------------------
+# HTTP
+# -------------------------
+
+def route_template(scope: dict) -> str:
+    # /authPiece/updatePiece/AB12CD -> /authPiece/updatePiece/{code}, para no
+    # generar una serie por cada código
+    # Sale del path declarado de la ruta, nunca de los valores: un código
+    # igual a un segmento literal ("variants") no cambia la etiqueta
+    route = scope.get("route")
+    template = getattr(route, "path", None)
+    if not template:
+        return "unmatched"
+
+    # La ruta guarda su path sin el prefijo de include_router: el prefijo
+    # son los segmentos literales del path real que sobran adelante
+    segments = scope["path"].split("/")
+    extra = len(segments) - len(template.split("/"))
+    prefix = "/".join(segments[:extra + 1]) if extra > 0 else ""
+    return prefix + template
+
+
+async def timing_middleware(request, call_next):
+    started = time.perf_counter()
+    response = await call_next(request)
+
+    observe(
+        http_requests,
+        (request.method, route_template(request.scope), str(response.status_code)),
+        time.perf_counter() - started
+    )
+    return response
+
+
+# -------------------------
+# Exportación
+# -------------------------
+
+CACHE_EVENTS = {
+    "hits": "lecturas servidas desde memoria",
+    "misses": "lecturas que cargaron desde Mongo",
+    "invalidations": "invalidaciones por escritura",
+}
+
+def escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def labels(**values) -> str:
+    return ",".join(f'{k}="{escape(v)}"' for k, v in values.items())
+
+
+def render_histogram(name: str, help_text: str, store: dict,
+                     label_names: Tuple[str, ...]) -> List[str]:
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+    for key, histogram in sorted(store.items()):
+        base = labels(**dict(zip(label_names, key)))
+        cumulative = 0
+        for bound, count in zip(BUCKETS, histogram.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{base},le="{bound}"}} {cumulative}')
+        lines.append(f'{name}_bucket{{{base},le="+Inf"}} {histogram.count}')
+        lines.append(f"{name}_sum{{{base}}} {histogram.total}")
+        lines.append(f"{name}_count{{{base}}} {histogram.count}")
+    return lines
+
+
+def render_prometheus() -> str:
+    lines = render_histogram(
+        "http_request_duration_seconds",
+        "Latencia de las requests HTTP por ruta.",
+        http_requests,
+        ("method", "route", "status")
+    )
+    lines += render_histogram(
+        "mongo_command_duration_seconds",
+        "Duración de los comandos de MongoDB por colección.",
+        mongo_commands,
+        ("collection", "command")
+    )
+    lines += [
+        "# HELP mongo_command_failures_total Comandos de MongoDB fallidos.",
+        "# TYPE mongo_command_failures_total counter",
+    ]
+    for (collection, command), count in sorted(mongo_failures.items()):
+        lines.append(
+            f"mongo_command_failures_total{{"
+            f"{labels(collection=collection, command=command)}}} {count}"
+        )
+    for key, value in pool_state.items():
+        name = f"mongo_pool_{key}"
+        lines += [f"# TYPE {name} gauge", f"{name} {value}"]
+    # Contadores de services/catalogCache (aciertos, cargas, invalidaciones)
+    for key, value in cache_stats.items():
+        name = f"catalog_cache_{key}_total"
+        lines += [
+            f"# HELP {name} Caché de catálogo: {CACHE_EVENTS[key]}.",
+            f"# TYPE {name} counter",
+            f"{name} {value}",
+        ]
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,20 @@
+# gunicorn.conf.py
+# Modo multi-worker: gunicorn como gestor de procesos + workers de uvicorn
+import os
+import multiprocessing
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8080')}"
+worker_class = "uvicorn.workers.UvicornWorker"
+
+# Un worker por núcleo (la app es async: no hace falta sobre-suscribir)
+workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+
+# Con más de un worker la caché de catálogo tiene que ser coherente entre
+# procesos (ver services/catalogCache.py); los workers heredan este entorno
+os.environ["WEB_CONCURRENCY"] = str(workers)
+if workers > 1:
+    os.environ.setdefault("CACHE_COHERENCE", "shared")
+
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "60"))
+graceful_timeout = 30
+keepalive = 5
@@ -2,22 +2,37 @@ from fastapi import FastAPI
 from routes.pieceRoutes import router as pieceRouter
 from routes.combinedPiecesRoutes import router as combinedPieceRouter
 from routes.bonusProduct import router as bonusProduct
-from dataBase.DBConfing import connect_to_db, close_db,init_indexes
+from routes.menuRoutes import router as menuRouter
+from routes.quoteRoutes import router as quoteRouter
+from routes.pricingRoutes import router as pricingRouter
+from dataBase.DBConfing import connect_to_db, close_db,init_indexes, warm_up, readiness
+from dataBase.metrics import timing_middleware, render_prometheus
+from services.variantWorker import start_worker, stop_worker
+from services.pricingRules import sync_rules
+from services.comboVariantService import backfill_variant_flags
 from fastapi import FastAPI
 from contextlib import asynccontextmanager
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, JSONResponse
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
    # 🔹 Startup
-    await connect_to_db()
+    db = await connect_to_db()
     await init_indexes()   # 👈 ACÁ se crea el índice único
+    await warm_up()        # 👈 abre conexiones antes de aceptar tráfico
+    await sync_rules(db)   # 👈 reglas de precios vigentes
+    await backfill_variant_flags(db)  # 👈 variantes anteriores al flag active
+    start_worker(db)       # 👈 regenera variantes en segundo plano
     yield
     # 🔹 Shutdown
+    await stop_worker()
     await close_db()
 
 app = FastAPI(lifespan=lifespan)
 
+# Latencia por ruta (histogramas expuestos en /metrics)
+app.middleware("http")(timing_middleware)
 
 app.add_middleware(
     CORSMiddleware,
@@ -34,4 +49,22 @@ app.add_middleware(
 app.include_router(pieceRouter, prefix="/authPiece", tags=["Piece"])
 app.include_router(combinedPieceRouter, prefix="/authCombinedPieces", tags=["CombinedPieces"])
 app.include_router(bonusProduct, prefix="/authBonusProduct", tags=["BonusProduct"])
+app.include_router(menuRouter, prefix="/authMenu", tags=["Menu"])
+app.include_router(quoteRouter, prefix="/authQuote", tags=["Quote"])
+app.include_router(pricingRouter, prefix="/authPricing", tags=["Pricing"])
 
+
+# Métricas en formato Prometheus (rutas y comandos de Mongo)
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    return PlainTextResponse(
+        render_prometheus(),
+        media_type="text/plain; version=0.0.4"
+    )
+
+
+# Readiness para el balanceador: 503 hasta que el pool esté precalentado
+@app.get("/health/ready", include_in_schema=False)
+async def health_ready():
+    state = await readiness()
+    return JSONResponse(state, status_code=200 if state["ready"] else 503)
@@ -0,0 +1,18 @@
+# models/bulk.py
+from pydantic import BaseModel
+from typing import Optional, List, Literal
+
+
+# Resultado de un ítem dentro de una carga masiva
+class BulkItemResult(BaseModel):
+    index: int
+    name: str
+    status: Literal["created", "duplicate", "error"]
+    code: Optional[str] = None
+    detail: Optional[str] = None
+
+
+class BulkResult(BaseModel):
+    created: int
+    failed: int
+    items: List[BulkItemResult]
@@ -0,0 +1,14 @@
+# models/menu.py
+from pydantic import BaseModel
+from typing import List
+
+from models.piece import PieceModel
+from models.combinedPiece import CombinedPieceModel
+from models.bonusProduct import BonusProductModel
+
+
+class MenuModel(BaseModel):
+    pieces: List[PieceModel]
+    # cada combo trae sus variantes en comboVariants
+    combinedPieces: List[CombinedPieceModel]
+    bonusProducts: List[BonusProductModel]
@@ -16,16 +16,19 @@ class Piece(BaseModel):
 class PieceModel(Piece):
     id: Optional[str] = Field(default=None, alias="_id")
     code: str
-    price_3p: int
-    price_4p: int
-    price_5p: int
-    price_8p: int
-    price_16p: int
+    # Los tamaños salen de pricingRules: uno que se quita queda en None y
+    # uno nuevo (price_Xp) entra como campo extra
+    price_3p: Optional[int] = None
+    price_4p: Optional[int] = None
+    price_5p: Optional[int] = None
+    price_8p: Optional[int] = None
+    price_16p: Optional[int] = None
     state: bool = True
 
     model_config = {
         "populate_by_name": True,
-        "validate_by_name": True
+        "validate_by_name": True,
+        "extra": "allow"
     }
 
 
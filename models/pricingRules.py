@@ -0,0 +1,35 @@
+# models/pricingRules.py
+from pydantic import BaseModel, Field
+from typing import Optional, List, Dict, Tuple
+
+
+class DiscountRule(BaseModel):
+    minPieces: int = Field(ge=1)
+    discount: float = Field(ge=0, lt=1)
+
+
+# Reglas de precios editables (services/pricingRules.py)
+class PricingRules(BaseModel):
+    # piezas por porción -> multiplicador sobre el costo
+    markups: Dict[int, float]
+    rollSizes: List[int]
+    takes: List[int]
+    # (take, perRoll) que no se arman
+    excludedSchemas: List[Tuple[int, int]] = []
+    discountRules: List[DiscountRule]
+
+
+class PricingRulesUpdate(PricingRules):
+    # Si viene, la edición solo se aplica sobre esa versión
+    baseVersion: Optional[int] = None
+
+
+class PricingRulesModel(PricingRules):
+    version: int
+
+
+class PricingRulesChange(BaseModel):
+    version: int
+    piecesRepriced: int
+    affectedSchemas: List[Dict[str, int]]
+    combosQueued: int
@@ -0,0 +1,32 @@
+# models/quote.py
+from pydantic import BaseModel, Field
+from typing import Optional, List, Literal
+
+
+# Una línea del carrito:
+#   piece -> code = código de pieza + size (3, 4, 5, 8 o 16 piezas)
+#   combo -> code = _id de la variante (comboVariants)
+#   bonus -> code = código del producto extra
+class QuoteItem(BaseModel):
+    type: Literal["piece", "combo", "bonus"]
+    code: str
+    size: Optional[int] = None
+    quantity: int = Field(default=1, ge=1)
+
+
+class QuoteRequest(BaseModel):
+    items: List[QuoteItem] = Field(..., min_length=1, max_length=500)
+
+
+class QuoteLine(QuoteItem):
+    index: int
+    name: Optional[str] = None
+    unitPrice: Optional[int] = None
+    total: int = 0
+    error: Optional[str] = None
+
+
+class QuoteResult(BaseModel):
+    lines: List[QuoteLine]
+    total: int
+    valid: bool
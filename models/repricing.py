@@ -0,0 +1,21 @@
+# models/repricing.py
+from pydantic import BaseModel, Field
+from typing import Optional, List, Dict
+
+
+# Cambio de costos: un porcentaje (opcionalmente limitado a ciertos códigos)
+# o un mapa code -> costRoll nuevo
+class PieceReprice(BaseModel):
+    percent: Optional[float] = Field(default=None, gt=-100)
+    codes: Optional[List[str]] = None
+    costs: Optional[Dict[str, float]] = None
+
+
+class RepriceResult(BaseModel):
+    pieces: int
+    missing: List[str]
+    combos: int
+    variants: int
+    # variantes efectivamente escritas (las que no cambiaron no se tocan)
+    variantWrites: int = 0
+    dryRun: bool = False
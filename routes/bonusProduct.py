@@ -1,10 +1,12 @@
-from fastapi import APIRouter, Depends, HTTPException
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, Query
+from typing import List, Optional
 from models.bonusProduct import BonusProductModel,BonusProduct,BonusProductUpdate
 from models.response import ApiResponse
-from services.bonusProduct import  get_bonusProduct,add_bonusProduct,update_BonusProduct
+from models.bulk import BulkResult
+from services.bonusProduct import  get_bonusProduct,get_bonusProduct_json,get_bonusProduct_fields,add_bonusProduct,bulk_add_bonusProducts,update_BonusProduct
 from motor.motor_asyncio import AsyncIOMotorDatabase
 from dataBase.DBConfing import get_db
+from services.catalogCache import not_modified, json_response, FAST_RESPONSES
 
 router = APIRouter()
 COLLECTION_BONUS_PRODUCT = "bonusProduct"
@@ -13,8 +15,25 @@ COLLECTION_BONUS_PRODUCT = "bonusProduct"
     response_model=List[BonusProductModel]
 )
 async def get_all_bonusProduct(
+    request: Request,
+    response: Response,
+    fields: Optional[str] = Query(
+        default=None,
+        description="Campos separados por coma, o una vista: summary, card"
+    ),
     db: AsyncIOMotorDatabase = Depends(get_db)
 ):
+    cached = await not_modified(request, response, db, COLLECTION_BONUS_PRODUCT)
+    if cached:
+        return cached
+
+    # Listado parcial: se serializa con su propio modelo
+    if fields:
+        return json_response(await get_bonusProduct_fields(db, fields), response)
+
+    if FAST_RESPONSES:
+        return json_response(await get_bonusProduct_json(db), response)
+
     return await get_bonusProduct(db)
 
 
@@ -27,15 +46,6 @@ async def add_bonusProduct_route(
     bonusProduct: BonusProduct,
     db: AsyncIOMotorDatabase = Depends(get_db)
 ):
-    existing = await db[COLLECTION_BONUS_PRODUCT].find_one({
-        "name": {"$regex": f"^{bonusProduct.name}$", "$options": "i"}
-    })
-    if existing:
-        raise HTTPException(
-            status_code=400,
-            detail="Ya existe un producto extra con ese nombre"
-        )
-
     created = await add_bonusProduct(bonusProduct, db)
 
     return {
@@ -44,6 +54,22 @@ async def add_bonusProduct_route(
     }
 
 
+@router.post(
+    "/bulkAddBonusProduct",
+    response_model=ApiResponse[BulkResult]
+)
+async def bulk_add_bonusProduct_route(
+    bonusProducts: List[BonusProduct],
+    db: AsyncIOMotorDatabase = Depends(get_db)
+):
+    result = await bulk_add_bonusProducts(bonusProducts, db)
+
+    return {
+        "message": f"{result.created} productos extra creados, {result.failed} con error",
+        "data": result
+    }
+
+
 @router.put(
     "/updateBonusProduct/{code}",
     response_model=ApiResponse[BonusProductModel]
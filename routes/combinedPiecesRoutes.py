@@ -1,16 +1,24 @@
 # routes/combinedPieceRoutes.py
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, Query
+from fastapi.responses import StreamingResponse
 from motor.motor_asyncio import AsyncIOMotorDatabase
-from typing import List, Dict
+from typing import List, Dict, Optional
+import json
 
 from services.combinedPiecesService import (
     get_combined_pieces,
+    get_combined_pieces_json,
+    get_combined_pieces_fields,
     add_combined_piece,
+    bulk_add_combined_pieces,
     update_combined_piece
 )
 from services.comboVariantService import (
     get_variants_by_combo,
-    get_all_variants
+    get_all_variants,
+    get_variants_page,
+    iter_variants,
+    search_variants
 )
 
 from models.combinedPiece import (
@@ -19,10 +27,17 @@ from models.combinedPiece import (
     CombinedPieceModel
 )
 from models.response import ApiResponse
+from models.bulk import BulkResult
 from dataBase.DBConfing import get_db
+from services.catalogCache import not_modified, json_response, FAST_RESPONSES
+from services.variantQueue import queue_status
 
 router = APIRouter()
 COLLECTION_COMBINED = "combinedPieces"
+COLLECTION_VARIANTS = "comboVariants"
+NDJSON = "application/x-ndjson"
+MAX_PAGE_SIZE = 1000
+MAX_SEARCH_SIZE = 100
 
 
 # 🔹 GET – lista de combinados
@@ -31,8 +46,25 @@ COLLECTION_COMBINED = "combinedPieces"
     response_model=List[CombinedPieceModel]
 )
 async def list_combined_pieces(
+    request: Request,
+    response: Response,
+    fields: Optional[str] = Query(
+        default=None,
+        description="Campos separados por coma, o una vista: summary, card"
+    ),
     db: AsyncIOMotorDatabase = Depends(get_db)
 ):
+    cached = await not_modified(request, response, db, COLLECTION_COMBINED)
+    if cached:
+        return cached
+
+    # Listado parcial: se serializa con su propio modelo
+    if fields:
+        return json_response(await get_combined_pieces_fields(db, fields), response)
+
+    if FAST_RESPONSES:
+        return json_response(await get_combined_pieces_json(db), response)
+
     combined = await get_combined_pieces(db)
 
     if not combined:
@@ -51,8 +83,14 @@ async def list_combined_pieces(
 )
 async def list_combo_variants(
     comboCode: str,
+    request: Request,
+    response: Response,
     db: AsyncIOMotorDatabase = Depends(get_db)
 ):
+    cached = await not_modified(request, response, db, COLLECTION_VARIANTS)
+    if cached:
+        return cached
+
     variants = await get_variants_by_combo(comboCode, db)
 
     if not variants:
@@ -65,14 +103,115 @@ async def list_combo_variants(
 
 
 # 🔹 GET – todas las variantes
+# ?after=<_id>&limit=N pagina por _id; con "Accept: application/x-ndjson"
+# se transmite una variante por línea sin cargar la colección en memoria
 @router.get(
     "/comboVariants",
     response_model=List[Dict]
 )
 async def read_all_variants(
+    request: Request,
+    response: Response,
+    after: Optional[str] = None,
+    limit: Optional[int] = Query(default=None, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncIOMotorDatabase = Depends(get_db)
+):
+    # Mismo recurso en dos formatos: cada uno con su ETag, y Vary: Accept
+    # para que una caché no responda uno con el otro
+    ndjson = NDJSON in request.headers.get("accept", "")
+    cached = await not_modified(
+        request, response, db, COLLECTION_VARIANTS,
+        representation="ndjson" if ndjson else "",
+        vary="Accept"
+    )
+    if cached:
+        return cached
+
+    if ndjson:
+        headers = {"ETag": response.headers["ETag"], "Vary": "Accept"}
+
+        if limit is None:
+            async def ndjson_lines():
+                async for variant in iter_variants(db, after):
+                    yield json.dumps(variant, default=str) + "\n"
+        else:
+            # Con limit: una página (acotada por MAX_PAGE_SIZE), mismo cursor
+            page = await get_variants_page(db, after, limit)
+            if len(page) == limit:
+                headers["X-Next-After"] = str(page[-1]["_id"])
+
+            async def ndjson_lines():
+                for variant in page:
+                    yield json.dumps(variant, default=str) + "\n"
+
+        return StreamingResponse(
+            ndjson_lines(),
+            media_type=NDJSON,
+            headers=headers
+        )
+
+    if limit is None and after is None:
+        return await get_all_variants(db)
+
+    page = await get_variants_page(db, after, limit or MAX_PAGE_SIZE)
+
+    # Cursor para la siguiente página (solo si la página vino llena)
+    if page and len(page) == (limit or MAX_PAGE_SIZE):
+        response.headers["X-Next-After"] = str(page[-1]["_id"])
+
+    return page
+
+
+# 🔹 GET – búsqueda de variantes con filtros, orden y límite
+# ej.: ?maxPrice=40000&minPieces=24&protein=salmón&sort=finalPrice&limit=20
+@router.get(
+    "/comboVariants/search",
+    response_model=List[Dict]
+)
+async def search_combo_variants(
+    request: Request,
+    response: Response,
+    minPrice: Optional[float] = Query(default=None, ge=0),
+    maxPrice: Optional[float] = Query(default=None, ge=0),
+    minPieces: Optional[int] = Query(default=None, ge=0),
+    maxPieces: Optional[int] = Query(default=None, ge=0),
+    perRoll: Optional[int] = None,
+    take: Optional[int] = None,
+    discounted: Optional[bool] = None,
+    protein: Optional[List[str]] = Query(default=None),
+    piece: Optional[List[str]] = Query(default=None),
+    sort: str = "finalPrice",
+    limit: int = Query(default=20, ge=1, le=MAX_SEARCH_SIZE),
     db: AsyncIOMotorDatabase = Depends(get_db)
 ):
-    return await get_all_variants(db)
+    cached = await not_modified(
+        request, response, db, COLLECTION_VARIANTS, COLLECTION_COMBINED
+    )
+    if cached:
+        return cached
+
+    return await search_variants(
+        db,
+        sort=sort,
+        limit=limit,
+        min_price=minPrice,
+        max_price=maxPrice,
+        min_pieces=minPieces,
+        max_pieces=maxPieces,
+        per_roll=perRoll,
+        take=take,
+        discounted=discounted,
+        proteins=protein,
+        pieces=piece
+    )
+
+
+# 🔹 GET – estado de la cola de regeneración de variantes
+@router.get("/variantQueue")
+async def variant_queue_status(
+    db: AsyncIOMotorDatabase = Depends(get_db)
+):
+    return await queue_status(db)
 
 
 # 🔹 POST – crear combinado
@@ -85,16 +224,6 @@ async def create_combined_piece(
     payload: CombinedPiece,
     db: AsyncIOMotorDatabase = Depends(get_db)
 ):
-    existing = await db[COLLECTION_COMBINED].find_one({
-        "name": {"$regex": f"^{payload.name}$", "$options": "i"}
-    })
-
-    if existing:
-        raise HTTPException(
-            status_code=400,
-            detail="Ya existe un combinado con ese nombre"
-        )
-
     created = await add_combined_piece(payload, db)
 
     return {
@@ -103,6 +232,23 @@ async def create_combined_piece(
     }
 
 
+# 🔹 POST – carga masiva de combinados (resultado por ítem)
+@router.post(
+    "/bulkAddCombinedPieces",
+    response_model=ApiResponse[BulkResult]
+)
+async def bulk_create_combined_pieces(
+    payload: List[CombinedPiece],
+    db: AsyncIOMotorDatabase = Depends(get_db)
+):
+    result = await bulk_add_combined_pieces(payload, db)
+
+    return {
+        "message": f"{result.created} combinados agregados, {result.failed} con error",
+        "data": result
+    }
+
+
 # 🔹 PUT – actualizar combinado
 @router.put(
     "/updateCombinedPieces/{code}",
@@ -113,18 +259,6 @@ async def modify_combined_piece(
     payload: CombinedPieceUpdate,
     db: AsyncIOMotorDatabase = Depends(get_db)
 ):
-    if payload.name:
-        existing = await db[COLLECTION_COMBINED].find_one({
-            "name": {"$regex": f"^{payload.name}$", "$options": "i"},
-            "code": {"$ne": code}
-        })
-
-        if existing:
-            raise HTTPException(
-                status_code=400,
-                detail="Ya existe un combinado con ese nombre"
-            )
-
     updated = await update_combined_piece(code, payload, db)
 
     if not updated:
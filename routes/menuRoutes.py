@@ -0,0 +1,28 @@
+# routes/menuRoutes.py
+from fastapi import APIRouter, Depends, Request, Response
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from models.menu import MenuModel
+from services.menuService import get_menu
+from services.catalogCache import not_modified
+from dataBase.DBConfing import get_db
+
+router = APIRouter()
+COLLECTION_MENU = "menuSnapshot"
+
+
+# 🔹 GET – menú completo (piezas, combos con variantes y extras)
+@router.get(
+    "/menu",
+    response_model=MenuModel
+)
+async def read_menu(
+    request: Request,
+    response: Response,
+    db: AsyncIOMotorDatabase = Depends(get_db)
+):
+    cached = await not_modified(request, response, db, COLLECTION_MENU)
+    if cached:
+        return cached
+
+    return await get_menu(db)
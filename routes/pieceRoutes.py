@@ -1,11 +1,22 @@
 # routes/pieceRoutes.py
-from fastapi import APIRouter, Depends, HTTPException
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, Query
+from typing import List, Optional
 from motor.motor_asyncio import AsyncIOMotorDatabase
 
 from models.piece import Piece, PieceUpdate, PieceModel
 from models.response import ApiResponse
-from services.pieceService import get_pieces, add_piece, update_piece
+from models.bulk import BulkResult
+from models.repricing import PieceReprice, RepriceResult
+from services.pieceService import (
+    get_pieces,
+    get_pieces_json,
+    get_pieces_fields,
+    add_piece,
+    bulk_add_pieces,
+    update_piece
+)
+from services.repricingService import reprice_pieces
+from services.catalogCache import not_modified, json_response, FAST_RESPONSES
 from dataBase.DBConfing import get_db
 
 router = APIRouter()
@@ -18,8 +29,25 @@ COLLECTION_PIECES = "pieces"
     response_model=List[PieceModel]
 )
 async def get_all_pieces(
+    request: Request,
+    response: Response,
+    fields: Optional[str] = Query(
+        default=None,
+        description="Campos separados por coma, o una vista: summary, card"
+    ),
     db: AsyncIOMotorDatabase = Depends(get_db)
 ):
+    cached = await not_modified(request, response, db, COLLECTION_PIECES)
+    if cached:
+        return cached
+
+    # Listado parcial: se serializa con su propio modelo
+    if fields:
+        return json_response(await get_pieces_fields(db, fields), response)
+
+    if FAST_RESPONSES:
+        return json_response(await get_pieces_json(db), response)
+
     return await get_pieces(db)
 
 
@@ -33,16 +61,6 @@ async def add_piece_route(
     piece: Piece,
     db: AsyncIOMotorDatabase = Depends(get_db)
 ):
-    existing = await db[COLLECTION_PIECES].find_one({
-        "name": {"$regex": f"^{piece.name}$", "$options": "i"}
-    })
-
-    if existing:
-        raise HTTPException(
-            status_code=400,
-            detail="Ya existe una pieza con ese nombre"
-        )
-
     created = await add_piece(piece, db)
 
     return {
@@ -51,6 +69,45 @@ async def add_piece_route(
     }
 
 
+# 🔹 POST – carga masiva de piezas (resultado por ítem)
+@router.post(
+    "/bulkAddPiece",
+    response_model=ApiResponse[BulkResult]
+)
+async def bulk_add_piece_route(
+    pieces: List[Piece],
+    db: AsyncIOMotorDatabase = Depends(get_db)
+):
+    result = await bulk_add_pieces(pieces, db)
+
+    return {
+        "message": f"{result.created} piezas agregadas, {result.failed} con error",
+        "data": result
+    }
+
+
+# 🔹 POST – repreciar muchas piezas (porcentaje o mapa de costos)
+@router.post(
+    "/repricePieces",
+    response_model=ApiResponse[RepriceResult]
+)
+async def reprice_pieces_route(
+    payload: PieceReprice,
+    db: AsyncIOMotorDatabase = Depends(get_db)
+):
+    result = await reprice_pieces(
+        db,
+        percent=payload.percent,
+        costs=payload.costs,
+        codes=payload.codes
+    )
+
+    return {
+        "message": f"{result.pieces} piezas actualizadas, {result.combos} combos regenerados",
+        "data": result
+    }
+
+
 # 🔹 PUT – actualizar pieza
 @router.put(
     "/updatePiece/{code}",
@@ -61,18 +118,6 @@ async def modify_piece(
     piece: PieceUpdate,
     db: AsyncIOMotorDatabase = Depends(get_db)
 ):
-    if piece.name:
-        duplicate = await db[COLLECTION_PIECES].find_one({
-            "name": {"$regex": f"^{piece.name}$", "$options": "i"},
-            "code": {"$ne": code}
-        })
-
-        if duplicate:
-            raise HTTPException(
-                status_code=400,
-                detail="Ya existe otra pieza con ese nombre"
-            )
-
     updated = await update_piece(code, piece, db)
 
     if not updated:
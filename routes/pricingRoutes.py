@@ -0,0 +1,42 @@
+# routes/pricingRoutes.py
+from fastapi import APIRouter, Depends
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from models.pricingRules import (
+    PricingRulesUpdate,
+    PricingRulesModel,
+    PricingRulesChange
+)
+from models.response import ApiResponse
+from services.pricingRulesService import get_rules, update_rules
+from dataBase.DBConfing import get_db
+
+router = APIRouter()
+
+
+# 🔹 GET – reglas de precios vigentes
+@router.get(
+    "/rules",
+    response_model=PricingRulesModel
+)
+async def get_rules_route(
+    db: AsyncIOMotorDatabase = Depends(get_db)
+):
+    return await get_rules(db)
+
+
+# 🔹 PUT – nueva versión de las reglas (recalcula solo lo afectado)
+@router.put(
+    "/rules",
+    response_model=ApiResponse[PricingRulesChange]
+)
+async def update_rules_route(
+    payload: PricingRulesUpdate,
+    db: AsyncIOMotorDatabase = Depends(get_db)
+):
+    change = await update_rules(payload, db, payload.baseVersion)
+
+    return {
+        "message": f"Reglas de precios actualizadas (versión {change.version})",
+        "data": change
+    }
@@ -0,0 +1,27 @@
+# routes/quoteRoutes.py
+from fastapi import APIRouter, Depends
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from models.quote import QuoteRequest, QuoteResult
+from models.response import ApiResponse
+from services.quoteService import quote_cart
+from dataBase.DBConfing import get_db
+
+router = APIRouter()
+
+
+# 🔹 POST – cotizar un carrito completo (piezas, variantes de combo y extras)
+@router.post(
+    "/quote",
+    response_model=ApiResponse[QuoteResult]
+)
+async def quote(
+    payload: QuoteRequest,
+    db: AsyncIOMotorDatabase = Depends(get_db)
+):
+    result = await quote_cart(payload, db)
+
+    return {
+        "message": "Carrito cotizado" if result.valid else "Hay líneas con error",
+        "data": result
+    }
@@ -0,0 +1,93 @@
+# Mide el costo de CPU por request de GET /pieces con un catálogo sintético,
+# comparando el camino clásico (validación doble + json) con el modo rápido.
+import argparse
+import json
+import time
+from typing import List
+
+from pydantic import TypeAdapter
+
+from models.piece import PieceModel
+from services.pieceService import generate_prices
+from services import catalogCache
+
+
+def synthetic_pieces(size: int) -> List[dict]:
+    return [
+        {
+            "_id": f"{i:024x}",
+            "code": f"P{i:05d}",
+            "name": f"Pieza {i}",
+            "description": "Descripción de la pieza " * 4,
+            "img": f"https://img.example.com/pieces/{i}.jpg",
+            "costRoll": 4000 + i,
+            "category": "rolls",
+            "protein": "salmón",
+            "state": True,
+            **generate_prices(4000 + i),
+        }
+        for i in range(size)
+    ]
+
+
+def cpu_ms(fn, iterations: int) -> float:
+    fn()
+    started = time.process_time()
+    for _ in range(iterations):
+        fn()
+    return (time.process_time() - started) / iterations * 1000
+
+
+def main(size: int, iterations: int):
+    docs = synthetic_pieces(size)
+    adapter = TypeAdapter(List[PieceModel])
+
+    def respond(models):
+        # Lo que hace FastAPI con response_model + JSONResponse
+        content = adapter.dump_python(
+            adapter.validate_python(models), mode="json", by_alias=True
+        )
+        return json.dumps(
+            content, ensure_ascii=False, separators=(",", ":")
+        ).encode("utf-8")
+
+    def before():
+        # Camino original: un PieceModel(**doc) por documento, sin caché
+        return respond([PieceModel(**{**d, "_id": str(d["_id"])}) for d in docs])
+
+    cached_models = catalogCache.build_models(PieceModel, docs)
+
+    def classic_cached():
+        return respond(cached_models)
+
+    def fast_uncached():
+        return catalogCache.dump_models(
+            catalogCache.build_models(PieceModel, docs)
+        )
+
+    cached_bytes = fast_uncached()
+
+    def fast_cached():
+        return cached_bytes
+
+    assert json.loads(before()) == json.loads(fast_uncached())
+
+    results = {
+        "items": size,
+        "before_ms": round(cpu_ms(before, iterations), 3),
+        "cached_models_ms": round(cpu_ms(classic_cached, iterations), 3),
+        "fast_cold_ms": round(cpu_ms(fast_uncached, iterations), 3),
+        "fast_warm_ms": round(cpu_ms(fast_cached, iterations), 6),
+    }
+    print(json.dumps(results, indent=2))
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="CPU por request del listado de piezas."
+    )
+    parser.add_argument("--size", type=int, default=1000)
+    parser.add_argument("--iterations", type=int, default=50)
+    args = parser.parse_args()
+    main(args.size, args.iterations)
@@ -0,0 +1,85 @@
+# Corre explain() de las búsquedas típicas de variantes contra la base real
+# y falla si alguna termina en COLLSCAN o en un SORT en memoria (índices en
+# dataBase/indexes.py).
+import argparse
+import asyncio
+import json
+import sys
+
+from dataBase.DBConfing import connect_to_db, close_db, init_indexes
+from services.comboVariantService import (
+    COLLECTION,
+    build_search_query,
+    build_search_sort
+)
+
+# Etapas que hacen trabajo proporcional a todo lo que matchea, no a la página
+BLOCKING_STAGES = ("COLLSCAN", "SORT")
+
+SAMPLE_SEARCHES = [
+    {"sort": "finalPrice"},
+    {"sort": "-finalPrice"},
+    {"sort": "totalPieces"},
+    {"sort": "finalPrice", "max_price": 40000},
+    {"sort": "finalPrice", "max_price": 40000, "min_pieces": 24},
+    {"sort": "-totalPieces", "min_pieces": 24},
+    {"sort": "finalPrice", "per_roll": 8, "take": 4},
+    {"sort": "finalPrice", "discounted": True, "per_roll": 4},
+    {"sort": "finalPrice", "proteins": ["salmón"], "max_price": 40000},
+    {"sort": "finalPrice", "pieces": ["P000001"]},
+]
+
+
+def plan_stages(plan: dict) -> list:
+    stages = [plan.get("stage")]
+    for key in ("inputStage", "queryPlan"):
+        if key in plan:
+            stages += plan_stages(plan[key])
+    for child in plan.get("inputStages", []):
+        stages += plan_stages(child)
+    return [s for s in stages if s]
+
+
+def index_names(plan: dict) -> list:
+    names = [plan["indexName"]] if "indexName" in plan else []
+    for key in ("inputStage", "queryPlan"):
+        if key in plan:
+            names += index_names(plan[key])
+    for child in plan.get("inputStages", []):
+        names += index_names(child)
+    return names
+
+
+async def explain_all(limit: int) -> int:
+    db = await connect_to_db()
+    await init_indexes()
+
+    failures = 0
+    for search in SAMPLE_SEARCHES:
+        filters = {k: v for k, v in search.items() if k != "sort"}
+        query = build_search_query(**filters)
+        explain = await db[COLLECTION].find(query).sort(
+            build_search_sort(search["sort"])
+        ).limit(limit).explain()
+
+        winning = explain["queryPlanner"]["winningPlan"]
+        stages = plan_stages(winning)
+        blocking = [s for s in stages if s in BLOCKING_STAGES]
+        failures += bool(blocking)
+
+        mark = f"❌ ({', '.join(blocking)})" if blocking else "✔"
+        print(f"{mark} {json.dumps(search, ensure_ascii=False)}")
+        print(f"   etapas: {' <- '.join(stages)}")
+        print(f"   índices: {', '.join(index_names(winning)) or '-'}")
+
+    await close_db()
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="explain() de las búsquedas de variantes."
+    )
+    parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+    sys.exit(asyncio.run(explain_all(args.limit)))
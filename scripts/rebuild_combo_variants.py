@@ -1,41 +1,162 @@
+import argparse
 import asyncio
+import time
 
 from dataBase.DBConfing import connect_to_db, close_db
-from services.combinedPiecesService import generate_combo_variants
+from services.pricingEngine import generate_variants_batch
 from services.comboVariantService import (
-    save_combo_variants,
-    delete_variants_by_combo
+    replace_combo_variants,
+    active_sets,
+    is_active,
+    sync_variant_flags,
+    drain_gc,
+    META_FIELDS
 )
+from services.menuService import rebuild_menu
+from services.catalogCache import invalidate
+from services.pricingRules import sync_rules
 
 COMBOS_COLLECTION = "combinedPieces"
 PIECES_COLLECTION = "pieces"
+VARIANTS_COLLECTION = "comboVariants"
 
 
-async def rebuild_all_variants():
+def variant_signature(variant: dict) -> tuple:
+    # Forma comparable de una variante: sin los campos que agrega el
+    # servidor (META_FIELDS, los mismos que excluye el contentHash)
+    return tuple(sorted(
+        (k, repr(v)) for k, v in variant.items() if k not in META_FIELDS
+    ))
+
+
+def variants_changed(stored: list, new: list) -> bool:
+    return sorted(map(variant_signature, stored)) != sorted(
+        map(variant_signature, new)
+    )
+
+
+async def rebuild_all_variants(
+    concurrency: int = 8,
+    batch_size: int = 50,
+    dry_run: bool = False,
+    only_changed: bool = False
+):
     db = await connect_to_db()  # 👈 MISMA DB QUE FASTAPI
+    started = time.perf_counter()
 
-    combos = await db[COMBOS_COLLECTION].find({}).to_list(length=None)
+    combos = await db[COMBOS_COLLECTION].find(
+        {}, {"code": 1, "typePieces": 1}
+    ).to_list(length=None)
     print(f"👉 Combos encontrados: {len(combos)}")
 
-    for combo in combos:
-        code = combo["code"]
+    # Una sola carga de piezas para todos los combos
+    pieces_data = await db[PIECES_COLLECTION].find({}).to_list(length=None)
+    print(f"👉 Piezas cargadas: {len(pieces_data)}")
+
+    rules = await sync_rules(db)
+    print(f"👉 Reglas de precios: versión {rules.version}")
+
+    stored = {}
+    if only_changed or dry_run:
+        pointers = await active_sets(db)
+        async for v in db[VARIANTS_COLLECTION].find({}):
+            if is_active(v, pointers):
+                stored.setdefault(v["comboCode"], []).append(v)
+
+    summary = {
+        "processed": 0,
+        "rebuilt": 0,
+        "unchanged": 0,
+        "variants": 0,
+        "writes": 0,
+        "batches": 0
+    }
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def rebuild_batch(batch: list):
+        variants_by_combo = generate_variants_batch(batch, pieces_data)
 
-        pieces_data = await db[PIECES_COLLECTION].find(
-            {"code": {"$in": combo["typePieces"]}}
-        ).to_list(length=None)
+        if only_changed or dry_run:
+            for code in list(variants_by_combo):
+                if not variants_changed(stored.get(code, []), variants_by_combo[code]):
+                    summary["unchanged"] += 1
+                    del variants_by_combo[code]
 
-        print(f"🔄 Combo {code} → piezas: {len(pieces_data)}")
+        if variants_by_combo:
+            if not dry_run:
+                async with semaphore:
+                    stats = await replace_combo_variants(variants_by_combo, db)
+                summary["writes"] += stats["written"]
 
-        new_variants = generate_combo_variants(pieces_data)
-        print(f"   variantes nuevas: {len(new_variants)}")
+            for code, variants in variants_by_combo.items():
+                action = "cambiaría" if dry_run else "regenerado"
+                print(f"🔄 Combo {code} {action} → variantes: {len(variants)}")
 
-        await delete_variants_by_combo(code, db)
-        await save_combo_variants(code, new_variants, db)
+        summary["rebuilt"] += len(variants_by_combo)
+        summary["variants"] += sum(len(v) for v in variants_by_combo.values())
+        summary["batches"] += 1
 
-        print(f"✔ Variantes regeneradas para {code}")
+        summary["processed"] += len(batch)
+        print(f"   progreso: {summary['processed']}/{len(combos)}")
+
+    batches = [
+        combos[i:i + batch_size] for i in range(0, len(combos), batch_size)
+    ]
+    await asyncio.gather(*(rebuild_batch(b) for b in batches))
+
+    if not dry_run:
+        # Completa `active` en las variantes de combos que no cambiaron
+        # (p. ej. escritas antes de que existiera el flag)
+        flagged = await sync_variant_flags(db)
+        if flagged:
+            await invalidate(db, VARIANTS_COLLECTION)
+        print(f"👉 Flags de variantes actualizados: {flagged}")
+
+    if not dry_run and summary["rebuilt"]:
+        await rebuild_menu(db)
+
+        # Los sets reemplazados se borran después del período de gracia
+        print("👉 Esperando la limpieza de sets viejos...")
+        await drain_gc()
+
+    elapsed = time.perf_counter() - started
+    rate = len(combos) / elapsed if elapsed else 0.0
+
+    print("✔ Resumen")
+    print(f"   combos regenerados: {summary['rebuilt']}")
+    print(f"   combos sin cambios: {summary['unchanged']}")
+    print(f"   variantes generadas: {summary['variants']}")
+    print(f"   variantes escritas: {summary['writes']}")
+    print(f"   lotes: {summary['batches']}")
+    print(f"   tiempo: {elapsed:.2f}s ({rate:.1f} combos/s)")
+    if dry_run:
+        print("   (dry-run: no se escribió nada)")
 
     await close_db()
+    return summary
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Regenera las variantes de todos los combos."
+    )
+    parser.add_argument("--concurrency", type=int, default=8,
+                        help="bulk_write simultáneos contra Mongo")
+    parser.add_argument("--batch-size", type=int, default=50,
+                        help="combos por bulk_write")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="calcula y reporta sin escribir")
+    parser.add_argument("--only-changed", action="store_true",
+                        help="solo procesa combos cuyas variantes cambiaron "
+                             "(las variantes iguales nunca se reescriben)")
+    return parser.parse_args()
 
 
 if __name__ == "__main__":
-    asyncio.run(rebuild_all_variants())
+    args = parse_args()
+    asyncio.run(rebuild_all_variants(
+        concurrency=args.concurrency,
+        batch_size=args.batch_size,
+        dry_run=args.dry_run,
+        only_changed=args.only_changed
+    ))
@@ -0,0 +1,69 @@
+import argparse
+import asyncio
+import json
+import time
+
+from dataBase.DBConfing import connect_to_db, close_db
+from services.repricingService import reprice_pieces
+from services.comboVariantService import drain_gc
+
+
+async def run(percent=None, costs=None, codes=None, dry_run=False):
+    db = await connect_to_db()  # 👈 MISMA DB QUE FASTAPI
+    started = time.perf_counter()
+
+    result = await reprice_pieces(
+        db, percent=percent, costs=costs, codes=codes, dry_run=dry_run
+    )
+
+    if not dry_run and result.combos:
+        # Los sets reemplazados se borran después del período de gracia;
+        # si asyncio.run termina antes, quedan en comboVariants
+        print("👉 Esperando la limpieza de sets viejos...")
+        await drain_gc()
+
+    elapsed = time.perf_counter() - started
+    print("✔ Resumen")
+    print(f"   piezas actualizadas: {result.pieces}")
+    print(f"   combos regenerados: {result.combos}")
+    print(f"   variantes: {result.variants}")
+    if result.missing:
+        print(f"   ⚠️ códigos inexistentes: {', '.join(result.missing)}")
+    print(f"   tiempo: {elapsed:.2f}s")
+    if dry_run:
+        print("   (dry-run: no se escribió nada)")
+
+    await close_db()
+    return result
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Cambia el costRoll de muchas piezas y regenera los combos afectados."
+    )
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument("--percent", type=float,
+                       help="variación porcentual del costo (ej. 12.5 o -5)")
+    group.add_argument("--costs", metavar="ARCHIVO",
+                       help='JSON con {"CODE": costRoll, ...}')
+    parser.add_argument("--codes", type=lambda s: s.split(","), default=None,
+                        help="con --percent, limita a estos códigos")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="calcula y reporta sin escribir")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+
+    costs = None
+    if args.costs:
+        with open(args.costs) as f:
+            costs = json.load(f)
+
+    asyncio.run(run(
+        percent=args.percent,
+        costs=costs,
+        codes=args.codes,
+        dry_run=args.dry_run
+    ))
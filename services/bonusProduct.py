@@ -1,36 +1,57 @@
 from motor.motor_asyncio import AsyncIOMotorDatabase
 from models.bonusProduct import BonusProductModel,BonusProduct,BonusProductUpdate
 from fastapi import HTTPException
-from random import choices
-import string
 from pymongo import ReturnDocument
-from typing import Optional
+from typing import Optional, List
 from pymongo.errors import DuplicateKeyError
-# -------------------------
-# Helpers
-# -------------------------
-
-def generate_code(length: int = 6) -> str:
-    return "".join(choices(string.ascii_uppercase + string.digits, k=length))
+from services.catalogCache import (
+    cached_read,
+    invalidate,
+    build_models,
+    dump_models
+)
+from services.menuService import refresh_menu
+from services.codeAllocator import allocate_code
+from services.bulkImport import check_batch_size, import_batch
+from services.fieldProjection import read_fields
+from models.bulk import BulkResult
 
+COLLECTION = "bonusProduct"
 
+# Vistas livianas para ?fields= (listados y selects)
+VIEWS = {
+    "summary": ("code", "name", "type", "price", "state"),
+    "card": ("code", "name", "img", "type", "price", "state"),
+}
 
 # -------------------------
 # CRUD
 # -------------------------
 
 async def get_bonusProduct(db: AsyncIOMotorDatabase):
-    products = await db["bonusProduct"].find().to_list(length=None)
+    async def load():
+        products = await db["bonusProduct"].find().to_list(length=None)
 
-    if not products:
-        raise HTTPException(status_code=404, detail="No hay productos extras.")
+        if not products:
+            raise HTTPException(status_code=404, detail="No hay productos extras.")
 
-    return [
-        BonusProductModel(
-            **{**p, "_id": str(p["_id"])}
-        )
-        for p in products
-    ]
+        return build_models(BonusProductModel, products)
+
+    return await cached_read(db, COLLECTION, load)
+
+
+async def get_bonusProduct_json(db: AsyncIOMotorDatabase) -> bytes:
+    async def load():
+        return dump_models(await get_bonusProduct(db))
+
+    return await cached_read(db, COLLECTION, load, "json")
+
+
+async def get_bonusProduct_fields(db: AsyncIOMotorDatabase, fields: str) -> bytes:
+    return await read_fields(
+        db, COLLECTION, BonusProductModel, fields, VIEWS,
+        "No hay productos extras."
+    )
 
 
 async def add_bonusProduct(bonusProduct : BonusProduct,db : AsyncIOMotorDatabase):
@@ -38,59 +59,68 @@ async def add_bonusProduct(bonusProduct : BonusProduct,db : AsyncIOMotorDatabase
     # 1. Convertir el modelo a dict
     bonusProduct_dict = bonusProduct.model_dump()
     
-  # 3. Insert con reintentos por code duplicado
-    for _ in range(5):
-        bonusProduct_dict["code"] = generate_code()
-        try:
-            result = await db["bonusProduct"].insert_one(bonusProduct_dict)
-
-            if not result.inserted_id:
-                raise HTTPException(
-                    status_code=500,
-                    detail="No se pudo crear el producto extra."
-                )
-
-            # 4. Armar respuesta
-            bonusProduct_dict["_id"] = str(result.inserted_id)
-            return BonusProductModel(**bonusProduct_dict)
-
-        except DuplicateKeyError:
-            continue
-         # 5. Fallo definitivo
-    raise HTTPException(
-        status_code=500,
-        detail="No se pudo generar un código único"
+    # 2. Código único del contador (sin reintentos)
+    bonusProduct_dict["code"] = await allocate_code(db, COLLECTION)
+
+    # 3. Insert
+    try:
+        result = await db["bonusProduct"].insert_one(bonusProduct_dict)
+    except DuplicateKeyError:
+        raise HTTPException(
+            status_code=400,
+            detail="Ya existe un producto extra con ese nombre"
+        )
+
+    if not result.inserted_id:
+        raise HTTPException(
+            status_code=500,
+            detail="No se pudo crear el producto extra."
+        )
+    await invalidate(db, COLLECTION)
+    await refresh_menu(db, bonus=[bonusProduct_dict["code"]])
+
+    # 4. Armar respuesta
+    bonusProduct_dict["_id"] = str(result.inserted_id)
+    return BonusProductModel(**bonusProduct_dict)
+
+async def bulk_add_bonusProducts(bonusProducts : List[BonusProduct], db : AsyncIOMotorDatabase) -> BulkResult:
+    check_batch_size(bonusProducts)
+
+    docs = [{**b.model_dump(), "state": True} for b in bonusProducts]
+
+    result, inserted = await import_batch(
+        db, COLLECTION, docs, "Ya existe un producto extra con ese nombre"
     )
 
+    if inserted:
+        await invalidate(db, COLLECTION)
+        await refresh_menu(db, bonus=[d["code"] for d in inserted])
+
+    return result
+
 async def update_BonusProduct(code : str, bonusProductUpdate : BonusProductUpdate, db : AsyncIOMotorDatabase ) -> Optional[BonusProductModel]:
     updateData = bonusProductUpdate.model_dump(exclude_unset=True)
     
-    current = await db["bonusProduct"].find_one({"code": code})
-    if not current:
-        return None
-    
-    if "name" in updateData:
-        existing = await db["bonusProduct"].find_one({
-            "name": {"$regex": f"^{updateData['name']}$", "$options": "i"},
-            "code": {"$ne": code}  # 🔑 excluye el actual
-        })
-
-        if existing:
-            raise HTTPException(
-                status_code=400,
-                detail="No se puede actualizar: ya existe otro producto con ese nombre"
-            )
     # UPDATE BASE DEL PRODUCTO EXTRA
-    
-    result = await db["bonusProduct"].find_one_and_update(
-        {"code" : code} ,
-        {"$set": updateData},
-        return_document=ReturnDocument.AFTER
-    )
+    # (el índice único de name con collation rechaza nombres repetidos)
+    try:
+        result = await db["bonusProduct"].find_one_and_update(
+            {"code" : code} ,
+            {"$set": updateData},
+            return_document=ReturnDocument.AFTER
+        )
+    except DuplicateKeyError:
+        raise HTTPException(
+            status_code=400,
+            detail="No se puede actualizar: ya existe otro producto con ese nombre"
+        )
     
     if not result:
         return None
-    
+
+    await invalidate(db, COLLECTION)
+    await refresh_menu(db, bonus=[code])
+
     # Convertir ID
     result["_id"] = str(result["_id"])
     
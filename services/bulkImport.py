@@ -0,0 +1,112 @@
+# services/bulkImport.py
+# Carga masiva compartida por piezas, combinados y productos extra:
+# un bloque de códigos y un insert_many. Los nombres repetidos los decide
+# el índice unique de name (con su collation), ítem por ítem.
+import os
+from typing import List, Dict, Any, Tuple
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+from fastapi import HTTPException
+
+from models.bulk import BulkItemResult, BulkResult
+from dataBase.indexes import duplicate_key_field
+from services.codeAllocator import allocate_codes
+
+# Tope de ítems por request
+MAX_BATCH_SIZE = int(os.getenv("BULK_MAX_ITEMS", "500"))
+
+
+# -------------------------
+# Helpers
+# -------------------------
+
+def check_batch_size(items: List[Any]) -> None:
+    if not items:
+        raise HTTPException(400, "La carga masiva está vacía")
+    if len(items) > MAX_BATCH_SIZE:
+        raise HTTPException(
+            400,
+            f"La carga masiva admite hasta {MAX_BATCH_SIZE} ítems"
+        )
+
+
+async def insert_docs(
+    db: AsyncIOMotorDatabase,
+    collection: str,
+    docs: List[Dict[str, Any]]
+) -> Dict[int, dict]:
+    # insert_many sin orden: un error no frena al resto del lote.
+    # Devuelve posición en docs -> writeError de los que no entraron
+    if not docs:
+        return {}
+    try:
+        await db[collection].insert_many(docs, ordered=False)
+    except BulkWriteError as error:
+        return {e["index"]: e for e in error.details.get("writeErrors", [])}
+    return {}
+
+
+def failure_result(
+    index: int,
+    doc: Dict[str, Any],
+    write_error: dict,
+    duplicate_detail: str
+) -> BulkItemResult:
+    if write_error.get("code") == 11000:
+        field = duplicate_key_field(
+            DuplicateKeyError(write_error.get("errmsg", ""), 11000, write_error)
+        )
+        # El código viene del contador: salvo que Mongo diga otra cosa, el
+        # único duplicado posible es name
+        if field in (None, "name"):
+            return BulkItemResult(
+                index=index, name=doc["name"],
+                status="duplicate", detail=duplicate_detail
+            )
+    return BulkItemResult(
+        index=index, name=doc["name"],
+        status="error", detail=write_error.get("errmsg")
+    )
+
+
+# -------------------------
+# API
+# -------------------------
+
+async def import_batch(
+    db: AsyncIOMotorDatabase,
+    collection: str,
+    docs: List[Dict[str, Any]],
+    duplicate_detail: str
+) -> Tuple[BulkResult, List[Dict[str, Any]]]:
+    # docs ya validados y armados por el servicio (precios, state, ...).
+    # Devuelve el resultado por ítem y los documentos efectivamente insertados.
+    # Sin pre-chequeo en memoria: casefold no coincide con la collation
+    # del índice en todos los casos (acentos, ligaduras), así que cada
+    # repetido (contra la base o dentro del lote) sale del insert_many
+    items: List[BulkItemResult] = [None] * len(docs)
+
+    codes = await allocate_codes(db, collection, len(docs))
+    for doc, code in zip(docs, codes):
+        doc["code"] = code
+
+    failures = await insert_docs(db, collection, docs)
+
+    inserted = []
+    for index, doc in enumerate(docs):
+        if index in failures:
+            items[index] = failure_result(
+                index, doc, failures[index], duplicate_detail
+            )
+            continue
+        items[index] = BulkItemResult(
+            index=index, name=doc["name"], status="created", code=doc["code"]
+        )
+        inserted.append(doc)
+
+    result = BulkResult(
+        created=len(inserted),
+        failed=len(docs) - len(inserted),
+        items=items
+    )
+    return result, inserted
@@ -0,0 +1,234 @@
+# services/catalogCache.py
+import os
+import time
+from uuid import uuid4
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, Type
+from fastapi import Request, Response
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ReturnDocument
+from pydantic import BaseModel, TypeAdapter
+from functools import lru_cache
+import orjson
+
+# TTL de respaldo: aunque nadie invalide, una entrada no vive más que esto
+CACHE_TTL = float(os.getenv("CATALOG_CACHE_TTL", "300"))
+
+# Modo rápido para lecturas de la DB (confiables): responde con los bytes
+# JSON ya serializados (orjson) en vez de pasar por response_model
+FAST_RESPONSES = os.getenv("FAST_RESPONSES", "0") == "1"
+
+# Coherencia entre procesos. Las versiones siempre viven en Mongo (toda
+# escritura las sube ahí, incluidos los scripts) y cada proceso las relee
+# como mucho una vez cada CACHE_SYNC_INTERVAL segundos; entre lecturas, las
+# vistas cacheadas y los 304 salen de memoria. Las escrituras de este
+# proceso se aplican al toque; lo que cambia es el retraso con el que se
+# ven las de los demás:
+#   "local"  -> 1 s por defecto (un solo worker: solo scripts o cambios
+#               directos en la base)
+#   "shared" -> 0.1 s por defecto (varios workers atrás de gunicorn)
+WORKERS = int(os.getenv("WEB_CONCURRENCY", "1"))
+CACHE_COHERENCE = os.getenv(
+    "CACHE_COHERENCE", "shared" if WORKERS > 1 else "local"
+)
+CACHE_SYNC_INTERVAL = float(os.getenv(
+    "CACHE_SYNC_INTERVAL", "0.1" if CACHE_COHERENCE == "shared" else "1"
+))
+
+VERSIONS_COLLECTION = "catalogVersions"
+VERSIONS_ID = "catalog"
+
+# (colección, vista) -> (expira_en, versión, valor)
+_entries: Dict[Tuple[str, str], Tuple[float, int, Any]] = {}
+
+# Versión por colección: cada escritura la incrementa
+_versions: Dict[str, int] = {}
+
+# Distingue los ETags de este proceso de los de un arranque anterior
+# (se reemplaza por la época guardada en Mongo al leer las versiones)
+BOOT_ID = uuid4().hex[:8]
+_epoch = BOOT_ID
+
+# time.monotonic() de la última lectura del documento de versiones
+_synced_at: Optional[float] = None
+
+stats = {
+    "hits": 0,
+    "misses": 0,
+    "invalidations": 0,
+}
+
+
+# -------------------------
+# Versiones compartidas
+# -------------------------
+
+def apply_versions(doc: Optional[Dict[str, Any]]) -> None:
+    global _epoch
+    if not doc:
+        return
+    _epoch = doc.get("epoch", _epoch)
+    for collection, version in doc.items():
+        if collection not in ("_id", "epoch"):
+            _versions[collection] = version
+
+
+async def sync_versions(db: AsyncIOMotorDatabase) -> None:
+    # Una lectura por _id de un documento chico, a lo sumo una cada
+    # CACHE_SYNC_INTERVAL segundos por proceso (no por request). _synced_at
+    # se marca antes de leer: las requests que llegan mientras tanto no
+    # repiten la lectura
+    global _synced_at
+    now = time.monotonic()
+    if _synced_at is not None and now - _synced_at < CACHE_SYNC_INTERVAL:
+        return
+    _synced_at = now
+
+    doc = await db[VERSIONS_COLLECTION].find_one({"_id": VERSIONS_ID})
+    if doc is None:
+        # Primer arranque: todos los workers comparten la misma época
+        doc = await db[VERSIONS_COLLECTION].find_one_and_update(
+            {"_id": VERSIONS_ID},
+            {"$setOnInsert": {"epoch": uuid4().hex[:8]}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+    apply_versions(doc)
+
+
+# -------------------------
+# Lectura
+# -------------------------
+
+async def cached_read(
+    db: AsyncIOMotorDatabase,
+    collection: str,
+    loader: Callable[[], Awaitable[Any]],
+    view: str = "all"
+) -> Any:
+    await sync_versions(db)
+
+    # La versión se toma ANTES de cargar: si una escritura llega mientras
+    # tanto, la entrada queda con la versión vieja y no se vuelve a servir
+    version = get_version(collection)
+    entry = _entries.get((collection, view))
+
+    if entry and entry[0] >= time.monotonic() and entry[1] == version:
+        stats["hits"] += 1
+        return entry[2]
+
+    stats["misses"] += 1
+    value = await loader()
+    _entries[(collection, view)] = (time.monotonic() + CACHE_TTL, version, value)
+    return value
+
+
+# -------------------------
+# Invalidación
+# -------------------------
+
+async def invalidate(db: AsyncIOMotorDatabase, *collections: str) -> None:
+    # Sube la versión de las colecciones indicadas en Mongo (invalida sus
+    # vistas cacheadas y los ETags emitidos, en este proceso y en los demás)
+    apply_versions(await db[VERSIONS_COLLECTION].find_one_and_update(
+        {"_id": VERSIONS_ID},
+        {
+            "$inc": {c: 1 for c in collections},
+            "$setOnInsert": {"epoch": uuid4().hex[:8]},
+        },
+        upsert=True,
+        return_document=ReturnDocument.AFTER
+    ))
+
+    for key in [k for k in _entries if k[0] in collections]:
+        del _entries[key]
+    stats["invalidations"] += 1
+
+
+def clear() -> None:
+    global _synced_at, _epoch
+    _entries.clear()
+    _versions.clear()
+    _synced_at = None
+    _epoch = BOOT_ID
+
+
+# -------------------------
+# Versiones / ETag
+# -------------------------
+
+def get_version(collection: str) -> int:
+    return _versions.get(collection, 0)
+
+
+def etag_for(*collections: str, representation: str = "") -> str:
+    # El tramo de CACHE_TTL (reloj de pared, igual en todos los workers)
+    # hace que un ETag venza junto con la caché: un cambio hecho a mano en
+    # la base, que no sube ninguna versión, se ve a lo sumo un TTL después.
+    # representation distingue los formatos de una misma ruta (p. ej. NDJSON)
+    versions = ".".join(str(get_version(c)) for c in collections)
+    window = int(time.time() // CACHE_TTL) if CACHE_TTL > 0 else 0
+    suffix = f"-{representation}" if representation else ""
+    return f'W/"{_epoch}-{versions}-{window}{suffix}"'
+
+
+async def not_modified(
+    request: Request,
+    response: Response,
+    db: AsyncIOMotorDatabase,
+    *collections: str,
+    representation: str = "",
+    vary: Optional[str] = None
+) -> Optional[Response]:
+    # Devuelve un 304 si el cliente ya tiene la versión actual;
+    # si no, deja el ETag puesto en la respuesta y devuelve None.
+    # Las rutas que negocian el formato pasan representation y vary="Accept"
+    await sync_versions(db)
+    etag = etag_for(*collections, representation=representation)
+    headers = {"ETag": etag}
+    if vary:
+        headers["Vary"] = vary
+    response.headers.update(headers)
+
+    header = request.headers.get("if-none-match")
+    if header:
+        tags = [t.strip() for t in header.split(",")]
+        if "*" in tags or etag in tags:
+            return Response(status_code=304, headers=headers)
+
+    return None
+
+
+# -------------------------
+# Serialización
+# -------------------------
+
+@lru_cache(maxsize=None)
+def list_adapter(model: Type[BaseModel]) -> TypeAdapter:
+    return TypeAdapter(List[model])
+
+
+def build_models(model: Type[BaseModel], docs: List[Dict[str, Any]]) -> List[Any]:
+    # Una sola llamada de validación para toda la lista
+    return list_adapter(model).validate_python(
+        [{**d, "_id": str(d["_id"])} for d in docs]
+    )
+
+
+def dump_models(models: List[BaseModel]) -> bytes:
+    # Mismo JSON que genera FastAPI con response_model (by_alias), pero sin
+    # volver a validar: pydantic-core arma los dicts y orjson los codifica
+    if not models:
+        return b"[]"
+    adapter = list_adapter(type(models[0]))
+    return orjson.dumps(adapter.dump_python(models, by_alias=True))
+
+
+def json_response(content: bytes, response: Response) -> Response:
+    # Bytes ya serializados: se saltea la validación de response_model
+    return Response(
+        content=content,
+        media_type="application/json",
+        headers={
+            k: v for k, v in response.headers.items() if k != "content-length"
+        }
+    )
@@ -0,0 +1,94 @@
+# services/codeAllocator.py
+# Códigos cortos únicos sin reintentos: cada proceso reserva bloques de un
+# contador atómico en Mongo y los reparte desde memoria.
+import asyncio
+import os
+import string
+from typing import Dict, List, Tuple
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ReturnDocument
+
+COLLECTION = "codeCounters"
+
+# Cuántos códigos reserva cada viaje a Mongo
+BLOCK_SIZE = int(os.getenv("CODE_BLOCK_SIZE", "50"))
+
+BASE36 = string.digits + string.ascii_uppercase
+
+# Prefijo + 6 dígitos base36 = 7 caracteres: nunca choca con los códigos
+# aleatorios de 6 caracteres que ya existen
+CODE_DIGITS = 6
+PREFIXES = {
+    "pieces": "P",
+    "combinedPieces": "C",
+    "bonusProduct": "B",
+}
+
+# contador -> [siguiente, fin) del bloque reservado en este proceso
+_blocks: Dict[str, Tuple[int, int]] = {}
+_locks: Dict[str, asyncio.Lock] = {}
+
+
+# -------------------------
+# Helpers
+# -------------------------
+
+def to_base36(value: int, width: int = CODE_DIGITS) -> str:
+    digits = ""
+    while value:
+        value, rest = divmod(value, 36)
+        digits = BASE36[rest] + digits
+    return digits.rjust(width, "0")
+
+
+def format_code(counter: str, value: int) -> str:
+    return PREFIXES[counter] + to_base36(value)
+
+
+async def reserve_block(
+    db: AsyncIOMotorDatabase,
+    counter: str,
+    size: int
+) -> Tuple[int, int]:
+    # $inc atómico: dos procesos nunca reciben el mismo rango
+    doc = await db[COLLECTION].find_one_and_update(
+        {"_id": counter},
+        {"$inc": {"next": size}},
+        upsert=True,
+        return_document=ReturnDocument.AFTER
+    )
+    end = doc["next"]
+    return end - size, end
+
+
+# -------------------------
+# API
+# -------------------------
+
+async def allocate_codes(
+    db: AsyncIOMotorDatabase,
+    counter: str,
+    count: int
+) -> List[str]:
+    lock = _locks.setdefault(counter, asyncio.Lock())
+
+    async with lock:
+        start, end = _blocks.get(counter, (0, 0))
+        values = list(range(start, min(end, start + count)))
+        start += len(values)
+
+        missing = count - len(values)
+        if missing:
+            start, end = await reserve_block(
+                db, counter, max(BLOCK_SIZE, missing)
+            )
+            values += range(start, start + missing)
+            start += missing
+
+        _blocks[counter] = (start, end)
+
+    return [format_code(counter, v) for v in values]
+
+
+async def allocate_code(db: AsyncIOMotorDatabase, counter: str) -> str:
+    return (await allocate_codes(db, counter, 1))[0]
@@ -1,12 +1,12 @@
 # services/combinedPiecesService.py
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Tuple
 from motor.motor_asyncio import AsyncIOMotorDatabase
 from pymongo import ReturnDocument
 from pymongo.errors import DuplicateKeyError
 from fastapi import HTTPException
-from random import choices
-import string
+import heapq
 import math
+import os
 
 from models.combinedPiece import (
     CombinedPiece,
@@ -16,49 +16,44 @@ from models.combinedPiece import (
 
 from services.comboVariantService import (
     save_combo_variants,
-    delete_variants_by_combo
+    replace_combo_variants,
+    set_combo_state
 )
+from services.catalogCache import (
+    cached_read,
+    invalidate,
+    build_models,
+    dump_models
+)
+from services.menuService import refresh_menu
+from services.codeAllocator import allocate_code
+from services.variantQueue import mark_dirty
+from services.pricingRules import current_rules, sync_rules
+from services.bulkImport import check_batch_size, import_batch
+from services.fieldProjection import read_fields
+from models.bulk import BulkResult
 
 COLLECTION = "combinedPieces"
 PIECES_COLLECTION = "pieces"
 
+# Vistas livianas para ?fields= (listados y selects)
+VIEWS = {
+    "summary": ("code", "name", "state"),
+    "card": ("code", "name", "img", "proteins", "state"),
+}
+
 
 # -------------------------
 # Helpers
 # -------------------------
 
-def generate_code(length: int = 6) -> str:
-    return "".join(choices(string.ascii_uppercase + string.digits, k=length))
-
-
-ROLL_SIZES = [4, 8]
-TAKES = [3, 4, 5]
-
-COMBO_SCHEMAS = [
-    {"take": t, "perRoll": r}
-    for r in ROLL_SIZES
-    for t in TAKES
-    if not (t == 3 and r == 8)
-]
-
-DISCOUNT_RULES = [
-    {"minPieces": 8,  "discount": 0.00},
-    {"minPieces": 16, "discount": 0.10},
-    {"minPieces": 24, "discount": 0.15},
-    {"minPieces": 30, "discount": 0.20},
-]
-
-
 def round_up_to_100(value: float) -> int:
     return int(math.ceil(value / 100) * 100)
 
 
 def get_discount_for_pieces(total_pieces: int) -> float:
-    discount = 0.0
-    for rule in DISCOUNT_RULES:
-        if total_pieces >= rule["minPieces"]:
-            discount = rule["discount"]
-    return discount
+    # Esquemas y descuentos salen de pricingRules (ya compilados)
+    return current_rules().discount_for(total_pieces)
 
 
 def calculate_prices(base_price: float, discount: float) -> tuple[int, int]:
@@ -67,69 +62,157 @@ def calculate_prices(base_price: float, discount: float) -> tuple[int, int]:
     return rounded_base, final_price
 
 
+# Selecciones por esquema que se convierten en variante (las más baratas)
+TOP_K = int(os.getenv("COMBO_TOP_K", "1"))
+
+
+def cheapest_selections(
+    prices: List[float],
+    take: int,
+    k: int = 1
+) -> List[Tuple[int, ...]]:
+    # Las k combinaciones de `take` elementos con menor suma, por
+    # branch-and-bound: se recorren los precios ordenados y una rama se corta
+    # cuando su cota (lo elegido + los más baratos que quedan) ya no mejora
+    # la peor de las k guardadas. Devuelve índices de `prices`, ordenados
+    n = len(prices)
+    if take <= 0 or n < take or k <= 0:
+        return []
+
+    order = sorted(range(n), key=lambda i: (prices[i], i))
+    ranked = [prices[i] for i in order]
+    prefix = [0.0]
+    for price in ranked:
+        prefix.append(prefix[-1] + price)
+
+    # max-heap de las k mejores: (-total, -orden de hallazgo, selección)
+    best: List[Tuple[float, int, Tuple[int, ...]]] = []
+    found = 0
+
+    def search(start: int, chosen: Tuple[int, ...], total: float) -> None:
+        nonlocal found
+        remaining = take - len(chosen)
+        if remaining == 0:
+            heapq.heappush(best, (-total, -found, chosen))
+            found += 1
+            if len(best) > k:
+                heapq.heappop(best)
+            return
+
+        for i in range(start, n - remaining + 1):
+            bound = total + prefix[i + remaining] - prefix[i]
+            if len(best) == k and bound >= -best[0][0]:
+                # precios ordenados: las ramas siguientes solo empeoran
+                break
+            search(i + 1, chosen + (i,), total + ranked[i])
+
+    search(0, (), 0.0)
+
+    return [
+        tuple(sorted(order[i] for i in chosen))
+        for _, _, chosen in sorted(best, key=lambda b: (-b[0], -b[1]))
+    ]
+
+
 def generate_combo_variants(
-    pieces_data: List[Dict[str, Any]]
+    pieces_data: List[Dict[str, Any]],
+    top_k: int = TOP_K
 ) -> List[Dict[str, Any]]:
 
     variants = []
+    # precio_Xp -> (piezas con ese precio, precios): se calcula una vez por
+    # tamaño de roll y lo comparten todos los `take`
+    price_table: Dict[str, Tuple[list, list]] = {}
 
-    for schema in COMBO_SCHEMAS:
+    for schema in current_rules().schemas:
         take = schema["take"]
         per_roll = schema["perRoll"]
         price_key = f"price_{per_roll}p"
 
-        available = [p for p in pieces_data if p.get(price_key) is not None]
-        if len(available) < take:
-            continue
-
-        selected = available[:take]
-        pieces_list = []
-        raw_price = 0
-
-        for piece in selected:
-            price = piece[price_key]
-            raw_price += price
-            pieces_list.append({
-                "pieceCode": piece["code"],
-                "pieceName": piece["name"],
-                "pieceCount": 1,
-                "price": price
-            })
+        if price_key not in price_table:
+            available = [p for p in pieces_data if p.get(price_key) is not None]
+            price_table[price_key] = (available, [p[price_key] for p in available])
+        available, prices = price_table[price_key]
 
         total_pieces = per_roll * take
         discount = get_discount_for_pieces(total_pieces)
-        base_price, final_price = calculate_prices(raw_price, discount)
-
-        variants.append({
-            "take": take,
-            "perRoll": per_roll,
-            "pieces": pieces_list,
-            "totalPieces": total_pieces,
-            "basePrice": base_price,
-            "finalPrice": final_price,
-            "discounted": discount > 0,
-            "discountPercent": int(discount * 100)
-        })
+
+        for selection in cheapest_selections(prices, take, top_k):
+            selected = [available[i] for i in selection]
+            pieces_list = []
+            raw_price = 0
+
+            for piece in selected:
+                price = piece[price_key]
+                raw_price += price
+                pieces_list.append({
+                    "pieceCode": piece["code"],
+                    "pieceName": piece["name"],
+                    "pieceCount": 1,
+                    "price": price
+                })
+
+            base_price, final_price = calculate_prices(raw_price, discount)
+
+            variants.append({
+                "take": take,
+                "perRoll": per_roll,
+                "pieces": pieces_list,
+                "totalPieces": total_pieces,
+                "basePrice": base_price,
+                "finalPrice": final_price,
+                "discounted": discount > 0,
+                "discountPercent": int(discount * 100),
+                # denormalizado para la búsqueda de variantes
+                "proteins": sorted({p["protein"] for p in selected if p.get("protein")})
+            })
 
     return variants
 
 
+def generate_variants_for_combos(
+    combos: List[Dict[str, Any]],
+    pieces_data: List[Dict[str, Any]]
+) -> Dict[str, List[Dict[str, Any]]]:
+    # Genera en memoria las variantes de varios combos a partir de una
+    # sola carga de piezas (respeta el orden en que vienen las piezas)
+    result = {}
+    for combo in combos:
+        members = set(combo["typePieces"])
+        result[combo["code"]] = generate_combo_variants(
+            [p for p in pieces_data if p["code"] in members]
+        )
+    return result
+
+
 # -------------------------
 # CRUD
 # -------------------------
 
 async def get_combined_pieces(db: AsyncIOMotorDatabase) -> List[CombinedPieceModel]:
-    docs = await db[COLLECTION].find().to_list(length=None)
+    async def load():
+        docs = await db[COLLECTION].find().to_list(length=None)
 
-    if not docs:
-        raise HTTPException(404, "No hay combinados disponibles")
+        if not docs:
+            raise HTTPException(404, "No hay combinados disponibles")
 
-    result = []
-    for doc in docs:
-        doc["_id"] = str(doc["_id"])
-        result.append(CombinedPieceModel(**doc))
+        return build_models(CombinedPieceModel, docs)
+
+    return await cached_read(db, COLLECTION, load)
 
-    return result
+
+async def get_combined_pieces_json(db: AsyncIOMotorDatabase) -> bytes:
+    async def load():
+        return dump_models(await get_combined_pieces(db))
+
+    return await cached_read(db, COLLECTION, load, "json")
+
+
+async def get_combined_pieces_fields(db: AsyncIOMotorDatabase, fields: str) -> bytes:
+    return await read_fields(
+        db, COLLECTION, CombinedPieceModel, fields, VIEWS,
+        "No hay combinados disponibles"
+    )
 
 
 async def add_combined_piece(
@@ -140,26 +223,57 @@ async def add_combined_piece(
     doc = data.model_dump()
     doc["state"] = True
 
-    for _ in range(5):
-        doc["code"] = generate_code()
-        try:
-            pieces_data = await db[PIECES_COLLECTION].find(
-                {"code": {"$in": doc["typePieces"]}}
-            ).to_list(length=None)
+    doc["code"] = await allocate_code(db, COLLECTION)
 
-            variants = generate_combo_variants(pieces_data)
+    try:
+        result = await db[COLLECTION].insert_one(doc)
+    except DuplicateKeyError:
+        raise HTTPException(400, "Ya existe un combinado con ese nombre")
+    doc["_id"] = str(result.inserted_id)
 
-            result = await db[COLLECTION].insert_one(doc)
-            doc["_id"] = str(result.inserted_id)
+    pieces_data = await db[PIECES_COLLECTION].find(
+        {"code": {"$in": doc["typePieces"]}}
+    ).to_list(length=None)
 
-            await save_combo_variants(doc["code"], variants, db)
+    await sync_rules(db)
+    variants = generate_combo_variants(pieces_data)
 
-            return CombinedPieceModel(**doc)
+    await save_combo_variants(doc["code"], variants, db)
+    await invalidate(db, COLLECTION)
+    await refresh_menu(db, combos=[doc["code"]])
 
-        except DuplicateKeyError:
-            continue
+    return CombinedPieceModel(**doc)
 
-    raise HTTPException(500, "No se pudo generar un código único")
+
+async def bulk_add_combined_pieces(
+    combos: List[CombinedPiece],
+    db: AsyncIOMotorDatabase
+) -> BulkResult:
+    check_batch_size(combos)
+
+    docs = [{**c.model_dump(), "state": True} for c in combos]
+
+    result, inserted = await import_batch(
+        db, COLLECTION, docs, "Ya existe un combinado con ese nombre"
+    )
+
+    if not inserted:
+        return result
+
+    # Una sola carga de piezas para generar las variantes de todo el lote
+    needed = {code for doc in inserted for code in doc["typePieces"]}
+    pieces_data = await db[PIECES_COLLECTION].find(
+        {"code": {"$in": list(needed)}}
+    ).to_list(length=None)
+
+    await sync_rules(db)
+    variants_by_combo = generate_variants_for_combos(inserted, pieces_data)
+    await replace_combo_variants(variants_by_combo, db)
+
+    await invalidate(db, COLLECTION)
+    await refresh_menu(db, combos=[d["code"] for d in inserted])
+
+    return result
 
 
 async def update_combined_piece(
@@ -170,35 +284,33 @@ async def update_combined_piece(
 
     update_data = data.model_dump(exclude_unset=True)
 
-    current = await db[COLLECTION].find_one({"code": code})
-    if not current:
+    try:
+        updated = await db[COLLECTION].find_one_and_update(
+            {"code": code},
+            {"$set": update_data},
+            return_document=ReturnDocument.AFTER
+        )
+    except DuplicateKeyError:
+        raise HTTPException(
+            400,
+            "Ya existe otro combinado con ese nombre"
+        )
+
+    if not updated:
         return None
 
-    if "name" in update_data:
-        duplicate = await db[COLLECTION].find_one({
-            "name": {"$regex": f"^{update_data['name']}$", "$options": "i"},
-            "code": {"$ne": code}
-        })
-        if duplicate:
-            raise HTTPException(
-                400,
-                "Ya existe otro combinado con ese nombre"
-            )
+    await invalidate(db, COLLECTION)
+
+    # La búsqueda de variantes filtra por la copia de state en cada variante
+    if "state" in update_data:
+        await set_combo_state(db, code, update_data["state"])
 
+    # Las variantes se regeneran en segundo plano recién cuando el update
+    # fue aceptado (services/variantWorker.py)
     if "typePieces" in update_data:
-        pieces_data = await db[PIECES_COLLECTION].find(
-            {"code": {"$in": update_data["typePieces"]}}
-        ).to_list(length=None)
-
-        variants = generate_combo_variants(pieces_data)
-        await delete_variants_by_combo(code, db)
-        await save_combo_variants(code, variants, db)
-
-    updated = await db[COLLECTION].find_one_and_update(
-        {"code": code},
-        {"$set": update_data},
-        return_document=ReturnDocument.AFTER
-    )
+        await mark_dirty(db, [code])
+
+    await refresh_menu(db, combos=[code])
 
     updated["_id"] = str(updated["_id"])
     return CombinedPieceModel(**updated)
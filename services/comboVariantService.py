@@ -1,63 +1,506 @@
 # services/comboVariantService.py
+# El _id de cada variante sale de combo + take + perRoll + hash del
+# contenido. El combo apunta a su set vigente (activeVariantSet +
+# activeVariantIds); el puntero se mueve con un update atómico y las
+# variantes que quedan afuera se borran en segundo plano, así que un lector
+# siempre ve un set completo y un rebuild sin cambios no escribe nada.
+# Cada variante lleva además `active` (en el set vigente), para que los
+# listados filtren en Mongo; el puntero sigue siendo la fuente de verdad y
+# se confirma solo para los combos de cada lote leído.
+import asyncio
+import hashlib
+import json
+import os
+from bson import ObjectId
 from motor.motor_asyncio import AsyncIOMotorDatabase
-from typing import List, Dict, Any
-from random import choices
-import string
+from pymongo import DeleteMany, UpdateMany, UpdateOne
+from fastapi import HTTPException
+from typing import List, Dict, Any, Optional, AsyncIterator, Iterable, Set
+
+from services.catalogCache import invalidate
 
 COLLECTION = "comboVariants"
+COMBOS_COLLECTION = "combinedPieces"
 
+# Segundos que sobrevive un set reemplazado (lecturas en curso)
+GC_DELAY = float(os.getenv("VARIANT_GC_DELAY", "30"))
 
-def generate_variant_id(length: int = 12) -> str:
-    return "".join(choices(string.ascii_uppercase + string.digits, k=length))
+# Orden permitido en la búsqueda ("-" = descendente); cada uno tiene su
+# índice en dataBase/indexes.py, así Mongo nunca ordena en memoria
+SEARCH_SORTS = ("finalPrice", "totalPieces")
 
+# Campos que no forman parte del contenido de una variante
+META_FIELDS = ("_id", "comboCode", "setVersion", "contentHash", "active", "comboState")
 
-async def save_combo_variants(
-    combo_code: str,
-    variants: List[Dict[str, Any]],
-    db: AsyncIOMotorDatabase
-) -> List[Dict[str, Any]]:
+_gc_tasks: Set[asyncio.Task] = set()
 
-    if not variants:
-        return []
 
+def content_hash(variant: Dict[str, Any]) -> str:
+    content = {k: v for k, v in variant.items() if k not in META_FIELDS}
+    encoded = json.dumps(content, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha1(encoded).hexdigest()[:16]
+
+
+def variant_id(combo_code: str, variant: Dict[str, Any], digest: str) -> str:
+    # Determinístico: mismo combo, esquema y contenido -> mismo _id
+    return f"{combo_code}-{variant['take']}-{variant['perRoll']}-{digest[:10]}"
+
+
+def new_set_version() -> str:
+    # ObjectId: ordenable por tiempo, comparable como string
+    return str(ObjectId())
+
+
+def build_variant_docs(
+    combo_code: str,
+    variants: List[Dict[str, Any]]
+) -> List[Dict[str, Any]]:
     docs = []
     for v in variants:
         doc = v.copy()
-        doc["_id"] = generate_variant_id()
+        doc["contentHash"] = content_hash(v)
+        doc["_id"] = variant_id(combo_code, v, doc["contentHash"])
         doc["comboCode"] = combo_code
         docs.append(doc)
-
-    await db[COLLECTION].insert_many(docs)
     return docs
 
 
+# -------------------------
+# Sets activos
+# -------------------------
+
+async def active_sets(
+    db: AsyncIOMotorDatabase,
+    codes: Optional[Iterable[str]] = None
+) -> Dict[str, Dict[str, Any]]:
+    # combo -> {"activeVariantSet": versión, "activeVariantIds": [_id, ...],
+    #           "name", "state"}  (sin set = variantes anteriores a los sets)
+    query = {} if codes is None else {"code": {"$in": list(codes)}}
+    combos = await db[COMBOS_COLLECTION].find(
+        query,
+        {"code": 1, "name": 1, "state": 1,
+         "activeVariantSet": 1, "activeVariantIds": 1}
+    ).to_list(length=None)
+    return {c["code"]: c for c in combos}
+
+
+def is_active(variant: Dict[str, Any], pointers: Dict[str, Dict[str, Any]]) -> bool:
+    pointer = pointers.get(variant["comboCode"]) or {}
+    ids = pointer.get("activeVariantIds")
+    if ids is not None:
+        return variant["_id"] in ids
+    # Sets escritos antes de los _id por contenido
+    return variant.get("setVersion") == pointer.get("activeVariantSet")
+
+
+# -------------------------
+# Escritura
+# -------------------------
+
+async def replace_combo_variants(
+    variants_by_combo: Dict[str, List[Dict[str, Any]]],
+    db: AsyncIOMotorDatabase
+) -> Dict[str, int]:
+    # 1. Compara contra el set vigente: un combo sin cambios no se escribe
+    # 2. Upsert solo de las variantes nuevas (el _id sale del contenido, así
+    #    que una variante igual a una existente no se vuelve a escribir)
+    # 3. Mueve los punteros en un bulk_write; solo avanza a versiones más
+    #    nuevas, así dos rebuilds concurrentes nunca se mezclan
+    # 4. Las variantes que quedan fuera del set se borran después de GC_DELAY
+    stats = {"written": 0, "unchanged": 0, "combos": 0}
+    if not variants_by_combo:
+        return stats
+
+    version = new_set_version()
+    pointers = await active_sets(db, variants_by_combo)
+
+    upserts = []
+    flips = {}
+    for combo_code, variants in variants_by_combo.items():
+        docs = build_variant_docs(combo_code, variants)
+        new_ids = [d["_id"] for d in docs]
+        current = (pointers.get(combo_code) or {}).get("activeVariantIds")
+
+        if current == new_ids:
+            stats["unchanged"] += len(docs)
+            continue
+
+        current = set(current or ())
+        for doc in docs:
+            if doc["_id"] in current:
+                stats["unchanged"] += 1
+                continue
+            # setVersion marca el publish que la usa (protege del GC)
+            # Entra activa antes del cambio de puntero: durante el cambio
+            # conviven los dos sets y el lector se queda con el del puntero
+            # comboState: copia de combo.state para filtrar la búsqueda en Mongo
+            fields = {k: v for k, v in doc.items() if k != "_id"}
+            upserts.append(UpdateOne(
+                {"_id": doc["_id"]},
+                {"$setOnInsert": fields,
+                 "$set": {"setVersion": version, "active": True,
+                          "comboState": combo_state(pointers.get(combo_code))}},
+                upsert=True
+            ))
+        flips[combo_code] = new_ids
+
+    if upserts:
+        await db[COLLECTION].bulk_write(upserts, ordered=False)
+        stats["written"] = len(upserts)
+
+    if not flips:
+        return stats
+
+    result = await db[COMBOS_COLLECTION].bulk_write([
+        UpdateOne(
+            {
+                "code": code,
+                "$or": [
+                    {"activeVariantSet": {"$exists": False}},
+                    {"activeVariantSet": {"$lt": version}},
+                ]
+            },
+            {"$set": {"activeVariantSet": version, "activeVariantIds": ids}}
+        )
+        for code, ids in flips.items()
+    ], ordered=False)
+    stats["combos"] = result.modified_count
+
+    # Baja `active` de lo que quedó fuera del puntero (incluidos los sets de
+    # un publish que perdió contra uno más nuevo)
+    await sync_variant_flags(db, list(flips))
+    await invalidate(db, COLLECTION)
+    schedule_gc(db, list(flips))
+    return stats
+
+
+async def save_combo_variants(
+    combo_code: str,
+    variants: List[Dict[str, Any]],
+    db: AsyncIOMotorDatabase
+) -> Dict[str, int]:
+    return await replace_combo_variants({combo_code: variants}, db)
+
+
+# -------------------------
+# Flags de las variantes
+# -------------------------
+
+def stale_filter(code: str, pointer: Dict[str, Any]) -> Dict[str, Any]:
+    # Variantes del combo fuera del set vigente que ningún publish más nuevo
+    # que el vigente tocó (esas pueden estar a mitad de publicación)
+    return {
+        "comboCode": code,
+        "_id": {"$nin": pointer.get("activeVariantIds", [])},
+        "$or": [
+            {"setVersion": {"$exists": False}},
+            {"setVersion": {"$lt": pointer["activeVariantSet"]}},
+        ]
+    }
+
+
+def combo_state(combo: Optional[Dict[str, Any]]) -> bool:
+    return (combo or {}).get("state") is not False
+
+
+def flag_ops(code: str, pointer: Dict[str, Any]) -> List[UpdateMany]:
+    state = combo_state(pointer)
+    state_op = UpdateMany({"comboCode": code, "comboState": {"$ne": state}},
+                          {"$set": {"comboState": state}})
+
+    ids = pointer.get("activeVariantIds")
+    if ids is None:
+        # Sin _id por contenido (o sin sets): vale el setVersion del puntero
+        version = pointer.get("activeVariantSet")
+        return [
+            UpdateMany({"comboCode": code, "setVersion": version,
+                        "active": {"$ne": True}}, {"$set": {"active": True}}),
+            UpdateMany({"comboCode": code, "setVersion": {"$ne": version},
+                        "active": {"$ne": False}}, {"$set": {"active": False}}),
+            state_op,
+        ]
+
+    return [
+        UpdateMany({"_id": {"$in": ids}, "active": {"$ne": True}},
+                   {"$set": {"active": True}}),
+        UpdateMany({**stale_filter(code, pointer), "active": {"$ne": False}},
+                   {"$set": {"active": False}}),
+        state_op,
+    ]
+
+
+async def set_combo_state(
+    db: AsyncIOMotorDatabase,
+    combo_code: str,
+    state: bool
+) -> None:
+    # Al habilitar/deshabilitar un combo (la búsqueda filtra por comboState)
+    result = await db[COLLECTION].update_many(
+        {"comboCode": combo_code, "comboState": {"$ne": state}},
+        {"$set": {"comboState": state}}
+    )
+    if result.modified_count:
+        await invalidate(db, COLLECTION)
+
+
+async def sync_variant_flags(
+    db: AsyncIOMotorDatabase,
+    codes: Optional[Iterable[str]] = None
+) -> int:
+    # Alinea `active` con el puntero y `comboState` con el state de cada
+    # combo (todos si codes es None).
+    # Lo corren cada publish, el GC y el script de rebuild (que además
+    # completa las variantes escritas antes de que existiera el flag)
+    pointers = await active_sets(db, codes)
+    ops = [op for code, pointer in pointers.items() for op in flag_ops(code, pointer)]
+    if not ops:
+        return 0
+
+    result = await db[COLLECTION].bulk_write(ops, ordered=False)
+    return result.modified_count
+
+
+async def backfill_variant_flags(db: AsyncIOMotorDatabase) -> int:
+    # Al arrancar: si quedan variantes sin `active` o sin `comboState`
+    # (escritas antes de esos flags) los completa para todos los combos.
+    # Cada consulta por null usa un índice, así que con todo al día son dos
+    # lecturas mínimas
+    missing = (
+        await db[COLLECTION].find_one({"active": None}, {"_id": 1})
+        or await db[COLLECTION].find_one(
+            {"active": True, "comboState": None}, {"_id": 1}
+        )
+    )
+    if not missing:
+        return 0
+
+    flagged = await sync_variant_flags(db)
+    await invalidate(db, COLLECTION)
+    return flagged
+
+
+# -------------------------
+# Limpieza de sets viejos
+# -------------------------
+
+async def collect_stale_sets(
+    db: AsyncIOMotorDatabase,
+    codes: Optional[Iterable[str]] = None,
+    delay: float = 0
+) -> int:
+    # Borra las variantes que no están en el set vigente y que ningún
+    # publish más nuevo que el vigente tocó (esas pueden estar a mitad de
+    # publicación: no se tocan)
+    if delay:
+        await asyncio.sleep(delay)
+
+    pointers = await active_sets(db, codes)
+    ops = [
+        DeleteMany(stale_filter(code, pointer))
+        for code, pointer in pointers.items()
+        if pointer.get("activeVariantSet")
+    ]
+    if not ops:
+        return 0
+
+    result = await db[COLLECTION].bulk_write(ops, ordered=False)
+    # De paso repara `active` si un publish concurrente lo dejó corrido
+    if await sync_variant_flags(db, list(pointers)):
+        await invalidate(db, COLLECTION)
+    return result.deleted_count
+
+
+def schedule_gc(db: AsyncIOMotorDatabase, codes: List[str]) -> None:
+    if not codes:
+        return
+    task = asyncio.create_task(collect_stale_sets(db, codes, GC_DELAY))
+    _gc_tasks.add(task)
+    task.add_done_callback(_gc_tasks.discard)
+
+
+async def drain_gc() -> None:
+    # Para scripts: espera a que terminen las limpiezas pendientes
+    if _gc_tasks:
+        await asyncio.gather(*list(_gc_tasks), return_exceptions=True)
+
+
+# -------------------------
+# Lectura
+# -------------------------
+
 async def get_variants_by_combo(
     combo_code: str,
     db: AsyncIOMotorDatabase
 ) -> List[Dict[str, Any]]:
 
+    pointer = (await active_sets(db, [combo_code])).get(combo_code) or {}
+    ids = pointer.get("activeVariantIds")
+
+    if ids is None:
+        # setVersion: None también matchea las variantes sin setVersion
+        return await db[COLLECTION].find(
+            {"comboCode": combo_code, "setVersion": pointer.get("activeVariantSet")}
+        ).to_list(length=None)
+
     variants = await db[COLLECTION].find(
-        {"comboCode": combo_code}
+        {"_id": {"$in": ids}}
     ).to_list(length=None)
 
-    return variants
+    # Mismo orden que el set publicado
+    position = {variant_id: i for i, variant_id in enumerate(ids)}
+    return sorted(variants, key=lambda v: position[v["_id"]])
 
 async def get_all_variants(
     db: AsyncIOMotorDatabase
 ) -> List[Dict[str, Any]]:
-    variants = await db[COLLECTION].find().to_list(length=None)
+    return [v async for v in iter_variants(db)]
+
 
+async def confirm_active(
+    db: AsyncIOMotorDatabase,
+    variants: List[Dict[str, Any]]
+) -> List[Dict[str, Any]]:
+    # `active` ya filtró en Mongo; el puntero de los combos de este lote
+    # decide los casos en pleno cambio de set (dos sets activos a la vez)
     if not variants:
         return []
+    pointers = await active_sets(db, {v["comboCode"] for v in variants})
+    return [v for v in variants if is_active(v, pointers)]
 
-    return variants
+async def get_variants_page(
+    db: AsyncIOMotorDatabase,
+    after: Optional[str] = None,
+    limit: int = 100
+) -> List[Dict[str, Any]]:
+    # Paginación por clave: ordena por _id y arranca después del último visto
+    page = []
+    variants = iter_variants(db, after, batch_size=limit)
+    try:
+        async for variant in variants:
+            page.append(variant)
+            if len(page) == limit:
+                break
+    finally:
+        await variants.aclose()
+    return page
 
-async def delete_variants_by_combo(
-    combo_code: str,
-    db: AsyncIOMotorDatabase
-) -> int:
 
-    result = await db[COLLECTION].delete_many(
-        {"comboCode": combo_code}
-    )
-    return result.deleted_count
+async def iter_variants(
+    db: AsyncIOMotorDatabase,
+    after: Optional[str] = None,
+    batch_size: int = 500
+) -> AsyncIterator[Dict[str, Any]]:
+    # Recorre las variantes activas con un cursor (índice active + _id):
+    # nunca hay más de un lote, ni más punteros que los de ese lote, en memoria
+    query: Dict[str, Any] = {"active": True}
+    if after:
+        query["_id"] = {"$gt": after}
+    cursor = db[COLLECTION].find(query).sort("_id", 1).batch_size(batch_size)
+
+    batch = []
+    async for doc in cursor:
+        batch.append(doc)
+        if len(batch) == batch_size:
+            for variant in await confirm_active(db, batch):
+                yield variant
+            batch = []
+
+    for variant in await confirm_active(db, batch):
+        yield variant
+
+
+# -------------------------
+# Búsqueda
+# -------------------------
+
+def build_search_query(
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    min_pieces: Optional[int] = None,
+    max_pieces: Optional[int] = None,
+    per_roll: Optional[int] = None,
+    take: Optional[int] = None,
+    discounted: Optional[bool] = None,
+    proteins: Optional[List[str]] = None,
+    pieces: Optional[List[str]] = None
+) -> Dict[str, Any]:
+    # Cada filtro cae en alguno de los índices de comboVariants declarados
+    # en dataBase/indexes.py (ver scripts/explain_variant_search.py); todos
+    # empiezan por active + comboState, así las variantes de sets viejos o
+    # de combos deshabilitados no se leen
+    query: Dict[str, Any] = {"active": True, "comboState": True}
+
+    def between(field, low, high):
+        bounds = {}
+        if low is not None:
+            bounds["$gte"] = low
+        if high is not None:
+            bounds["$lte"] = high
+        if bounds:
+            query[field] = bounds
+
+    between("finalPrice", min_price, max_price)
+    between("totalPieces", min_pieces, max_pieces)
+
+    if per_roll is not None:
+        query["perRoll"] = per_roll
+    if take is not None:
+        query["take"] = take
+    if discounted is not None:
+        query["discounted"] = discounted
+    if proteins:
+        query["proteins"] = {"$all": proteins}
+    if pieces:
+        query["pieces.pieceCode"] = {"$all": pieces}
+
+    return query
+
+
+def build_search_sort(sort: str) -> List[tuple]:
+    field = sort.lstrip("-")
+    if field not in SEARCH_SORTS:
+        raise HTTPException(
+            400,
+            f"Orden no soportado: {sort} (usá {', '.join(SEARCH_SORTS)})"
+        )
+    # El desempate por _id va en la misma dirección, para que el índice
+    # (campo, _id) sirva también recorrido al revés
+    direction = -1 if sort.startswith("-") else 1
+    return [(field, direction), ("_id", direction)]
+
+
+async def search_variants(
+    db: AsyncIOMotorDatabase,
+    sort: str = "finalPrice",
+    limit: int = 20,
+    **filters
+) -> List[Dict[str, Any]]:
+    # Variantes vigentes de combos activos que cumplen los filtros, ya
+    # filtradas, ordenadas y cortadas en Mongo. Solo se leen los punteros
+    # de los combos de cada lote (confirman el set en pleno cambio y traen
+    # el nombre); lo que se descarta ahí es transitorio
+    cursor = db[COLLECTION].find(build_search_query(**filters)).sort(
+        build_search_sort(sort)
+    ).batch_size(limit)
+
+    results = []
+    batch = []
+
+    async def flush():
+        pointers = await active_sets(db, {v["comboCode"] for v in batch})
+        for variant in batch:
+            combo = pointers.get(variant["comboCode"])
+            if combo and combo_state(combo) and is_active(variant, pointers):
+                results.append({**variant, "comboName": combo.get("name")})
+        batch.clear()
+
+    async for variant in cursor:
+        batch.append(variant)
+        if len(batch) == limit - len(results):
+            await flush()
+            if len(results) == limit:
+                break
+    if batch:
+        await flush()
+
+    return results[:limit]
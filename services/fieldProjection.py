@@ -0,0 +1,139 @@
+# services/fieldProjection.py
+# ?fields= en los listados: la lista de campos (o el nombre de una vista
+# fija) se convierte en una proyección de Mongo y en un modelo parcial, así
+# description/img no viajan ni se decodifican cuando no hacen falta. Las
+# vistas fijas se cachean aparte en catalogCache; las listas ad hoc van
+# directo a Mongo con la proyección.
+from functools import lru_cache
+from typing import Dict, Any, List, Optional, Tuple, Type
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pydantic import BaseModel, create_model
+from fastapi import HTTPException
+
+from services.catalogCache import cached_read, list_adapter, dump_models
+
+# Campos que toda vista parcial incluye
+ALWAYS = ("code",)
+
+
+# -------------------------
+# Helpers
+# -------------------------
+
+# Campos que no están declarados en el modelo pero se pueden pedir
+# (nombre -> tipo), p. ej. los price_Xp de los tamaños de pricingRules
+Extra = Tuple[Tuple[str, Any], ...]
+
+
+def field_names(model: Type[BaseModel], extra: Extra = ()) -> Dict[str, str]:
+    # nombre pedido (campo, alias o extra) -> nombre del campo
+    names = {}
+    for name, info in model.model_fields.items():
+        names[name] = name
+        if info.alias:
+            names[info.alias] = name
+    for name, _ in extra:
+        names.setdefault(name, name)
+    return names
+
+
+def resolve_fields(
+    model: Type[BaseModel],
+    fields: str,
+    views: Dict[str, Tuple[str, ...]],
+    extra: Extra = ()
+) -> Tuple[str, ...]:
+    # "summary" | "card" | "code,name,price_8p" -> campos del modelo (en
+    # su orden) y después los extra (la misma selección, el mismo modelo)
+    requested = views.get(fields)
+    if requested is None:
+        requested = [f.strip() for f in fields.split(",") if f.strip()]
+
+    names = field_names(model, extra)
+    unknown = [f for f in requested if f not in names]
+    if unknown:
+        raise HTTPException(
+            400,
+            f"Campos desconocidos: {', '.join(unknown)} "
+            f"(vistas: {', '.join(views)})"
+        )
+
+    chosen = {names[f] for f in (*ALWAYS, *requested)}
+    declared = tuple(name for name in model.model_fields if name in chosen)
+    return declared + tuple(
+        name for name, _ in extra
+        if name in chosen and name not in model.model_fields
+    )
+
+
+@lru_cache(maxsize=256)
+def partial_model(
+    model: Type[BaseModel],
+    fields: Tuple[str, ...],
+    extra: Extra = ()
+) -> Type[BaseModel]:
+    # Mismos tipos, alias y validaciones que el modelo completo; los extra
+    # son opcionales
+    extra_types = dict(extra)
+    definitions = {}
+    for name in fields:
+        if name in model.model_fields:
+            info = model.model_fields[name]
+            definitions[name] = (info.annotation, info)
+        else:
+            definitions[name] = (Optional[extra_types[name]], None)
+    return create_model(
+        f"{model.__name__}Partial",
+        __config__={"populate_by_name": True, "validate_by_name": True},
+        **definitions
+    )
+
+
+def projection(model: Type[BaseModel], fields: Tuple[str, ...]) -> Dict[str, int]:
+    query = {}
+    for name in fields:
+        info = model.model_fields.get(name)
+        query[(info.alias if info else None) or name] = 1
+    query.setdefault("_id", 0)
+    return query
+
+
+def build_partial(model: Type[BaseModel], docs: List[Dict[str, Any]]) -> List[Any]:
+    return list_adapter(model).validate_python(
+        [{**d, "_id": str(d["_id"])} if "_id" in d else d for d in docs]
+    )
+
+
+# -------------------------
+# API
+# -------------------------
+
+async def read_fields(
+    db: AsyncIOMotorDatabase,
+    collection: str,
+    model: Type[BaseModel],
+    fields: str,
+    views: Dict[str, Tuple[str, ...]],
+    empty_detail: str,
+    extra: Extra = (),
+    view_tag: str = ""
+) -> bytes:
+    # JSON del listado con solo los campos pedidos. view_tag separa en la
+    # caché las vistas fijas que dependen de algo más que la colección
+    # (p. ej. la versión de pricingRules que define los extra)
+    selected = resolve_fields(model, fields, views, extra)
+    partial = partial_model(model, selected, extra)
+
+    async def load():
+        docs = await db[collection].find(
+            {}, projection(model, selected)
+        ).to_list(length=None)
+
+        if not docs:
+            raise HTTPException(404, empty_detail)
+
+        return dump_models(build_partial(partial, docs))
+
+    if fields in views:
+        return await cached_read(db, collection, load, f"view:{fields}{view_tag}")
+    return await load()
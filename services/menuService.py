@@ -0,0 +1,136 @@
+# services/menuService.py
+# Snapshot materializado del menú completo: piezas, combos con sus
+# variantes embebidas y productos extra, en un único documento.
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from typing import Dict, Any, Iterable
+
+from services.catalogCache import cached_read, invalidate
+from services.comboVariantService import is_active
+
+COLLECTION = "menuSnapshot"
+SNAPSHOT_ID = "current"
+
+PIECES_COLLECTION = "pieces"
+COMBOS_COLLECTION = "combinedPieces"
+VARIANTS_COLLECTION = "comboVariants"
+BONUS_COLLECTION = "bonusProduct"
+
+
+# -------------------------
+# Helpers
+# -------------------------
+
+def serialize(doc: Dict[str, Any]) -> Dict[str, Any]:
+    return {**doc, "_id": str(doc["_id"])}
+
+
+async def load_sections(
+    db: AsyncIOMotorDatabase,
+    pieces: Any = None,
+    combos: Any = None,
+    bonus: Any = None
+) -> Dict[str, Dict[str, Any]]:
+    # Carga las entradas del snapshot indicadas (None = no tocar la sección,
+    # "all" = toda la colección, lista = solo esos códigos)
+    def query(codes):
+        return {} if codes == "all" else {"code": {"$in": list(codes)}}
+
+    sections: Dict[str, Dict[str, Any]] = {}
+
+    if pieces:
+        docs = await db[PIECES_COLLECTION].find(query(pieces)).to_list(length=None)
+        sections["pieces"] = {d["code"]: serialize(d) for d in docs}
+
+    if combos:
+        docs = await db[COMBOS_COLLECTION].find(query(combos)).to_list(length=None)
+        variant_query = {} if combos == "all" else {
+            "comboCode": {"$in": [d["code"] for d in docs]}
+        }
+        # Solo el set vigente de cada combo (ver comboVariantService)
+        pointers = {d["code"]: d for d in docs}
+        variants: Dict[str, list] = {}
+        async for v in db[VARIANTS_COLLECTION].find(variant_query):
+            if v["comboCode"] in pointers and is_active(v, pointers):
+                variants.setdefault(v["comboCode"], []).append(v)
+
+        sections["combinedPieces"] = {
+            d["code"]: {**serialize(d), "comboVariants": variants.get(d["code"], [])}
+            for d in docs
+        }
+
+    if bonus:
+        docs = await db[BONUS_COLLECTION].find(query(bonus)).to_list(length=None)
+        sections["bonusProducts"] = {d["code"]: serialize(d) for d in docs}
+
+    return sections
+
+
+# -------------------------
+# Escritura del snapshot
+# -------------------------
+
+async def rebuild_menu(db: AsyncIOMotorDatabase) -> Dict[str, Any]:
+    sections = await load_sections(db, pieces="all", combos="all", bonus="all")
+    snapshot = {
+        "pieces": sections.get("pieces", {}),
+        "combinedPieces": sections.get("combinedPieces", {}),
+        "bonusProducts": sections.get("bonusProducts", {}),
+    }
+
+    await db[COLLECTION].replace_one(
+        {"_id": SNAPSHOT_ID}, snapshot, upsert=True
+    )
+    await invalidate(db, COLLECTION)
+    return snapshot
+
+
+async def refresh_menu(
+    db: AsyncIOMotorDatabase,
+    pieces: Iterable[str] = (),
+    combos: Iterable[str] = (),
+    bonus: Iterable[str] = ()
+) -> None:
+    # Actualización incremental: reescribe solo las entradas de los códigos
+    # indicados con un único $set sobre el snapshot
+    sections = await load_sections(
+        db,
+        pieces=list(pieces) or None,
+        combos=list(combos) or None,
+        bonus=list(bonus) or None
+    )
+
+    changes = {
+        f"{section}.{code}": entry
+        for section, entries in sections.items()
+        for code, entry in entries.items()
+    }
+    if not changes:
+        return
+
+    result = await db[COLLECTION].update_one(
+        {"_id": SNAPSHOT_ID}, {"$set": changes}
+    )
+    if result.matched_count == 0:
+        # Todavía no hay snapshot: se arma completo en la próxima lectura
+        return
+
+    await invalidate(db, COLLECTION)
+
+
+# -------------------------
+# Lectura
+# -------------------------
+
+async def get_menu(db: AsyncIOMotorDatabase) -> Dict[str, Any]:
+    async def load():
+        snapshot = await db[COLLECTION].find_one({"_id": SNAPSHOT_ID})
+        if snapshot is None:
+            snapshot = await rebuild_menu(db)
+
+        return {
+            "pieces": list(snapshot.get("pieces", {}).values()),
+            "combinedPieces": list(snapshot.get("combinedPieces", {}).values()),
+            "bonusProducts": list(snapshot.get("bonusProducts", {}).values()),
+        }
+
+    return await cached_read(db, COLLECTION, load)
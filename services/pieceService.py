@@ -1,37 +1,68 @@
 # services/pieceService.py
 from motor.motor_asyncio import AsyncIOMotorDatabase
-from typing import Optional
-from random import choices
-import string
+from typing import Optional, List
 import math
 from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
 from fastapi import HTTPException
 
 from models.piece import Piece, PieceUpdate, PieceModel
-from services.combinedPiecesService import generate_combo_variants
-from services.comboVariantService import save_combo_variants, delete_variants_by_combo
+from services.variantQueue import mark_dirty
+from services.pricingRules import current_rules, sync_rules
+from services.catalogCache import (
+    cached_read,
+    invalidate,
+    build_models,
+    dump_models
+)
+from services.menuService import refresh_menu
+from services.codeAllocator import allocate_code
+from services.bulkImport import check_batch_size, import_batch
+from services.fieldProjection import read_fields
+from models.bulk import BulkResult
+
+COLLECTION = "pieces"
+
+# Vistas livianas para ?fields= (listados y selects); "card" suma todos los
+# price_Xp de las reglas vigentes (ver piece_views)
+VIEWS = {
+    "summary": ("code", "name", "category", "price_8p", "state"),
+    "card": ("code", "name", "img", "category", "protein", "price_4p",
+             "price_8p", "state"),
+}
 
 
 # -------------------------
 # Helpers
 # -------------------------
 
-def generate_code(length: int = 6) -> str:
-    return "".join(choices(string.ascii_uppercase + string.digits, k=length))
-
-
 def round_200(value: float) -> int:
     return int(math.ceil(value / 200) * 200)
 
 
-def generate_prices(cost: float) -> dict:
+def generate_prices(cost: float, markups: Optional[dict] = None) -> dict:
+    # markups: piezas por porción -> multiplicador (por defecto, las reglas
+    # vigentes de pricingRules)
     unit = cost / 8
+    if markups is None:
+        markups = current_rules().markups
+    return {
+        f"price_{size}p": round_200(unit * size * markup)
+        for size, markup in markups.items()
+    }
+
+
+def price_fields(markups: dict) -> tuple:
+    # price_Xp de los tamaños de las reglas (los del modelo y los agregados
+    # después en pricingRules)
+    return tuple((f"price_{size}p", int) for size in sorted(markups))
+
+
+def piece_views(markups: dict) -> dict:
+    prices = tuple(name for name, _ in price_fields(markups))
     return {
-        "price_3p": round_200(unit * 3 * 3.1),
-        "price_4p": round_200(unit * 4 * 3.1),
-        "price_5p": round_200(unit * 5 * 3.1),
-        "price_8p": round_200(unit * 8 * 3),
-        "price_16p": round_200(unit * 16 * 2.5),
+        **VIEWS,
+        "card": tuple(dict.fromkeys(VIEWS["card"] + prices)),
     }
 
 
@@ -40,32 +71,84 @@ def generate_prices(cost: float) -> dict:
 # -------------------------
 
 async def get_pieces(db: AsyncIOMotorDatabase):
-    pieces = await db["pieces"].find().to_list(length=None)
+    async def load():
+        pieces = await db["pieces"].find().to_list(length=None)
+
+        if not pieces:
+            raise HTTPException(404, "No hay piezas disponibles")
+
+        return build_models(PieceModel, pieces)
+
+    return await cached_read(db, COLLECTION, load)
+
 
-    if not pieces:
-        raise HTTPException(404, "No hay piezas disponibles")
+async def get_pieces_json(db: AsyncIOMotorDatabase) -> bytes:
+    async def load():
+        return dump_models(await get_pieces(db))
 
-    return [
-        PieceModel(**{**p, "_id": str(p["_id"])})
-        for p in pieces
-    ]
+    return await cached_read(db, COLLECTION, load, "json")
+
+
+async def get_pieces_fields(db: AsyncIOMotorDatabase, fields: str) -> bytes:
+    # Los campos permitidos dependen de las reglas vigentes: las vistas en
+    # caché llevan su versión para no servir una "card" con otros tamaños
+    rules = await sync_rules(db)
+    return await read_fields(
+        db,
+        COLLECTION,
+        PieceModel,
+        fields,
+        piece_views(rules.markups),
+        "No hay piezas disponibles",
+        extra=price_fields(rules.markups),
+        view_tag=f":rules{rules.version}"
+    )
 
 
 async def add_piece(piece: Piece, db: AsyncIOMotorDatabase) -> PieceModel:
+    await sync_rules(db)
     doc = piece.model_dump()
     doc.update(generate_prices(doc["costRoll"]))
     doc["state"] = True
 
-    for _ in range(5):
-        doc["code"] = generate_code()
-        try:
-            result = await db["pieces"].insert_one(doc)
-            doc["_id"] = str(result.inserted_id)
-            return PieceModel(**doc)
-        except Exception:
-            continue
+    doc["code"] = await allocate_code(db, COLLECTION)
+
+    try:
+        result = await db["pieces"].insert_one(doc)
+    except DuplicateKeyError:
+        # El código viene del contador: el único duplicado posible es name
+        raise HTTPException(400, "Ya existe una pieza con ese nombre")
+
+    await invalidate(db, COLLECTION)
+    await refresh_menu(db, pieces=[doc["code"]])
+    doc["_id"] = str(result.inserted_id)
+    return PieceModel(**doc)
+
 
-    raise HTTPException(500, "No se pudo generar un código único")
+async def bulk_add_pieces(
+    pieces: List[Piece],
+    db: AsyncIOMotorDatabase
+) -> BulkResult:
+    check_batch_size(pieces)
+    await sync_rules(db)
+
+    docs = []
+    for piece in pieces:
+        doc = piece.model_dump()
+        doc.update(generate_prices(doc["costRoll"]))
+        doc["state"] = True
+        docs.append(doc)
+
+    result, inserted = await import_batch(
+        db, COLLECTION, docs, "Ya existe una pieza con ese nombre"
+    )
+
+    # Piezas nuevas: ningún combo existente las referencia todavía
+    if inserted:
+        await invalidate(db, COLLECTION)
+        await refresh_menu(db, pieces=[d["code"] for d in inserted])
+
+    return result
 
 
 async def update_piece(
@@ -77,30 +160,32 @@ async def update_piece(
     update_data = piece_update.model_dump(exclude_unset=True)
 
     if "costRoll" in update_data:
+        await sync_rules(db)
         update_data.update(generate_prices(update_data["costRoll"]))
 
-    result = await db["pieces"].find_one_and_update(
-        {"code": code},
-        {"$set": update_data},
-        return_document=ReturnDocument.AFTER
-    )
+    try:
+        result = await db["pieces"].find_one_and_update(
+            {"code": code},
+            {"$set": update_data},
+            return_document=ReturnDocument.AFTER
+        )
+    except DuplicateKeyError:
+        raise HTTPException(400, "Ya existe otra pieza con ese nombre")
 
     if not result:
         return None
 
+    await invalidate(db, COLLECTION)
     result["_id"] = str(result["_id"])
 
+    # Los combos que usan la pieza se regeneran en segundo plano
+    # (services/variantWorker.py); el PUT responde sin esperar
     combos = await db["combinedPieces"].find(
-        {"typePieces": code}
+        {"typePieces": code},
+        {"code": 1}
     ).to_list(length=None)
+    await mark_dirty(db, [c["code"] for c in combos])
 
-    for combo in combos:
-        pieces_data = await db["pieces"].find(
-            {"code": {"$in": combo["typePieces"]}}
-        ).to_list(length=None)
-
-        variants = generate_combo_variants(pieces_data)
-        await delete_variants_by_combo(combo["code"], db)
-        await save_combo_variants(combo["code"], variants, db)
+    await refresh_menu(db, pieces=[code])
 
     return PieceModel(**result)
@@ -0,0 +1,147 @@
+# services/pricingEngine.py
+# Motor de precios por lotes: mismo resultado que generate_prices y
+# generate_combo_variants, pero calculado para todo el catálogo con NumPy.
+from typing import List, Dict, Any, Sequence
+import numpy as np
+
+from services.pricingRules import current_rules
+from services.combinedPiecesService import TOP_K, generate_variants_for_combos
+
+
+# -------------------------
+# Helpers
+# -------------------------
+
+def round_up(values: np.ndarray, step: int) -> np.ndarray:
+    return (np.ceil(values / step) * step).astype(np.int64)
+
+
+def discounts_for(totals: np.ndarray) -> np.ndarray:
+    # Búsqueda binaria sobre los umbrales ya compilados de pricingRules
+    rules = current_rules()
+    if not rules.thresholds:
+        return np.zeros(len(totals))
+    thresholds = np.array(rules.thresholds)
+    values = np.array(rules.discounts, dtype=np.float64)
+
+    idx = np.searchsorted(thresholds, totals, side="right") - 1
+    return np.where(idx >= 0, values[np.maximum(idx, 0)], 0.0)
+
+
+# -------------------------
+# Piezas
+# -------------------------
+
+def price_columns(costs: Sequence[float]) -> Dict[str, np.ndarray]:
+    # costRoll[] -> {"price_3p": int64[], ...}
+    unit = np.asarray(costs, dtype=np.float64) / 8
+
+    return {
+        f"price_{size}p": round_up(unit * size * markup, 200)
+        for size, markup in current_rules().markups.items()
+    }
+
+
+def generate_prices_batch(costs: Sequence[float]) -> List[Dict[str, int]]:
+    columns = price_columns(costs)
+    keys = list(columns)
+    rows = zip(*(columns[k].tolist() for k in keys))
+    return [dict(zip(keys, row)) for row in rows]
+
+
+# -------------------------
+# Combos
+# -------------------------
+
+def generate_variants_batch(
+    combos: List[Dict[str, Any]],
+    pieces_data: List[Dict[str, Any]]
+) -> Dict[str, List[Dict[str, Any]]]:
+    # Equivalente a generate_variants_for_combos con top_k=1: por esquema,
+    # las `take` piezas más baratas de cada combo (empates por orden en
+    # pieces_data). Con COMBO_TOP_K > 1 usa el motor escalar
+    if not combos:
+        return {}
+    if TOP_K != 1:
+        return generate_variants_for_combos(combos, pieces_data)
+
+    position = {p["code"]: i for i, p in enumerate(pieces_data)}
+
+    # Matriz combos x miembros con índices a pieces_data (-1 = relleno)
+    members = [
+        sorted(position[c] for c in set(combo["typePieces"]) if c in position)
+        for combo in combos
+    ]
+    width = max((len(m) for m in members), default=0)
+    index = np.full((len(combos), max(width, 1)), -1, dtype=np.int64)
+    for row, m in enumerate(members):
+        index[row, :len(m)] = m
+    padded = index < 0
+
+    schemas = current_rules().schemas
+    totals = np.array([s["perRoll"] * s["take"] for s in schemas], dtype=np.int64)
+    discounts = discounts_for(totals)
+
+    result: Dict[str, List[Dict[str, Any]]] = {c["code"]: [] for c in combos}
+
+    for schema, total, discount in zip(schemas, totals, discounts):
+        take = schema["take"]
+        per_roll = schema["perRoll"]
+        price_key = f"price_{per_roll}p"
+
+        prices = np.array(
+            [p.get(price_key) for p in pieces_data] + [None],
+            dtype=np.float64
+        )
+        gathered = prices[np.where(padded, len(pieces_data), index)]
+        available = ~np.isnan(gathered)
+
+        # Puesto de cada pieza por precio dentro de su combo (argsort estable:
+        # los empates quedan en el orden de pieces_data)
+        order = np.argsort(
+            np.where(available, gathered, np.inf), axis=1, kind="stable"
+        )
+        rank = np.empty_like(order)
+        np.put_along_axis(
+            rank, order, np.broadcast_to(np.arange(order.shape[1]), order.shape),
+            axis=1
+        )
+
+        selected = available & (rank < take)
+        eligible = available.sum(axis=1) >= take
+
+        raw = np.where(selected, gathered, 0.0).sum(axis=1)
+        base = round_up(raw, 100).tolist()
+        final = round_up(np.asarray(base) * (1 - discount), 100).tolist()
+
+        # Filas de piezas elegidas ya convertidas a listas de Python
+        chosen_rows = np.where(selected, index, -1).tolist()
+        entries = [
+            {
+                "pieceCode": p["code"],
+                "pieceName": p["name"],
+                "pieceCount": 1,
+                "price": p.get(price_key)
+            }
+            for p in pieces_data
+        ]
+        proteins = [p.get("protein") for p in pieces_data]
+        total = int(total)
+        discounted = bool(discount > 0)
+        discount_percent = int(discount * 100)
+
+        for row in np.flatnonzero(eligible).tolist():
+            chosen = [i for i in chosen_rows[row] if i >= 0]
+            result[combos[row]["code"]].append({
+                "take": take,
+                "perRoll": per_roll,
+                "pieces": [dict(entries[i]) for i in chosen],
+                "totalPieces": total,
+                "basePrice": base[row],
+                "finalPrice": final[row],
+                "discounted": discounted,
+                "discountPercent": discount_percent,
+                "proteins": sorted({proteins[i] for i in chosen if proteins[i]})
+            })
+
+    return result
@@ -0,0 +1,121 @@
+# services/pricingRules.py
+# Reglas de precios como datos: markups por tamaño, esquemas de combo y
+# descuentos. Cada versión es un documento de pricingRules (_id = versión);
+# la vigente es la de _id más alto. Al cargarla se compila a una tabla
+# para bisect y a la lista de esquemas ya armada.
+from bisect import bisect_right
+from typing import Dict, Any, List, NamedTuple, Optional
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from services.catalogCache import cached_read
+
+COLLECTION = "pricingRules"
+
+# Reglas con las que arranca la API si todavía no hay ninguna versión
+DEFAULT_RULES: Dict[str, Any] = {
+    # piezas por porción -> multiplicador sobre el costo
+    "markups": {3: 3.1, 4: 3.1, 5: 3.1, 8: 3, 16: 2.5},
+    "rollSizes": [4, 8],
+    "takes": [3, 4, 5],
+    # (take, perRoll) que no se arman
+    "excludedSchemas": [(3, 8)],
+    "discountRules": [
+        {"minPieces": 8,  "discount": 0.00},
+        {"minPieces": 16, "discount": 0.10},
+        {"minPieces": 24, "discount": 0.15},
+        {"minPieces": 30, "discount": 0.20},
+    ],
+}
+
+
+class CompiledRules(NamedTuple):
+    version: int
+    markups: Dict[int, float]
+    schemas: List[Dict[str, int]]
+    thresholds: List[int]
+    discounts: List[float]
+    # reglas sin compilar (markups con claves int), para la API y los diffs
+    source: Dict[str, Any]
+
+    def discount_for(self, total_pieces: int) -> float:
+        # Último umbral <= total (reemplaza el recorrido lineal de reglas)
+        index = bisect_right(self.thresholds, total_pieces) - 1
+        return self.discounts[index] if index >= 0 else 0.0
+
+
+# -------------------------
+# Compilación
+# -------------------------
+
+def compile_rules(doc: Dict[str, Any], version: int = 0) -> CompiledRules:
+    excluded = {tuple(s) for s in doc.get("excludedSchemas", [])}
+    rules = sorted(doc["discountRules"], key=lambda r: r["minPieces"])
+    # Mongo guarda las claves como string
+    markups = {int(size): float(m) for size, m in doc["markups"].items()}
+
+    return CompiledRules(
+        version=version,
+        markups=markups,
+        schemas=[
+            {"take": t, "perRoll": r}
+            for r in doc["rollSizes"]
+            for t in doc["takes"]
+            if (t, r) not in excluded
+        ],
+        thresholds=[r["minPieces"] for r in rules],
+        discounts=[r["discount"] for r in rules],
+        source={
+            "markups": markups,
+            "rollSizes": list(doc["rollSizes"]),
+            "takes": list(doc["takes"]),
+            "excludedSchemas": sorted(excluded),
+            "discountRules": [
+                {"minPieces": r["minPieces"], "discount": r["discount"]}
+                for r in rules
+            ],
+        },
+    )
+
+
+def to_document(rules: Dict[str, Any], version: int) -> Dict[str, Any]:
+    return {
+        "_id": version,
+        "markups": {str(size): m for size, m in rules["markups"].items()},
+        "rollSizes": list(rules["rollSizes"]),
+        "takes": list(rules["takes"]),
+        "excludedSchemas": [list(s) for s in rules.get("excludedSchemas", [])],
+        "discountRules": [dict(r) for r in rules["discountRules"]],
+    }
+
+
+_rules = compile_rules(DEFAULT_RULES)
+
+
+def current_rules() -> CompiledRules:
+    return _rules
+
+
+def use_rules(rules: CompiledRules) -> None:
+    global _rules
+    _rules = rules
+
+
+# -------------------------
+# Carga
+# -------------------------
+
+async def latest_rules_doc(db: AsyncIOMotorDatabase) -> Optional[Dict[str, Any]]:
+    return await db[COLLECTION].find_one({}, sort=[("_id", -1)])
+
+
+async def sync_rules(db: AsyncIOMotorDatabase) -> CompiledRules:
+    # Se llama antes de calcular precios: con la caché al día no consulta
+    # Mongo; una versión nueva (de cualquier worker) invalida pricingRules
+    async def load():
+        doc = await latest_rules_doc(db)
+        if doc is None:
+            return compile_rules(DEFAULT_RULES)
+        return compile_rules(doc, doc["_id"])
+
+    use_rules(await cached_read(db, COLLECTION, load))
+    return _rules
@@ -0,0 +1,172 @@
+# services/pricingRulesService.py
+# Edición de las reglas de precios. Una versión nueva recalcula solo lo que
+# cambió: los precios de las piezas en los tamaños con otro markup y las
+# variantes de los esquemas afectados (vía la cola del worker).
+from typing import Optional, List, Dict, Set, Tuple
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import UpdateOne
+from pymongo.errors import DuplicateKeyError
+from fastapi import HTTPException
+
+from models.pricingRules import (
+    PricingRules,
+    PricingRulesModel,
+    PricingRulesChange
+)
+from services.pricingRules import (
+    COLLECTION,
+    CompiledRules,
+    compile_rules,
+    to_document,
+    use_rules,
+    sync_rules
+)
+from services.pieceService import generate_prices
+from services.variantQueue import mark_dirty
+from services.catalogCache import invalidate
+from services.menuService import refresh_menu
+
+PIECES_COLLECTION = "pieces"
+COMBOS_COLLECTION = "combinedPieces"
+
+
+# -------------------------
+# Helpers
+# -------------------------
+
+def validate_rules(rules: PricingRules) -> None:
+    if any(m <= 0 for m in rules.markups.values()):
+        raise HTTPException(400, "Los markups tienen que ser positivos")
+    missing = [r for r in rules.rollSizes if r not in rules.markups]
+    if missing:
+        raise HTTPException(
+            400,
+            f"Faltan markups para los rolls de {', '.join(map(str, missing))} piezas"
+        )
+    if any(t < 1 for t in rules.takes):
+        raise HTTPException(400, "Cada combo lleva al menos un roll")
+    thresholds = [r.minPieces for r in rules.discountRules]
+    if len(set(thresholds)) != len(thresholds):
+        raise HTTPException(400, "Hay dos descuentos con el mismo mínimo de piezas")
+
+
+def changed_sizes(old: CompiledRules, new: CompiledRules) -> Set[int]:
+    sizes = set(old.markups) | set(new.markups)
+    return {s for s in sizes if old.markups.get(s) != new.markups.get(s)}
+
+
+def affected_schemas(
+    old: CompiledRules,
+    new: CompiledRules,
+    sizes: Set[int]
+) -> List[Dict[str, int]]:
+    # Esquemas que aparecen o desaparecen, más los que siguen pero cambian
+    # de precio (markup de su roll) o de descuento
+    old_keys = {(s["take"], s["perRoll"]) for s in old.schemas}
+    new_keys = {(s["take"], s["perRoll"]) for s in new.schemas}
+
+    affected: Set[Tuple[int, int]] = old_keys ^ new_keys
+    for take, per_roll in old_keys & new_keys:
+        total = take * per_roll
+        if per_roll in sizes or old.discount_for(total) != new.discount_for(total):
+            affected.add((take, per_roll))
+
+    return [
+        {"take": take, "perRoll": per_roll}
+        for take, per_roll in sorted(affected, key=lambda s: (s[1], s[0]))
+    ]
+
+
+async def reprice_sizes(
+    db: AsyncIOMotorDatabase,
+    new: CompiledRules,
+    sizes: Set[int]
+) -> int:
+    # Reescribe solo los price_Xp de los tamaños cambiados (y borra los que
+    # ya no tienen markup) en un único bulk_write
+    if not sizes:
+        return 0
+
+    markups = {s: new.markups[s] for s in sizes if s in new.markups}
+    removed = {f"price_{s}p": "" for s in sizes if s not in new.markups}
+
+    pieces = await db[PIECES_COLLECTION].find(
+        {}, {"code": 1, "costRoll": 1}
+    ).to_list(length=None)
+    if not pieces:
+        return 0
+
+    ops = []
+    for piece in pieces:
+        update = {}
+        if markups:
+            update["$set"] = generate_prices(piece["costRoll"], markups)
+        if removed:
+            update["$unset"] = removed
+        ops.append(UpdateOne({"code": piece["code"]}, update))
+
+    await db[PIECES_COLLECTION].bulk_write(ops, ordered=False)
+    await invalidate(db, PIECES_COLLECTION)
+    await refresh_menu(db, pieces=[p["code"] for p in pieces])
+    return len(ops)
+
+
+async def queue_combos(
+    db: AsyncIOMotorDatabase,
+    schemas: List[Dict[str, int]]
+) -> int:
+    # Un combo solo tiene variantes de esquemas con take <= sus piezas:
+    # typePieces.<take - 1> existe sii el combo tiene al menos take piezas
+    if not schemas:
+        return 0
+
+    min_take = min(s["take"] for s in schemas)
+    combos = await db[COMBOS_COLLECTION].find(
+        {f"typePieces.{min_take - 1}": {"$exists": True}}, {"code": 1}
+    ).to_list(length=None)
+    return await mark_dirty(db, [c["code"] for c in combos])
+
+
+# -------------------------
+# API
+# -------------------------
+
+async def get_rules(db: AsyncIOMotorDatabase) -> PricingRulesModel:
+    rules = await sync_rules(db)
+    return PricingRulesModel(version=rules.version, **rules.source)
+
+
+async def update_rules(
+    rules: PricingRules,
+    db: AsyncIOMotorDatabase,
+    base_version: Optional[int] = None
+) -> PricingRulesChange:
+    validate_rules(rules)
+
+    old = await sync_rules(db)
+    if base_version is not None and base_version != old.version:
+        raise HTTPException(
+            409,
+            f"Las reglas vigentes son la versión {old.version}, no {base_version}"
+        )
+
+    # _id = versión: dos ediciones simultáneas no pueden crear la misma
+    doc = to_document(rules.model_dump(), old.version + 1)
+    try:
+        await db[COLLECTION].insert_one(doc)
+    except DuplicateKeyError:
+        raise HTTPException(409, "Las reglas cambiaron mientras se editaban")
+
+    new = compile_rules(doc, doc["_id"])
+    use_rules(new)
+    await invalidate(db, COLLECTION)
+
+    sizes = changed_sizes(old, new)
+    schemas = affected_schemas(old, new, sizes)
+
+    return PricingRulesChange(
+        version=new.version,
+        piecesRepriced=await reprice_sizes(db, new, sizes),
+        affectedSchemas=schemas,
+        combosQueued=await queue_combos(db, schemas)
+    )
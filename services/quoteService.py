@@ -0,0 +1,176 @@
+# services/quoteService.py
+# Cotización de carritos contra tablas de precios en memoria. Cada tabla
+# se arma con una sola consulta y se cachea por versión de su colección,
+# así que se refresca sola cuando cambia el catálogo.
+import re
+from typing import Dict, Any
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from models.quote import QuoteRequest, QuoteResult, QuoteLine
+from services.catalogCache import cached_read
+from services.comboVariantService import is_active
+
+PIECES_COLLECTION = "pieces"
+COMBOS_COLLECTION = "combinedPieces"
+VARIANTS_COLLECTION = "comboVariants"
+BONUS_COLLECTION = "bonusProduct"
+
+# Vista de catalogCache para las tablas de precios
+VIEW = "prices"
+
+# price_8p -> 8 (los tamaños dependen de la versión de pricingRules)
+PRICE_FIELD = re.compile(r"^price_(\d+)p$")
+
+
+# -------------------------
+# Tablas de precios
+# -------------------------
+
+async def piece_prices(db: AsyncIOMotorDatabase) -> Dict[str, Dict[str, Any]]:
+    # code -> {"name", "state", "prices": {size: precio}}
+    async def load():
+        docs = await db[PIECES_COLLECTION].find(
+            {}, {"description": 0, "img": 0}
+        ).to_list(length=None)
+        table = {}
+        for d in docs:
+            prices = {}
+            for field, value in d.items():
+                match = PRICE_FIELD.match(field)
+                if match and value is not None:
+                    prices[int(match.group(1))] = value
+            table[d["code"]] = {
+                "name": d["name"],
+                "state": d.get("state", True),
+                "prices": dict(sorted(prices.items())),
+            }
+        return table
+
+    return await cached_read(db, PIECES_COLLECTION, load, VIEW)
+
+
+async def combo_states(db: AsyncIOMotorDatabase) -> Dict[str, Dict[str, Any]]:
+    # code -> {"name", "state"}
+    async def load():
+        docs = await db[COMBOS_COLLECTION].find(
+            {}, {"code": 1, "name": 1, "state": 1}
+        ).to_list(length=None)
+        return {
+            d["code"]: {"name": d["name"], "state": d.get("state", True)}
+            for d in docs
+        }
+
+    return await cached_read(db, COMBOS_COLLECTION, load, VIEW)
+
+
+async def variant_prices(db: AsyncIOMotorDatabase) -> Dict[str, Dict[str, Any]]:
+    # _id de variante vigente -> {"comboCode", "take", "perRoll", "finalPrice"}
+    # (cada cambio de puntero invalida comboVariants)
+    async def load():
+        pointers = {
+            c["code"]: c
+            for c in await db[COMBOS_COLLECTION].find(
+                {}, {"code": 1, "activeVariantSet": 1, "activeVariantIds": 1}
+            ).to_list(length=None)
+        }
+        docs = await db[VARIANTS_COLLECTION].find(
+            {},
+            {"comboCode": 1, "setVersion": 1, "take": 1, "perRoll": 1,
+             "finalPrice": 1}
+        ).to_list(length=None)
+        return {
+            str(d["_id"]): {
+                "comboCode": d["comboCode"],
+                "take": d["take"],
+                "perRoll": d["perRoll"],
+                "finalPrice": d["finalPrice"],
+            }
+            for d in docs
+            if is_active(d, pointers)
+        }
+
+    return await cached_read(db, VARIANTS_COLLECTION, load, VIEW)
+
+
+async def bonus_prices(db: AsyncIOMotorDatabase) -> Dict[str, Dict[str, Any]]:
+    # code -> {"name", "state", "price"}
+    async def load():
+        docs = await db[BONUS_COLLECTION].find(
+            {}, {"code": 1, "name": 1, "state": 1, "price": 1}
+        ).to_list(length=None)
+        return {
+            d["code"]: {
+                "name": d["name"],
+                "state": d.get("state", True),
+                "price": d["price"],
+            }
+            for d in docs
+        }
+
+    return await cached_read(db, BONUS_COLLECTION, load, VIEW)
+
+
+# -------------------------
+# Cotización
+# -------------------------
+
+def price_line(line: QuoteLine, tables: Dict[str, dict]) -> None:
+    # Completa name/unitPrice o error de una línea, sin tocar Mongo
+    if line.type == "piece":
+        piece = tables["pieces"].get(line.code)
+        if not piece or not piece["state"]:
+            line.error = "Pieza inexistente o no disponible"
+        elif line.size not in piece["prices"]:
+            line.error = (
+                "Tamaño inválido (usá "
+                f"{', '.join(str(s) for s in piece['prices'])})"
+            )
+        else:
+            line.name = piece["name"]
+            line.unitPrice = piece["prices"][line.size]
+
+    elif line.type == "combo":
+        variant = tables["variants"].get(line.code)
+        combo = variant and tables["combos"].get(variant["comboCode"])
+        if not combo or not combo["state"]:
+            line.error = "Variante inexistente o no disponible"
+        else:
+            line.name = f"{combo['name']} ({variant['take']}x{variant['perRoll']})"
+            line.unitPrice = variant["finalPrice"]
+
+    else:
+        bonus = tables["bonus"].get(line.code)
+        if not bonus or not bonus["state"]:
+            line.error = "Producto extra inexistente o no disponible"
+        else:
+            line.name = bonus["name"]
+            line.unitPrice = bonus["price"]
+
+    if line.unitPrice is not None:
+        line.total = line.unitPrice * line.quantity
+
+
+async def quote_cart(request: QuoteRequest, db: AsyncIOMotorDatabase) -> QuoteResult:
+    # Solo se cargan las tablas que el carrito usa (a lo sumo una consulta
+    # por tabla y solo si cambió el catálogo), nunca una por línea
+    types = {item.type for item in request.items}
+    tables: Dict[str, dict] = {}
+    if "piece" in types:
+        tables["pieces"] = await piece_prices(db)
+    if "combo" in types:
+        tables["variants"] = await variant_prices(db)
+        tables["combos"] = await combo_states(db)
+    if "bonus" in types:
+        tables["bonus"] = await bonus_prices(db)
+
+    lines = []
+    for index, item in enumerate(request.items):
+        line = QuoteLine(index=index, **item.model_dump())
+        price_line(line, tables)
+        lines.append(line)
+
+    return QuoteResult(
+        lines=lines,
+        total=sum(line.total for line in lines),
+        valid=all(line.error is None for line in lines)
+    )
@@ -0,0 +1,119 @@
+# services/repricingService.py
+# Cambio de costos de muchas piezas: un bulk_write para las piezas y una
+# sola regeneración por combo afectado.
+from typing import Optional, List, Dict
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import UpdateOne
+from fastapi import HTTPException
+
+from models.repricing import RepriceResult
+from services.pricingEngine import generate_prices_batch, generate_variants_batch
+from services.comboVariantService import replace_combo_variants
+from services.catalogCache import invalidate
+from services.menuService import refresh_menu
+from services.pricingRules import sync_rules
+
+COLLECTION = "pieces"
+COMBOS_COLLECTION = "combinedPieces"
+
+
+# -------------------------
+# Helpers
+# -------------------------
+
+def new_costs(
+    current: Dict[str, float],
+    percent: Optional[float],
+    costs: Optional[Dict[str, float]]
+) -> Dict[str, float]:
+    if costs is not None:
+        return {code: costs[code] for code in current}
+    factor = 1 + percent / 100
+    return {code: round(cost * factor, 2) for code, cost in current.items()}
+
+
+# -------------------------
+# API
+# -------------------------
+
+async def reprice_pieces(
+    db: AsyncIOMotorDatabase,
+    percent: Optional[float] = None,
+    costs: Optional[Dict[str, float]] = None,
+    codes: Optional[List[str]] = None,
+    dry_run: bool = False
+) -> RepriceResult:
+
+    if (percent is None) == (costs is None):
+        raise HTTPException(400, "Indicá un porcentaje o un mapa de costos")
+
+    if costs is not None:
+        codes = list(costs)
+
+    query = {"code": {"$in": codes}} if codes is not None else {}
+    docs = await db[COLLECTION].find(
+        query, {"code": 1, "costRoll": 1}
+    ).to_list(length=None)
+
+    current = {d["code"]: d["costRoll"] for d in docs}
+    missing = [c for c in (codes or []) if c not in current]
+
+    if not current:
+        raise HTTPException(404, "No se encontraron piezas para actualizar")
+
+    updated = new_costs(current, percent, costs)
+    await sync_rules(db)
+    prices = generate_prices_batch(list(updated.values()))
+
+    # 1. Todas las piezas en un solo bulk_write
+    ops = [
+        UpdateOne({"code": code}, {"$set": {"costRoll": cost, **row}})
+        for (code, cost), row in zip(updated.items(), prices)
+    ]
+    if not dry_run:
+        await db[COLLECTION].bulk_write(ops, ordered=False)
+        await invalidate(db, COLLECTION)
+
+    # 2. Cada combo afectado se regenera una sola vez, con las piezas ya
+    # actualizadas (una carga para todos)
+    combos = await db[COMBOS_COLLECTION].find(
+        {"typePieces": {"$in": list(updated)}},
+        {"code": 1, "typePieces": 1}
+    ).to_list(length=None)
+
+    variants = 0
+    writes = 0
+    if combos:
+        needed = {c for combo in combos for c in combo["typePieces"]}
+        pieces_data = await db[COLLECTION].find(
+            {"code": {"$in": list(needed)}}
+        ).to_list(length=None)
+
+        if dry_run:
+            # Sin escribir: aplica los precios nuevos solo en memoria
+            new_rows = dict(zip(updated, prices))
+            for piece in pieces_data:
+                piece.update(new_rows.get(piece["code"], {}))
+
+        variants_by_combo = generate_variants_batch(combos, pieces_data)
+        variants = sum(len(v) for v in variants_by_combo.values())
+
+        if not dry_run:
+            stats = await replace_combo_variants(variants_by_combo, db)
+            writes = stats["written"]
+
+    if not dry_run:
+        await refresh_menu(
+            db,
+            pieces=list(updated),
+            combos=[c["code"] for c in combos]
+        )
+
+    return RepriceResult(
+        pieces=len(updated),
+        missing=missing,
+        combos=len(combos),
+        variants=variants,
+        variantWrites=writes,
+        dryRun=dry_run
+    )
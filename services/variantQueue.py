@@ -0,0 +1,60 @@
+# services/variantQueue.py
+# Cola persistente de combos con variantes pendientes de regenerar.
+# Los servicios solo marcan combos "sucios"; services/variantWorker.py
+# los agrupa y los regenera en segundo plano.
+import asyncio
+from datetime import datetime, timezone
+from typing import Iterable, Dict, Any
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import UpdateOne
+
+COLLECTION = "variantRebuildQueue"
+
+# Despierta al worker de este proceso apenas hay trabajo nuevo
+wakeup = asyncio.Event()
+
+
+def utcnow() -> datetime:
+    # Naive en UTC, igual que los datetimes que devuelve pymongo
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+async def mark_dirty(db: AsyncIOMotorDatabase, combo_codes: Iterable[str]) -> int:
+    # Un documento por combo (_id = code): marcarlo de nuevo solo corre
+    # dirtyAt, así varias ediciones seguidas terminan en un único rebuild
+    codes = list(dict.fromkeys(combo_codes))
+    if not codes:
+        return 0
+
+    now = utcnow()
+    await db[COLLECTION].bulk_write([
+        UpdateOne(
+            {"_id": code},
+            {"$set": {"dirtyAt": now}, "$setOnInsert": {"firstDirtyAt": now}},
+            upsert=True
+        )
+        for code in codes
+    ], ordered=False)
+
+    wakeup.set()
+    return len(codes)
+
+
+async def queue_status(db: AsyncIOMotorDatabase) -> Dict[str, Any]:
+    now = utcnow()
+    pending = await db[COLLECTION].count_documents({})
+    in_progress = await db[COLLECTION].count_documents(
+        {"claimedUntil": {"$gt": now}}
+    )
+    oldest = await db[COLLECTION].find_one(
+        {}, {"firstDirtyAt": 1}, sort=[("firstDirtyAt", 1)]
+    )
+
+    return {
+        "pending": pending,
+        "inProgress": in_progress,
+        "oldestDirtyAt": oldest["firstDirtyAt"].isoformat() + "Z" if oldest else None,
+        "oldestAgeSeconds": (
+            round((now - oldest["firstDirtyAt"]).total_seconds(), 3) if oldest else 0.0
+        ),
+    }
@@ -0,0 +1,150 @@
+# services/variantWorker.py
+# Worker asyncio que regenera en lotes las variantes de los combos marcados
+# en variantRebuildQueue. Arranca en el lifespan de main.py.
+import asyncio
+import os
+from datetime import timedelta
+from typing import Optional
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import DeleteOne
+
+from services.variantQueue import COLLECTION, wakeup, utcnow
+from services.pricingEngine import generate_variants_batch
+from services.comboVariantService import replace_combo_variants
+from services.menuService import refresh_menu
+from services.pricingRules import sync_rules
+
+COMBOS_COLLECTION = "combinedPieces"
+PIECES_COLLECTION = "pieces"
+
+ENABLED = os.getenv("VARIANT_WORKER", "1") != "0"
+
+# Espera desde la última marca antes de regenerar un combo
+DEBOUNCE = float(os.getenv("VARIANT_DEBOUNCE_SECONDS", "2"))
+# Tope para combos que se siguen marcando sin pausa
+MAX_DELAY = float(os.getenv("VARIANT_MAX_DELAY_SECONDS", "30"))
+BATCH_SIZE = int(os.getenv("VARIANT_BATCH_SIZE", "50"))
+# Revisa la cola aunque nadie lo despierte (trabajo de otros procesos o
+# pendiente de antes de un reinicio)
+POLL_INTERVAL = float(os.getenv("VARIANT_WORKER_POLL_SECONDS", "5"))
+# Tiempo que un proceso se reserva un lote; si muere, otro lo retoma
+LEASE = timedelta(seconds=float(os.getenv("VARIANT_LEASE_SECONDS", "60")))
+
+_task: Optional[asyncio.Task] = None
+
+
+# -------------------------
+# Procesamiento
+# -------------------------
+
+async def claim_batch(db: AsyncIOMotorDatabase) -> tuple[str, list]:
+    # Reserva hasta BATCH_SIZE combos listos y libres (lease por token)
+    now = utcnow()
+    free = {"$or": [
+        {"claimedUntil": {"$exists": False}},
+        {"claimedUntil": {"$lt": now}},
+    ]}
+    ready = {"$or": [
+        {"dirtyAt": {"$lte": now - timedelta(seconds=DEBOUNCE)}},
+        {"firstDirtyAt": {"$lte": now - timedelta(seconds=MAX_DELAY)}},
+    ]}
+
+    candidates = await db[COLLECTION].find(
+        {"$and": [ready, free]}, {"_id": 1}
+    ).limit(BATCH_SIZE).to_list(length=BATCH_SIZE)
+    if not candidates:
+        return "", []
+
+    token = str(ObjectId())
+    await db[COLLECTION].update_many(
+        {"$and": [{"_id": {"$in": [c["_id"] for c in candidates]}}, free]},
+        {"$set": {"claimToken": token, "claimedUntil": now + LEASE}}
+    )
+    entries = await db[COLLECTION].find(
+        {"claimToken": token}
+    ).to_list(length=None)
+    return token, entries
+
+
+async def process_ready(db: AsyncIOMotorDatabase) -> int:
+    token, entries = await claim_batch(db)
+    if not entries:
+        return 0
+
+    codes = [e["_id"] for e in entries]
+    combos = await db[COMBOS_COLLECTION].find(
+        {"code": {"$in": codes}}, {"code": 1, "typePieces": 1}
+    ).to_list(length=None)
+
+    if combos:
+        # Una sola carga de piezas para todo el lote
+        needed = {c for combo in combos for c in combo["typePieces"]}
+        pieces_data = await db[PIECES_COLLECTION].find(
+            {"code": {"$in": list(needed)}}
+        ).to_list(length=None)
+
+        # Las reglas pueden haber cambiado en otro worker
+        await sync_rules(db)
+        await replace_combo_variants(
+            generate_variants_batch(combos, pieces_data), db
+        )
+        await refresh_menu(db, combos=[c["code"] for c in combos])
+
+    # Sale de la cola solo lo que no se volvió a marcar durante el rebuild
+    await db[COLLECTION].bulk_write([
+        DeleteOne({"_id": e["_id"], "claimToken": token, "dirtyAt": e["dirtyAt"]})
+        for e in entries
+    ], ordered=False)
+    await db[COLLECTION].update_many(
+        {"claimToken": token},
+        {"$unset": {"claimToken": "", "claimedUntil": ""}}
+    )
+    return len(codes)
+
+
+async def run_worker(db: AsyncIOMotorDatabase) -> None:
+    while True:
+        try:
+            processed = await process_ready(db)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # El lease vence y el lote se reintenta
+            print(f"⚠️ Error regenerando variantes: {e}")
+            processed = 0
+
+        if processed:
+            continue
+
+        wakeup.clear()
+        try:
+            await asyncio.wait_for(wakeup.wait(), POLL_INTERVAL)
+        except asyncio.TimeoutError:
+            continue
+
+        # Llegaron marcas nuevas: deja pasar la ventana para agruparlas
+        await asyncio.sleep(DEBOUNCE)
+
+
+# -------------------------
+# Ciclo de vida
+# -------------------------
+
+def start_worker(db: AsyncIOMotorDatabase) -> None:
+    global _task
+    if ENABLED and _task is None:
+        _task = asyncio.create_task(run_worker(db))
+        print("🛠️ Worker de variantes iniciado")
+
+
+async def stop_worker() -> None:
+    global _task
+    if _task is None:
+        return
+    _task.cancel()
+    try:
+        await _task
+    except asyncio.CancelledError:
+        pass
+    _task = None
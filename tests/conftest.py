@@ -0,0 +1,76 @@
+# tests/conftest.py
+# Base de Mongo en memoria (mongomock-motor) y estado global limpio por test.
+#
+#   pip install -r requirements.txt -r tests/requirements.txt
+#   python -m pytest -q
+import os
+import sys
+from contextlib import asynccontextmanager
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mongomock_motor import AsyncMongoMockClient
+
+import dataBase.DBConfing as DBConfing
+from services import catalogCache, comboVariantService
+from services.pricingRules import DEFAULT_RULES, compile_rules, use_rules
+
+
+def patch_mongomock_bulk() -> None:
+    # mongomock no conoce el argumento sort que pymongo >= 4.11 pasa al
+    # armar un UpdateOne dentro de bulk_write
+    from mongomock.collection import BulkOperationBuilder
+
+    original = BulkOperationBuilder.add_update
+    if getattr(original, "ignores_sort", False):
+        return
+
+    def add_update(self, *args, sort=None, **kwargs):
+        return original(self, *args, **kwargs)
+
+    add_update.ignores_sort = True
+    BulkOperationBuilder.add_update = add_update
+
+
+patch_mongomock_bulk()
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+def db(monkeypatch):
+    client = AsyncMongoMockClient()
+    database = client["SETSUNAI_TEST"]
+
+    monkeypatch.setattr(DBConfing, "client", client)
+    monkeypatch.setattr(DBConfing, "db", database)
+    # El GC de sets viejos corre al toque; los tests lo esperan con drain_gc
+    monkeypatch.setattr(comboVariantService, "GC_DELAY", 0)
+
+    catalogCache.clear()
+    use_rules(compile_rules(DEFAULT_RULES))
+    yield database
+    catalogCache.clear()
+    use_rules(compile_rules(DEFAULT_RULES))
+
+
+@asynccontextmanager
+async def no_lifespan(app):
+    # Sin worker ni reconciliación de índices: cada test arma sus datos
+    yield
+
+
+@pytest.fixture
+async def api(db, monkeypatch):
+    import httpx
+    from main import app
+
+    monkeypatch.setattr(app.router, "lifespan_context", no_lifespan)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        yield client
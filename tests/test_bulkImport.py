@@ -0,0 +1,65 @@
+# tests/test_bulkImport.py
+# Carga masiva: resultado por ítem, con los repetidos (contra la base o
+# dentro del mismo lote) decididos por el índice unique de name
+import pytest
+
+from dataBase.indexes import reconcile_indexes
+from services import bulkImport
+
+pytestmark = pytest.mark.anyio
+
+
+def piece(name: str) -> dict:
+    return {
+        "name": name, "description": "d", "img": "i",
+        "costRoll": 8000, "category": "rolls", "protein": "salmón",
+    }
+
+
+@pytest.fixture
+async def indexed(db):
+    await reconcile_indexes(db)
+    return db
+
+
+async def test_duplicates_fail_per_item(api, indexed):
+    r = await api.post("/authPiece/addPiece", json=piece("Roll A"))
+    assert r.status_code == 201
+
+    names = ["Roll B", "Roll A", "Roll C", "Roll B"]
+    r = await api.post("/authPiece/bulkAddPiece", json=[piece(n) for n in names])
+    assert r.status_code == 200
+    result = r.json()["data"]
+
+    assert (result["created"], result["failed"]) == (2, 2)
+    assert [i["index"] for i in result["items"]] == [0, 1, 2, 3]
+    assert [i["status"] for i in result["items"]] == [
+        "created", "duplicate", "created", "duplicate"
+    ]
+    created = [i["code"] for i in result["items"] if i["status"] == "created"]
+    assert len(set(created)) == 2
+
+    listed = (await api.get("/authPiece/pieces")).json()
+    assert sorted(p["name"] for p in listed) == ["Roll A", "Roll B", "Roll C"]
+    assert {p["code"] for p in listed} >= set(created)
+
+
+async def test_only_duplicates_creates_nothing(api, indexed):
+    await api.post("/authPiece/addPiece", json=piece("Roll A"))
+    before = (await api.get("/authPiece/pieces")).headers["etag"]
+
+    r = await api.post("/authPiece/bulkAddPiece", json=[piece("Roll A")])
+    result = r.json()["data"]
+    assert (result["created"], result["failed"]) == (0, 1)
+
+    # Nada entró: la caché del listado sigue valiendo
+    assert (await api.get("/authPiece/pieces")).headers["etag"] == before
+
+
+async def test_batch_size_limits(api, monkeypatch):
+    r = await api.post("/authPiece/bulkAddPiece", json=[])
+    assert r.status_code == 400
+
+    monkeypatch.setattr(bulkImport, "MAX_BATCH_SIZE", 2)
+    r = await api.post("/authPiece/bulkAddPiece", json=[piece(f"p{i}") for i in range(3)])
+    assert r.status_code == 400
@@ -0,0 +1,67 @@
+# tests/test_catalogCache.py
+# Coherencia de la caché entre workers: catalogVersions se relee como mucho
+# una vez por CACHE_SYNC_INTERVAL, no en cada request
+import mongomock.collection
+import pytest
+
+from services import catalogCache
+from services.catalogCache import VERSIONS_COLLECTION, VERSIONS_ID
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def version_reads(monkeypatch):
+    reads = []
+    find_one = mongomock.collection.Collection.find_one
+
+    def counting_find_one(self, *args, **kwargs):
+        if self.name == VERSIONS_COLLECTION:
+            reads.append(args)
+        return find_one(self, *args, **kwargs)
+
+    monkeypatch.setattr(mongomock.collection.Collection, "find_one", counting_find_one)
+    return reads
+
+
+async def seed(api) -> None:
+    r = await api.post("/authBonusProduct/addBonusProduct", json={
+        "name": "Gaseosa", "description": "d", "img": "i",
+        "type": "bebida", "price": 2500,
+    })
+    assert r.status_code == 201
+
+
+async def test_warm_reads_and_304_stay_in_memory(api, monkeypatch, version_reads):
+    monkeypatch.setattr(catalogCache, "CACHE_COHERENCE", "shared")
+    monkeypatch.setattr(catalogCache, "CACHE_SYNC_INTERVAL", 60)
+    await seed(api)
+
+    first = await api.get("/authBonusProduct/bonusProduct")
+    assert first.status_code == 200
+    version_reads.clear()
+
+    warm = await api.get("/authBonusProduct/bonusProduct")
+    cached = await api.get(
+        "/authBonusProduct/bonusProduct",
+        headers={"If-None-Match": first.headers["etag"]}
+    )
+    assert warm.status_code == 200 and cached.status_code == 304
+    assert version_reads == []
+
+
+async def test_other_workers_writes_seen_after_the_interval(api, db, monkeypatch):
+    monkeypatch.setattr(catalogCache, "CACHE_SYNC_INTERVAL", 60)
+    await seed(api)
+    before = await api.get("/authBonusProduct/bonusProduct")
+
+    # Escritura de otro worker: solo sube la versión en Mongo
+    await db[VERSIONS_COLLECTION].update_one(
+        {"_id": VERSIONS_ID}, {"$inc": {"bonusProduct": 1}}
+    )
+    same = await api.get("/authBonusProduct/bonusProduct")
+    assert same.headers["etag"] == before.headers["etag"]
+
+    monkeypatch.setattr(catalogCache, "CACHE_SYNC_INTERVAL", 0)
+    after = await api.get("/authBonusProduct/bonusProduct")
+    assert after.headers["etag"] != before.headers["etag"]
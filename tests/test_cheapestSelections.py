@@ -0,0 +1,96 @@
+# tests/test_cheapestSelections.py
+# Branch-and-bound de cheapest_selections contra la enumeración completa, y
+# el motor por lotes contra el escalar
+import random
+from itertools import combinations
+
+import pytest
+
+from services.combinedPiecesService import (
+    cheapest_selections,
+    generate_combo_variants,
+    generate_variants_for_combos,
+)
+from services.pricingEngine import generate_variants_batch
+from services.pieceService import generate_prices
+
+
+def brute_force_totals(prices, take, k):
+    totals = sorted(
+        sum(prices[i] for i in c) for c in combinations(range(len(prices)), take)
+    )
+    return totals[:k]
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_matches_brute_force(seed):
+    rng = random.Random(seed)
+    n = rng.randint(1, 9)
+    # Pocos precios distintos: fuerza empates
+    prices = [rng.choice([1000, 1200, 1400, 1600, 2000]) for _ in range(n)]
+    take = rng.randint(1, 5)
+    k = rng.randint(1, 6)
+
+    selections = cheapest_selections(prices, take, k)
+    expected = brute_force_totals(prices, take, k)
+
+    assert [sum(prices[i] for i in s) for s in selections] == expected
+    assert len(set(selections)) == len(selections)
+    assert all(s == tuple(sorted(s)) and len(s) == take for s in selections)
+
+
+def test_single_selection_breaks_ties_by_position():
+    prices = [500, 300, 300, 200, 300]
+    # Los más baratos y, entre iguales, los primeros de la lista
+    assert cheapest_selections(prices, 3) == [(1, 2, 3)]
+
+
+def test_edge_cases():
+    assert cheapest_selections([100, 200], 3) == []
+    assert cheapest_selections([100, 200], 0) == []
+    assert cheapest_selections([100, 200], 1, k=0) == []
+    # k mayor que las combinaciones posibles: devuelve todas
+    assert len(cheapest_selections([100, 200, 300], 2, k=10)) == 3
+
+
+def test_top_k_variants_are_distinct_and_ordered_by_price():
+    pieces = [
+        {"code": f"P{i}", "name": f"p{i}", "protein": "salmón", **generate_prices(cost)}
+        for i, cost in enumerate([8000, 9000, 8600, 12000, 7000])
+    ]
+    variants = generate_combo_variants(pieces, top_k=3)
+
+    by_schema = {}
+    for v in variants:
+        by_schema.setdefault((v["take"], v["perRoll"]), []).append(v)
+
+    for group in by_schema.values():
+        selections = [tuple(p["pieceCode"] for p in v["pieces"]) for v in group]
+        assert len(set(selections)) == len(selections)
+        prices = [v["basePrice"] for v in group]
+        assert prices == sorted(prices)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_batch_engine_matches_scalar_engine(seed):
+    rng = random.Random(seed)
+    pieces = []
+    for i in range(12):
+        piece = {
+            "code": f"P{i:02d}",
+            "name": f"p{i}",
+            "protein": rng.choice(["atún", "salmón", None]),
+            **generate_prices(rng.choice([7200, 8000, 8800, 9600])),
+        }
+        # Piezas sin algún tamaño
+        if rng.random() < 0.2:
+            piece.pop("price_8p")
+        pieces.append(piece)
+
+    codes = [p["code"] for p in pieces]
+    combos = [
+        {"code": f"C{c}", "typePieces": rng.sample(codes, rng.randint(2, 8))}
+        for c in range(6)
+    ]
+
+    assert generate_variants_batch(combos, pieces) == generate_variants_for_combos(combos, pieces)
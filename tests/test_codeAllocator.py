@@ -0,0 +1,61 @@
+# tests/test_codeAllocator.py
+# Códigos por bloques de un contador atómico: únicos bajo concurrencia y
+# entre procesos
+import asyncio
+
+import pytest
+
+from services import codeAllocator
+from services.codeAllocator import (
+    COLLECTION,
+    allocate_code,
+    allocate_codes,
+    to_base36,
+)
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture(autouse=True)
+def fresh_blocks(monkeypatch):
+    # Bloques y locks son por proceso: cada test arranca sin reservas
+    monkeypatch.setattr(codeAllocator, "_blocks", {})
+    monkeypatch.setattr(codeAllocator, "_locks", {})
+    monkeypatch.setattr(codeAllocator, "BLOCK_SIZE", 10)
+
+
+def test_base36_width():
+    assert to_base36(0) == "000000"
+    assert to_base36(35) == "00000Z"
+    assert to_base36(36) == "000010"
+
+
+async def test_concurrent_calls_get_unique_codes(db):
+    codes = await asyncio.gather(*(allocate_code(db, "pieces") for _ in range(95)))
+    assert len(set(codes)) == 95
+    assert all(c.startswith("P") and len(c) == 7 for c in codes)
+
+    # Un viaje a Mongo por bloque de 10
+    counter = await db[COLLECTION].find_one({"_id": "pieces"})
+    assert counter["next"] == 100
+
+
+async def test_batches_larger_than_a_block(db):
+    first = await allocate_codes(db, "bonusProduct", 3)
+    big = await allocate_codes(db, "bonusProduct", 25)
+    rest = await allocate_codes(db, "bonusProduct", 4)
+
+    codes = first + big + rest
+    assert len(set(codes)) == 32
+    assert all(c.startswith("B") for c in codes)
+
+
+async def test_processes_never_share_a_range(db, monkeypatch):
+    # Otro proceso = otro estado en memoria sobre el mismo contador
+    mine = await allocate_codes(db, "combinedPieces", 15)
+
+    monkeypatch.setattr(codeAllocator, "_blocks", {})
+    monkeypatch.setattr(codeAllocator, "_locks", {})
+    theirs = await allocate_codes(db, "combinedPieces", 15)
+
+    assert not set(mine) & set(theirs)
@@ -0,0 +1,159 @@
+# tests/test_comboVariants.py
+# Sets de variantes versionados: el puntero del combo decide qué set se lee,
+# `active` lo refleja en las variantes y el GC borra lo que quedó afuera
+import pytest
+
+from services import comboVariantService
+from services.comboVariantService import (
+    COLLECTION,
+    COMBOS_COLLECTION,
+    replace_combo_variants,
+    save_combo_variants,
+    get_variants_by_combo,
+    get_all_variants,
+    get_variants_page,
+    collect_stale_sets,
+    backfill_variant_flags,
+    drain_gc,
+)
+
+pytestmark = pytest.mark.anyio
+
+
+def variant(take: int, per_roll: int, final_price: int) -> dict:
+    return {
+        "take": take,
+        "perRoll": per_roll,
+        "pieces": [],
+        "totalPieces": take * per_roll,
+        "basePrice": final_price,
+        "finalPrice": final_price,
+        "discounted": False,
+        "discountPercent": 0,
+        "proteins": [],
+    }
+
+
+async def add_combo(db, code: str, state: bool = True) -> None:
+    await db[COMBOS_COLLECTION].insert_one(
+        {"code": code, "name": f"Combo {code}", "state": state, "typePieces": []}
+    )
+
+
+async def pointer(db, code: str) -> dict:
+    return await db[COMBOS_COLLECTION].find_one({"code": code})
+
+
+async def test_publish_flips_pointer_and_flags(db):
+    await add_combo(db, "C1")
+    stats = await save_combo_variants("C1", [variant(3, 4, 100), variant(4, 4, 130)], db)
+    assert stats == {"written": 2, "unchanged": 0, "combos": 1}
+
+    combo = await pointer(db, "C1")
+    variants = await get_variants_by_combo("C1", db)
+    assert [v["_id"] for v in variants] == combo["activeVariantIds"]
+    assert all(v["active"] and v["comboState"] for v in variants)
+
+    # Mismo contenido: no escribe ni mueve el puntero
+    stats = await save_combo_variants("C1", [variant(3, 4, 100), variant(4, 4, 130)], db)
+    assert stats == {"written": 0, "unchanged": 2, "combos": 0}
+    assert (await pointer(db, "C1"))["activeVariantSet"] == combo["activeVariantSet"]
+    await drain_gc()
+
+
+async def test_republish_keeps_shared_variants_and_collects_the_rest(db):
+    await add_combo(db, "C1")
+    await save_combo_variants("C1", [variant(3, 4, 100), variant(4, 4, 130)], db)
+    await drain_gc()
+    old_ids = (await pointer(db, "C1"))["activeVariantIds"]
+
+    stats = await save_combo_variants("C1", [variant(3, 4, 100), variant(4, 4, 150)], db)
+    assert stats == {"written": 1, "unchanged": 1, "combos": 1}
+
+    new_ids = (await pointer(db, "C1"))["activeVariantIds"]
+    assert new_ids[0] == old_ids[0]
+    assert {v["_id"] for v in await get_all_variants(db)} == set(new_ids)
+
+    # Antes del GC la vieja sigue en la colección, pero inactiva
+    replaced = await db[COLLECTION].find_one({"_id": old_ids[1]})
+    assert replaced is None or replaced["active"] is False
+
+    await drain_gc()
+    assert await db[COLLECTION].count_documents({}) == 2
+
+
+async def test_losing_publish_never_becomes_visible(db, monkeypatch):
+    await add_combo(db, "C1")
+    await save_combo_variants("C1", [variant(3, 4, 100)], db)
+    await drain_gc()
+    current = await pointer(db, "C1")
+
+    # Un publish que arrancó antes (versión más vieja) termina después
+    monkeypatch.setattr(comboVariantService, "new_set_version", lambda: "0" * 24)
+    stats = await save_combo_variants("C1", [variant(3, 4, 999)], db)
+    assert stats["combos"] == 0
+
+    after = await pointer(db, "C1")
+    assert after["activeVariantSet"] == current["activeVariantSet"]
+    assert after["activeVariantIds"] == current["activeVariantIds"]
+    assert [v["finalPrice"] for v in await get_all_variants(db)] == [100]
+    assert [v["finalPrice"] for v in await get_variants_by_combo("C1", db)] == [100]
+
+    loser = await db[COLLECTION].find_one({"finalPrice": 999})
+    assert loser["active"] is False
+
+    await drain_gc()
+    assert await db[COLLECTION].count_documents({"finalPrice": 999}) == 0
+
+
+async def test_gc_spares_sets_newer_than_the_pointer(db):
+    await add_combo(db, "C1")
+    await save_combo_variants("C1", [variant(3, 4, 100)], db)
+    await drain_gc()
+    version = (await pointer(db, "C1"))["activeVariantSet"]
+
+    # Variante de un publish más nuevo que todavía no movió el puntero
+    await db[COLLECTION].insert_one({
+        **variant(3, 4, 120), "_id": "C1-3-4-pending", "comboCode": "C1",
+        "setVersion": "f" * 24, "active": True, "comboState": True,
+    })
+    assert version < "f" * 24
+
+    assert await collect_stale_sets(db, ["C1"]) == 0
+    assert await db[COLLECTION].find_one({"_id": "C1-3-4-pending"})
+
+
+async def test_page_and_listing_skip_inactive_and_paginate(db):
+    for code in ("C1", "C2", "C3"):
+        await add_combo(db, code)
+    await replace_combo_variants({
+        code: [variant(3, 4, 100 + i), variant(4, 4, 200 + i)]
+        for i, code in enumerate(("C1", "C2", "C3"))
+    }, db)
+    await drain_gc()
+
+    first = await get_variants_page(db, limit=4)
+    rest = await get_variants_page(db, after=first[-1]["_id"], limit=4)
+    ids = [v["_id"] for v in first + rest]
+    assert len(first) == 4 and len(rest) == 2
+    assert ids == sorted(ids)
+    assert ids == [v["_id"] for v in await get_all_variants(db)]
+
+
+async def test_backfill_flags_legacy_variants(db):
+    # Variantes escritas antes de los sets y del flag `active`
+    await add_combo(db, "C1")
+    await add_combo(db, "C2", state=False)
+    await db[COLLECTION].insert_many([
+        {**variant(3, 4, 100), "_id": "a", "comboCode": "C1"},
+        {**variant(3, 4, 110), "_id": "b", "comboCode": "C2"},
+    ])
+    assert await get_all_variants(db) == []
+
+    assert await backfill_variant_flags(db) > 0
+    flags = {v["_id"]: (v["active"], v["comboState"]) async for v in db[COLLECTION].find()}
+    assert flags == {"a": (True, True), "b": (True, False)}
+    assert {v["_id"] for v in await get_all_variants(db)} == {"a", "b"}
+
+    # Con todo al día no vuelve a escribir
+    assert await backfill_variant_flags(db) == 0
@@ -0,0 +1,66 @@
+# tests/test_dbPool.py
+# Opciones del pool desde el entorno, warm-up y /health/ready
+import pytest
+
+import dataBase.DBConfing as DBConfing
+
+pytestmark = pytest.mark.anyio
+
+
+def test_client_options_follow_settings(monkeypatch):
+    monkeypatch.setattr(DBConfing, "MAX_POOL_SIZE", 20)
+    monkeypatch.setattr(DBConfing, "MIN_POOL_SIZE", 5)
+    monkeypatch.setattr(DBConfing, "COMPRESSORS", "")
+
+    options = DBConfing.client_options()
+    assert options["maxPoolSize"] == 20
+    assert options["minPoolSize"] == 5
+    assert "compressors" not in options
+
+    monkeypatch.setattr(DBConfing, "COMPRESSORS", "zstd,zlib")
+    assert DBConfing.client_options()["compressors"] == "zstd,zlib"
+
+
+async def test_not_ready_until_warm_up(db, monkeypatch):
+    monkeypatch.setattr(DBConfing, "ready", False)
+    state = await DBConfing.readiness()
+    assert state["ready"] is False
+    assert state["pool"]["max_pool_size"] == DBConfing.MAX_POOL_SIZE
+
+    pings = []
+    command = db.command
+
+    async def counting_command(name, *args, **kwargs):
+        pings.append(name)
+        return await command(name, *args, **kwargs)
+
+    monkeypatch.setattr(db, "command", counting_command)
+    monkeypatch.setattr(DBConfing, "WARMUP_CONNECTIONS", 4)
+
+    await DBConfing.warm_up()
+    # Un ping inicial más uno por conexión a precalentar
+    assert pings == ["ping"] * 5
+    assert (await DBConfing.readiness())["ready"] is True
+
+
+async def test_readiness_reports_failed_ping(db, monkeypatch):
+    monkeypatch.setattr(DBConfing, "ready", True)
+
+    async def failing_command(name, *args, **kwargs):
+        raise ConnectionError("sin servidor")
+
+    monkeypatch.setattr(db, "command", failing_command)
+    state = await DBConfing.readiness()
+    assert state["ready"] is False
+    assert "sin servidor" in state["error"]
+
+
+async def test_health_ready_status_code(api, monkeypatch):
+    monkeypatch.setattr(DBConfing, "ready", False)
+    r = await api.get("/health/ready")
+    assert r.status_code == 503
+
+    monkeypatch.setattr(DBConfing, "ready", True)
+    r = await api.get("/health/ready")
+    assert r.status_code == 200
+    assert r.json()["ready"] is True
@@ -0,0 +1,83 @@
+# tests/test_fastResponses.py
+# FAST_RESPONSES: los bytes precalculados tienen que ser idénticos a los del
+# camino normal (response_model + JSONResponse)
+import pytest
+
+import routes.pieceRoutes as pieceRoutes
+import routes.combinedPiecesRoutes as combinedPiecesRoutes
+import routes.bonusProduct as bonusProductRoutes
+from services import catalogCache
+
+pytestmark = pytest.mark.anyio
+
+LISTS = [
+    (pieceRoutes, "/authPiece/pieces"),
+    (combinedPiecesRoutes, "/authCombinedPieces/combinedPieces"),
+    (bonusProductRoutes, "/authBonusProduct/bonusProduct"),
+]
+
+
+async def seed(api):
+    codes = []
+    for i in range(5):
+        r = await api.post("/authPiece/addPiece", json={
+            "name": f"Roll ñandú {i}",
+            "description": "con \"comillas\" y acentos: salmón",
+            "img": f"https://img/{i}.png",
+            "costRoll": 8000 + i * 750,
+            "category": "rolls",
+            "protein": "salmón" if i % 2 else "atún",
+        })
+        assert r.status_code == 201
+        codes.append(r.json()["data"]["code"])
+
+    r = await api.post("/authCombinedPieces/addCombinedPieces", json={
+        "name": "Combo", "img": "i", "description": "d",
+        "typePieces": codes[:4], "proteins": ["salmón"],
+    })
+    assert r.status_code == 201
+
+    r = await api.post("/authBonusProduct/addBonusProduct", json={
+        "name": "Gaseosa", "description": "d", "img": "i",
+        "type": "bebida", "price": 2500,
+    })
+    assert r.status_code == 201
+
+
+async def test_fast_path_bytes_match_response_model(api, monkeypatch):
+    await seed(api)
+
+    for module, path in LISTS:
+        monkeypatch.setattr(module, "FAST_RESPONSES", False)
+        normal = await api.get(path)
+
+        catalogCache.clear()
+        monkeypatch.setattr(module, "FAST_RESPONSES", True)
+        fast = await api.get(path)
+
+        assert normal.status_code == fast.status_code == 200
+        assert fast.headers["content-type"] == "application/json"
+        assert fast.content == normal.content, path
+
+
+async def test_fast_path_serves_cached_bytes_until_invalidated(api, monkeypatch):
+    await seed(api)
+    monkeypatch.setattr(pieceRoutes, "FAST_RESPONSES", True)
+
+    first = await api.get("/authPiece/pieces")
+    again = await api.get("/authPiece/pieces")
+    assert again.content == first.content
+    assert again.headers["etag"] == first.headers["etag"]
+
+    piece = first.json()[0]
+    r = await api.put(f"/authPiece/updatePiece/{piece['code']}", json={
+        "name": "Renombrado", "description": piece["description"],
+        "img": piece["img"], "costRoll": piece["costRoll"],
+        "category": piece["category"], "protein": piece["protein"],
+        "state": True,
+    })
+    assert r.status_code == 200
+
+    after = await api.get("/authPiece/pieces")
+    assert after.headers["etag"] != first.headers["etag"]
+    assert after.json()[0]["name"] == "Renombrado"
@@ -0,0 +1,46 @@
+# tests/test_fieldProjection.py
+# ?fields= en piezas: campos del modelo, vistas fijas y los price_Xp de las
+# reglas vigentes
+import pytest
+
+from services.pricingRules import DEFAULT_RULES
+
+pytestmark = pytest.mark.anyio
+
+
+async def seed(api) -> None:
+    for i in range(3):
+        r = await api.post("/authPiece/addPiece", json={
+            "name": f"p{i}", "description": "d", "img": "i",
+            "costRoll": 8000 + i * 800, "category": "rolls", "protein": "atún",
+        })
+        assert r.status_code == 201
+
+
+async def test_projection_returns_only_requested_fields(api):
+    await seed(api)
+    r = await api.get("/authPiece/pieces?fields=name,price_8p")
+    assert r.status_code == 200
+    assert all(set(p) == {"code", "name", "price_8p"} for p in r.json())
+
+    r = await api.get("/authPiece/pieces?fields=name,nope")
+    assert r.status_code == 400
+
+
+async def test_sizes_added_by_rules_can_be_requested(api):
+    await seed(api)
+    assert (await api.get("/authPiece/pieces?fields=code,price_2p")).status_code == 400
+    card = (await api.get("/authPiece/pieces?fields=card")).json()[0]
+    assert "price_2p" not in card
+
+    rules = {**DEFAULT_RULES, "markups": {**DEFAULT_RULES["markups"], 2: 1.5}}
+    r = await api.put("/authPricing/rules", json={**rules, "baseVersion": 0})
+    assert r.status_code == 200
+
+    r = await api.get("/authPiece/pieces?fields=code,price_2p")
+    assert r.status_code == 200
+    assert all(isinstance(p["price_2p"], int) for p in r.json())
+
+    # La vista cacheada se arma de nuevo con los tamaños de la versión nueva
+    card = (await api.get("/authPiece/pieces?fields=card")).json()[0]
+    assert {f"price_{s}p" for s in (2, 3, 4, 5, 8, 16)} <= set(card)
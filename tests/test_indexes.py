@@ -0,0 +1,35 @@
+# tests/test_indexes.py
+# Reconciliación de índices: crea lo que falta y no arranca si un índice
+# unique no se puede crear
+import pytest
+
+from dataBase.indexes import INDEXES, reconcile_indexes, conflicting_values
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_creates_missing_indexes_once(db):
+    await reconcile_indexes(db)
+
+    info = await db["pieces"].index_information()
+    assert info["name_1"]["unique"] and info["code_1"]["unique"]
+    assert "active_1__id_1" in await db["comboVariants"].index_information()
+
+
+async def test_duplicates_make_startup_fail_with_the_conflicts(db):
+    await db["bonusProduct"].insert_many([
+        {"code": "B1", "name": "Gaseosa"},
+        {"code": "B2", "name": "Gaseosa"},
+        {"code": "B3", "name": "Agua"},
+    ])
+
+    with pytest.raises(RuntimeError) as error:
+        await reconcile_indexes(db)
+    assert "bonusProduct.name_1" in str(error.value)
+    assert "Gaseosa" in str(error.value)
+
+    spec = next(
+        s for s in INDEXES
+        if s["collection"] == "bonusProduct" and s["keys"] == [("name", 1)]
+    )
+    assert await conflicting_values(db, spec) == ["Gaseosa"]
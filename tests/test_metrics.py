@@ -0,0 +1,31 @@
+# tests/test_metrics.py
+# /metrics: contadores de la caché de catálogo
+import pytest
+
+from services import catalogCache
+
+pytestmark = pytest.mark.anyio
+
+
+def counter(text: str, name: str) -> int:
+    for line in text.splitlines():
+        if line.startswith(f"{name} "):
+            return int(line.split()[1])
+    raise AssertionError(f"falta {name}")
+
+
+async def test_cache_counters_are_exported(api):
+    before = dict(catalogCache.stats)
+
+    r = await api.post("/authBonusProduct/addBonusProduct", json={
+        "name": "Gaseosa", "description": "d", "img": "i",
+        "type": "bebida", "price": 2500,
+    })
+    assert r.status_code == 201
+    await api.get("/authBonusProduct/bonusProduct")
+    await api.get("/authBonusProduct/bonusProduct")
+
+    text = (await api.get("/metrics")).text
+    assert "# TYPE catalog_cache_hits_total counter" in text
+    for key in ("hits", "misses", "invalidations"):
+        assert counter(text, f"catalog_cache_{key}_total") > before[key]
@@ -0,0 +1,146 @@
+# tests/test_pricingRules.py
+# Reglas de precios versionadas: compilación, descuentos por bisect y
+# recálculo solo de lo que cambió
+import pytest
+from fastapi import HTTPException
+
+from models.pricingRules import PricingRules
+from services.pricingRules import (
+    COLLECTION,
+    DEFAULT_RULES,
+    compile_rules,
+    to_document,
+    current_rules,
+    sync_rules,
+)
+from services.pricingRulesService import update_rules
+from services.variantQueue import COLLECTION as QUEUE_COLLECTION
+from services.pieceService import generate_prices
+from services import catalogCache
+
+pytestmark = pytest.mark.anyio
+
+
+def linear_discount(rules: dict, total: int) -> float:
+    # Recorrido de las reglas como lo hacía el código original
+    discount = 0.0
+    for rule in sorted(rules["discountRules"], key=lambda r: r["minPieces"]):
+        if total >= rule["minPieces"]:
+            discount = rule["discount"]
+    return discount
+
+
+def edited(**changes) -> PricingRules:
+    return PricingRules(**{**DEFAULT_RULES, **changes})
+
+
+def test_compiled_schemas_skip_excluded():
+    rules = compile_rules(DEFAULT_RULES)
+    keys = [(s["take"], s["perRoll"]) for s in rules.schemas]
+    assert (3, 8) not in keys
+    assert keys == [(t, r) for r in (4, 8) for t in (3, 4, 5) if (t, r) != (3, 8)]
+
+
+def test_discount_for_matches_linear_scan():
+    rules = compile_rules(DEFAULT_RULES)
+    for total in range(0, 50):
+        assert rules.discount_for(total) == linear_discount(DEFAULT_RULES, total)
+
+
+def test_document_round_trip_restores_int_sizes():
+    doc = to_document(DEFAULT_RULES, 7)
+    assert set(doc["markups"]) == {"3", "4", "5", "8", "16"}
+
+    rules = compile_rules(doc, doc["_id"])
+    assert rules.version == 7
+    assert rules.markups == {int(k): float(v) for k, v in DEFAULT_RULES["markups"].items()}
+    assert rules.schemas == compile_rules(DEFAULT_RULES).schemas
+
+
+async def seed(db) -> None:
+    pieces = [
+        {"code": f"P{i}", "name": f"p{i}", "costRoll": 8000 + i * 800,
+         **generate_prices(8000 + i * 800)}
+        for i in range(5)
+    ]
+    await db["pieces"].insert_many(pieces)
+    await db["combinedPieces"].insert_many([
+        {"code": "SMALL", "name": "s", "typePieces": ["P0", "P1", "P2"]},
+        {"code": "BIG", "name": "b", "typePieces": ["P0", "P1", "P2", "P3", "P4"]},
+    ])
+
+
+async def test_markup_change_reprices_one_size_and_its_schemas(db):
+    await seed(db)
+    before = {p["code"]: p async for p in db["pieces"].find()}
+
+    markups = {**DEFAULT_RULES["markups"], 4: 3.5}
+    change = await update_rules(edited(markups=markups), db, base_version=0)
+
+    assert change.version == 1
+    assert change.piecesRepriced == 5
+    assert change.affectedSchemas == [
+        {"take": 3, "perRoll": 4}, {"take": 4, "perRoll": 4}, {"take": 5, "perRoll": 4}
+    ]
+    # take 3: los dos combos tienen al menos tres piezas
+    assert change.combosQueued == 2
+    assert await db[QUEUE_COLLECTION].count_documents({}) == 2
+
+    async for piece in db["pieces"].find():
+        old = before[piece["code"]]
+        assert piece["price_4p"] == generate_prices(piece["costRoll"], {4: 3.5})["price_4p"]
+        assert piece["price_4p"] != old["price_4p"]
+        assert all(piece[f"price_{s}p"] == old[f"price_{s}p"] for s in (3, 5, 8, 16))
+
+    assert current_rules().version == 1
+
+
+async def test_discount_change_only_queues_combos_that_reach_the_take(db):
+    await seed(db)
+    discounts = [
+        {**r, "discount": 0.25} if r["minPieces"] == 30 else r
+        for r in DEFAULT_RULES["discountRules"]
+    ]
+    change = await update_rules(edited(discountRules=discounts), db)
+
+    # 30 piezas o más: (5, 8) y (4, 8)
+    assert change.piecesRepriced == 0
+    assert change.affectedSchemas == [{"take": 4, "perRoll": 8}, {"take": 5, "perRoll": 8}]
+    assert change.combosQueued == 1
+    assert await db[QUEUE_COLLECTION].find_one({"_id": "BIG"})
+
+
+async def test_removed_size_drops_its_price_field(db):
+    await seed(db)
+    markups = {k: v for k, v in DEFAULT_RULES["markups"].items() if k != 16}
+    change = await update_rules(edited(markups=markups), db)
+
+    assert change.piecesRepriced == 5
+    assert change.affectedSchemas == []
+    assert await db["pieces"].count_documents({"price_16p": {"$exists": True}}) == 0
+
+
+async def test_stale_base_version_is_rejected(db):
+    await update_rules(edited(takes=[3, 4]), db, base_version=0)
+
+    with pytest.raises(HTTPException) as error:
+        await update_rules(edited(takes=[3]), db, base_version=0)
+    assert error.value.status_code == 409
+    assert await db[COLLECTION].count_documents({}) == 1
+
+
+async def test_invalid_rules_are_rejected(db):
+    with pytest.raises(HTTPException) as error:
+        await update_rules(edited(rollSizes=[4, 8, 12]), db)
+    assert error.value.status_code == 400
+    assert await db[COLLECTION].count_documents({}) == 0
+
+
+async def test_sync_rules_picks_up_other_workers_versions(db):
+    await db[COLLECTION].insert_one(to_document({**DEFAULT_RULES, "takes": [3]}, 4))
+    # Otro worker guardó la versión: la caché se entera por catalogVersions
+    await catalogCache.invalidate(db, COLLECTION)
+
+    rules = await sync_rules(db)
+    assert rules.version == 4
+    assert {s["take"] for s in rules.schemas} == {3}
@@ -0,0 +1,88 @@
+# tests/test_quote.py
+# Cotización de carritos contra las tablas de precios en memoria
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+QUOTE = "/authQuote/quote"
+
+
+async def seed(api) -> dict:
+    pieces = []
+    for i in range(4):
+        r = await api.post("/authPiece/addPiece", json={
+            "name": f"p{i}", "description": "d", "img": "i",
+            "costRoll": 8000 + i * 800, "category": "rolls", "protein": "atún",
+        })
+        pieces.append(r.json()["data"])
+
+    body = {"name": "Combo", "img": "i", "description": "d",
+            "typePieces": [p["code"] for p in pieces], "proteins": []}
+    r = await api.post("/authCombinedPieces/addCombinedPieces", json=body)
+    combo = {**body, "code": r.json()["data"]["code"]}
+    variants = (await api.get(
+        f"/authCombinedPieces/combinedPieces/variants/{combo['code']}"
+    )).json()
+
+    r = await api.post("/authBonusProduct/addBonusProduct", json={
+        "name": "Gaseosa", "description": "d", "img": "i",
+        "type": "bebida", "price": 2500,
+    })
+    return {"pieces": pieces, "combo": combo, "variant": variants[0],
+            "bonus": r.json()["data"]}
+
+
+async def quote(api, *items) -> dict:
+    r = await api.post(QUOTE, json={"items": list(items)})
+    assert r.status_code == 200
+    return r.json()["data"]
+
+
+async def test_prices_every_line_type(api):
+    data = await seed(api)
+    piece, variant, bonus = data["pieces"][0], data["variant"], data["bonus"]
+
+    result = await quote(
+        api,
+        {"type": "piece", "code": piece["code"], "size": 8, "quantity": 2},
+        {"type": "combo", "code": variant["_id"]},
+        {"type": "bonus", "code": bonus["code"], "quantity": 3},
+    )
+    totals = [line["total"] for line in result["lines"]]
+    assert totals == [piece["price_8p"] * 2, variant["finalPrice"], 2500 * 3]
+    assert result["total"] == sum(totals)
+    assert result["valid"] is True
+
+
+async def test_invalid_lines_are_reported_without_failing_the_cart(api):
+    data = await seed(api)
+    piece = data["pieces"][0]
+
+    result = await quote(
+        api,
+        {"type": "piece", "code": piece["code"], "size": 7},
+        {"type": "piece", "code": "NOPE", "size": 8},
+        {"type": "bonus", "code": data["bonus"]["code"]},
+    )
+    errors = [line["error"] for line in result["lines"]]
+    assert errors[0].startswith("Tamaño inválido") and errors[1] and errors[2] is None
+    assert result["total"] == 2500
+    assert result["valid"] is False
+
+
+async def test_tables_follow_catalog_changes(api):
+    data = await seed(api)
+    combo, variant = data["combo"], data["variant"]
+    line = {"type": "combo", "code": variant["_id"]}
+    assert (await quote(api, line))["valid"] is True
+
+    body = {k: v for k, v in combo.items() if k != "code"}
+    r = await api.put(
+        f"/authCombinedPieces/updateCombinedPieces/{combo['code']}",
+        json={**body, "state": False}
+    )
+    assert r.status_code == 200
+
+    result = await quote(api, line)
+    assert result["valid"] is False
+    assert result["lines"][0]["error"] == "Variante inexistente o no disponible"
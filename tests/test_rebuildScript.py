@@ -0,0 +1,47 @@
+# tests/test_rebuildScript.py
+# scripts/rebuild_combo_variants.py: una segunda corrida sobre el mismo
+# catálogo no regenera nada
+import pytest
+
+import dataBase.DBConfing as DBConfing
+from scripts.rebuild_combo_variants import rebuild_all_variants
+from services.pieceService import generate_prices
+
+pytestmark = pytest.mark.anyio
+
+
+async def seed(db) -> None:
+    pieces = [
+        {"code": f"P{i}", "name": f"p{i}", "protein": "salmón",
+         **generate_prices(8000 + i * 400)}
+        for i in range(5)
+    ]
+    await db["pieces"].insert_many(pieces)
+    await db["combinedPieces"].insert_many([
+        {"code": "C1", "name": "A", "state": True,
+         "typePieces": [p["code"] for p in pieces]},
+        {"code": "C2", "name": "B", "state": False,
+         "typePieces": [p["code"] for p in pieces[:3]]},
+    ])
+
+
+async def run(db, **options) -> dict:
+    # El script cierra la conexión al terminar: cada corrida la reabre
+    client = DBConfing.client
+    try:
+        return await rebuild_all_variants(**options)
+    finally:
+        DBConfing.client, DBConfing.db = client, db
+
+
+@pytest.mark.parametrize("options", [{"only_changed": True}, {"dry_run": True}])
+async def test_second_run_reports_unchanged(db, options):
+    await seed(db)
+
+    first = await run(db, only_changed=True)
+    assert first["rebuilt"] == 2 and first["unchanged"] == 0
+
+    second = await run(db, **options)
+    assert second["rebuilt"] == 0
+    assert second["unchanged"] == 2
+    assert second["writes"] == 0
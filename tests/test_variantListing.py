@@ -0,0 +1,67 @@
+# tests/test_variantListing.py
+# /comboVariants en JSON y en NDJSON: paginación, y un ETag por formato con
+# Vary: Accept
+import json
+
+import pytest
+
+from services.comboVariantService import replace_combo_variants, drain_gc
+
+pytestmark = pytest.mark.anyio
+
+PATH = "/authCombinedPieces/comboVariants"
+NDJSON = {"Accept": "application/x-ndjson"}
+
+
+def varies(response) -> list:
+    # El middleware de CORS agrega Origin
+    return [v.strip() for v in response.headers["vary"].split(",")]
+
+
+async def seed(db) -> None:
+    codes = ("C1", "C2", "C3")
+    await db["combinedPieces"].insert_many(
+        [{"code": c, "name": c, "state": True, "typePieces": []} for c in codes]
+    )
+    await replace_combo_variants({
+        code: [
+            {"take": take, "perRoll": 4, "pieces": [], "totalPieces": take * 4,
+             "basePrice": 100 * take + i, "finalPrice": 100 * take + i,
+             "discounted": False, "discountPercent": 0, "proteins": []}
+            for take in (3, 4)
+        ]
+        for i, code in enumerate(codes)
+    }, db)
+    await drain_gc()
+
+
+async def test_json_and_ndjson_have_their_own_etag(api, db):
+    await seed(db)
+    as_json = await api.get(PATH)
+    as_ndjson = await api.get(PATH, headers=NDJSON)
+
+    assert "Accept" in varies(as_json) and "Accept" in varies(as_ndjson)
+    assert as_json.headers["etag"] != as_ndjson.headers["etag"]
+    lines = [json.loads(line) for line in as_ndjson.text.splitlines()]
+    assert [v["_id"] for v in lines] == [v["_id"] for v in as_json.json()]
+
+    # El ETag de un formato no valida el otro
+    r = await api.get(PATH, headers={"If-None-Match": as_ndjson.headers["etag"]})
+    assert r.status_code == 200
+
+    r = await api.get(PATH, headers={**NDJSON, "If-None-Match": as_ndjson.headers["etag"]})
+    assert r.status_code == 304
+    assert "Accept" in varies(r)
+
+
+async def test_ndjson_pages_with_next_cursor(api, db):
+    await seed(db)
+    first = await api.get(f"{PATH}?limit=4", headers=NDJSON)
+    ids = [json.loads(line)["_id"] for line in first.text.splitlines()]
+    assert len(ids) == 4
+
+    after = first.headers["x-next-after"]
+    assert after == ids[-1]
+    rest = await api.get(f"{PATH}?limit=4&after={after}", headers=NDJSON)
+    assert len(rest.text.splitlines()) == 2
+    assert "x-next-after" not in rest.headers
@@ -0,0 +1,83 @@
+# tests/test_variantSearch.py
+# /comboVariants/search: el state del combo viaja a sus variantes
+# (comboState) y la búsqueda filtra y ordena en Mongo
+import pytest
+
+from services import variantWorker
+from services.variantWorker import process_ready
+from services.comboVariantService import drain_gc
+
+pytestmark = pytest.mark.anyio
+
+SEARCH = "/authCombinedPieces/comboVariants/search"
+
+
+async def seed(api) -> dict:
+    codes = []
+    for i in range(5):
+        r = await api.post("/authPiece/addPiece", json={
+            "name": f"p{i}", "description": "d", "img": "i",
+            "costRoll": 8000 + i * 800, "category": "rolls",
+            "protein": "salmón" if i % 2 else "atún",
+        })
+        codes.append(r.json()["data"]["code"])
+
+    combos = {}
+    for name in ("A", "B"):
+        body = {"name": name, "img": "i", "description": "d",
+                "typePieces": codes, "proteins": []}
+        r = await api.post("/authCombinedPieces/addCombinedPieces", json=body)
+        combos[name] = {**body, "code": r.json()["data"]["code"]}
+    await drain_gc()
+    return combos
+
+
+async def set_state(api, combo: dict, state: bool) -> None:
+    body = {k: v for k, v in combo.items() if k != "code"}
+    r = await api.put(
+        f"/authCombinedPieces/updateCombinedPieces/{combo['code']}",
+        json={**body, "state": state}
+    )
+    assert r.status_code == 200
+
+
+async def names(api, query: str = "?limit=100") -> set:
+    r = await api.get(SEARCH + query)
+    assert r.status_code == 200
+    return {v["comboName"] for v in r.json()}
+
+
+async def test_disabled_combo_is_hidden_from_search(api, db, monkeypatch):
+    combos = await seed(api)
+    assert await names(api) == {"A", "B"}
+
+    await set_state(api, combos["A"], False)
+    assert await names(api) == {"B"}
+    assert await db["comboVariants"].count_documents(
+        {"comboCode": combos["A"]["code"], "comboState": True}
+    ) == 0
+
+    # Un rebuild del combo deshabilitado no lo vuelve a mostrar
+    monkeypatch.setattr(variantWorker, "DEBOUNCE", 0)
+    assert await process_ready(db) >= 1
+    await drain_gc()
+    assert await names(api) == {"B"}
+
+    await set_state(api, combos["A"], True)
+    assert await names(api) == {"A", "B"}
+
+
+async def test_filters_and_sort(api):
+    await seed(api)
+
+    r = await api.get(SEARCH + "?minPieces=24&sort=-finalPrice&limit=100")
+    variants = r.json()
+    assert variants and all(v["totalPieces"] >= 24 for v in variants)
+    prices = [v["finalPrice"] for v in variants]
+    assert prices == sorted(prices, reverse=True)
+
+    r = await api.get(SEARCH + "?maxPrice=1&limit=100")
+    assert r.json() == []
+
+    r = await api.get(SEARCH + "?sort=basePrice")
+    assert r.status_code == 400
@@ -0,0 +1,106 @@
+# tests/test_variantWorker.py
+# Cola de regeneración: marcas agrupadas por combo, debounce, lease por
+# token y combos que se vuelven a marcar durante el rebuild
+import asyncio
+from datetime import timedelta
+
+import pytest
+
+from services import variantWorker
+from services.variantQueue import COLLECTION, mark_dirty, queue_status, utcnow
+from services.variantWorker import claim_batch, process_ready
+from services.comboVariantService import get_variants_by_combo, drain_gc
+from services.pieceService import generate_prices
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def no_debounce(monkeypatch):
+    monkeypatch.setattr(variantWorker, "DEBOUNCE", 0)
+
+
+async def seed_combo(db, code: str = "C1", size: int = 5) -> None:
+    pieces = [
+        {"code": f"{code}P{i}", "name": f"p{i}", "protein": "salmón",
+         "costRoll": 8000 + i * 400, **generate_prices(8000 + i * 400)}
+        for i in range(size)
+    ]
+    await db["pieces"].insert_many(pieces)
+    await db["combinedPieces"].insert_one({
+        "code": code, "name": code, "state": True,
+        "typePieces": [p["code"] for p in pieces],
+    })
+
+
+async def test_mark_dirty_coalesces_per_combo(db):
+    assert await mark_dirty(db, ["C1", "C2", "C1"]) == 2
+    first = await db[COLLECTION].find_one({"_id": "C1"})
+
+    await asyncio.sleep(0.01)
+    await mark_dirty(db, ["C1"])
+    again = await db[COLLECTION].find_one({"_id": "C1"})
+
+    assert await db[COLLECTION].count_documents({}) == 2
+    assert again["firstDirtyAt"] == first["firstDirtyAt"]
+    assert again["dirtyAt"] > first["dirtyAt"]
+    assert (await queue_status(db))["pending"] == 2
+
+
+async def test_claim_waits_for_debounce_unless_past_max_delay(db, monkeypatch):
+    monkeypatch.setattr(variantWorker, "DEBOUNCE", 60)
+    await mark_dirty(db, ["C1"])
+    assert await claim_batch(db) == ("", [])
+
+    # Un combo marcado sin pausa sale igual al pasar MAX_DELAY
+    long_ago = utcnow() - timedelta(seconds=variantWorker.MAX_DELAY + 1)
+    await db[COLLECTION].update_one({"_id": "C1"}, {"$set": {"firstDirtyAt": long_ago}})
+    token, entries = await claim_batch(db)
+    assert token and [e["_id"] for e in entries] == ["C1"]
+
+
+async def test_lease_blocks_other_claims_until_it_expires(db, no_debounce):
+    await mark_dirty(db, ["C1", "C2"])
+    token, entries = await claim_batch(db)
+    assert len(entries) == 2
+
+    # Otro proceso no puede tomar el lote mientras dura el lease
+    assert await claim_batch(db) == ("", [])
+    assert (await queue_status(db))["inProgress"] == 2
+
+    await db[COLLECTION].update_many(
+        {}, {"$set": {"claimedUntil": utcnow() - timedelta(seconds=1)}}
+    )
+    retaken, entries = await claim_batch(db)
+    assert retaken and retaken != token and len(entries) == 2
+
+
+async def test_process_ready_rebuilds_and_empties_queue(db, no_debounce):
+    await seed_combo(db)
+    await mark_dirty(db, ["C1"])
+
+    assert await process_ready(db) == 1
+    await drain_gc()
+    assert await db[COLLECTION].count_documents({}) == 0
+    assert await get_variants_by_combo("C1", db)
+    assert await process_ready(db) == 0
+
+
+async def test_combo_marked_during_rebuild_stays_queued(db, no_debounce, monkeypatch):
+    await seed_combo(db)
+    await mark_dirty(db, ["C1"])
+
+    rebuild = variantWorker.replace_combo_variants
+
+    async def edited_meanwhile(variants, database):
+        await asyncio.sleep(0.01)
+        await mark_dirty(database, ["C1"])
+        return await rebuild(variants, database)
+
+    monkeypatch.setattr(variantWorker, "replace_combo_variants", edited_meanwhile)
+    assert await process_ready(db) == 1
+    await drain_gc()
+
+    entry = await db[COLLECTION].find_one({"_id": "C1"})
+    assert entry is not None
+    assert "claimToken" not in entry and "claimedUntil" not in entry